@@ -16,10 +16,10 @@ Requires:
 """
 
 import os, json, time, argparse, sys
-import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from factors import ta
 
 try:
     import websocket
@@ -157,35 +157,33 @@ def fetch_candles(ws, symbol, granularity, count):
 
 # ── Indicator calculation (mirrors deriv.py) ──────────────────────────────
 
-def _ema(arr, n):
-    k = 2.0 / (n + 1); val = float(np.mean(arr[:n]))
-    for v in arr[n:]: val = float(v) * k + val * (1 - k)
-    return val
+def calc_ind(closes, highs, lows):
+    """Indicator columns for a whole series; row i sees only bars 0..i."""
+    macd, macd_sig, _ = ta.macd(closes)
+    stoch_k, _ = ta.stoch(highs, lows, closes)
+    return {"rsi": ta.rsi(closes), "macd": macd, "macd_signal": macd_sig,
+            "ema_21": ta.ema(closes, 21), "ema_50": ta.ema(closes, 50),
+            "atr": ta.atr(highs, lows, closes), "adx": ta.adx(highs, lows, closes),
+            "stoch_k": stoch_k}
 
 
-def calc_ind(closes, highs, lows):
-    diff = np.diff(closes)
-    gains = np.where(diff > 0, diff, 0.0); loss = np.where(diff < 0, -diff, 0.0)
-    rp = 14; ag = float(np.mean(gains[:rp])); al = float(np.mean(loss[:rp]))
-    for i in range(rp, len(gains)):
-        ag = (ag*(rp-1)+gains[i])/rp; al = (al*(rp-1)+loss[i])/rp
-    rsi = 100 - (100 / (1 + ag/(al+1e-9)))
-    ema21 = _ema(closes, 21); ema50 = _ema(closes, 50)
-    macd  = _ema(closes, 12) - _ema(closes, 26)
-    start = max(26, len(closes)-20)
-    mv = [_ema(closes[:i+1],12)-_ema(closes[:i+1],26) for i in range(start, len(closes))]
-    macd_sig = _ema(np.array(mv), 9) if len(mv) >= 9 else mv[-1]
-    tr = np.maximum(highs[1:]-lows[1:], np.maximum(np.abs(highs[1:]-closes[:-1]), np.abs(lows[1:]-closes[:-1])))
-    ap = 14; atr = float(np.mean(tr[:ap]))
-    for v in tr[ap:]: atr = (atr*(ap-1)+float(v))/ap
-    sp = 14; rh = float(np.max(highs[-sp:])); rl = float(np.min(lows[-sp:]))
-    stoch_k = ((float(closes[-1])-rl)/(rh-rl+1e-9))*100
-    dm_p = np.where((highs[1:]-highs[:-1])>(lows[:-1]-lows[1:]), np.maximum(highs[1:]-highs[:-1],0),0)
-    dm_m = np.where((lows[:-1]-lows[1:])>(highs[1:]-highs[:-1]), np.maximum(lows[:-1]-lows[1:],0),0)
-    aw = np.mean(tr[-ap:]); dip=100*np.mean(dm_p[-ap:])/(aw+1e-9); dim=100*np.mean(dm_m[-ap:])/(aw+1e-9)
-    adx = 100*abs(dip-dim)/(dip+dim+1e-9)
-    return {"rsi":rsi,"macd":macd,"macd_signal":macd_sig,"ema_21":ema21,"ema_50":ema50,
-            "atr":atr,"adx":adx,"stoch_k":stoch_k}
+def precompute(df15, df1h, df4h):
+    """
+    Every indicator for 15m/1h/4h as aligned arrays, plus for each 15m bar
+    the index of the latest 1h/4h bar opened at or before it.  Done once per
+    symbol; backtest_symbol (and every --sweep combo) only indexes into it.
+    """
+    pre = {}
+    for tf, df in (("15m", df15), ("1h", df1h), ("4h", df4h)):
+        closes, highs, lows = (df[c].values.astype(float) for c in ("close", "high", "low"))
+        pre[tf] = {"close": closes, "high": highs, "low": lows, "ind": calc_ind(closes, highs, lows)}
+    pre["j1"] = df1h.index.searchsorted(df15.index, side="right") - 1
+    pre["j4"] = df4h.index.searchsorted(df15.index, side="right") - 1
+    return pre
+
+
+def _row(ind, i):
+    return {k: float(col[i]) for k, col in ind.items()}
 
 
 def get_signal(i15, i1h, i4h, price, vol):
@@ -216,14 +214,17 @@ def calc_pnl(symbol, direction, entry, exit_p, stake, multiplier=100):
 
 # ── Core backtester ───────────────────────────────────────────────────────
 
-def backtest_symbol(ws_unused, symbol, df15, df1h, df4h, start_balance):
+def backtest_symbol(ws_unused, symbol, df15, df1h, df4h, start_balance, pre=None):
     specs  = SYMBOL_SPECS[symbol]; pip = specs["pip_size"]
     LOOK   = 100
     trades = []; balance = start_balance; pos = None
     daily_pnl = 0.0; last_day = None
+    pre    = pre or precompute(df15, df1h, df4h)
+    p15, p1h, p4h = pre["15m"], pre["1h"], pre["4h"]
+    epochs = df15.index.values
 
     for i in range(LOOK, len(df15)):
-        bar   = df15.iloc[i]; epoch = df15.index[i]
+        epoch = int(epochs[i])
         dt    = datetime.fromtimestamp(epoch, tz=timezone.utc)
         hf    = dt.hour + dt.minute/60.0
         today = dt.date()
@@ -238,7 +239,7 @@ def backtest_symbol(ws_unused, symbol, df15, df1h, df4h, start_balance):
 
         # ── Manage open position ──────────────────────────────────────────
         if pos:
-            hi, lo = float(bar["high"]), float(bar["low"])
+            hi, lo = float(p15["high"][i]), float(p15["low"][i])
             entry  = pos["entry"]; orig = pos["orig_stop"]
             stake  = pos["stake"]; atr  = pos["atr"]
 
@@ -301,29 +302,16 @@ def backtest_symbol(ws_unused, symbol, df15, df1h, df4h, start_balance):
         if not (london_open_utc <= hf <= ny_close_utc):
             continue
 
-        # ── Indicators ────────────────────────────────────────────────────
-        c15 = df15["close"].values[i-LOOK:i+1]
-        h15 = df15["high"].values[i-LOOK:i+1]
-        l15 = df15["low"].values[i-LOOK:i+1]
-        price = float(c15[-1])
-
-        j1 = df1h.index.searchsorted(epoch, side="right") - 1
-        j4 = df4h.index.searchsorted(epoch, side="right") - 1
+        # ── Indicators (precomputed; row = bars up to and including this one) ──
+        price = float(p15["close"][i])
+        j1 = pre["j1"][i]; j4 = pre["j4"][i]
         if j1 < LOOK or j4 < LOOK: continue
 
-        c1h = df1h["close"].values[max(0,j1-LOOK):j1+1]
-        h1h = df1h["high"].values[max(0,j1-LOOK):j1+1]
-        l1h = df1h["low"].values[max(0,j1-LOOK):j1+1]
-        c4h = df4h["close"].values[max(0,j4-LOOK):j4+1]
-        h4h = df4h["high"].values[max(0,j4-LOOK):j4+1]
-        l4h = df4h["low"].values[max(0,j4-LOOK):j4+1]
-        if len(c15)<55 or len(c1h)<55 or len(c4h)<55: continue
-
-        i15 = calc_ind(c15, h15, l15)
-        i1h = calc_ind(c1h, h1h, l1h)
-        i4h = calc_ind(c4h, h4h, l4h)
+        i15 = _row(p15["ind"], i)
+        i1h = _row(p1h["ind"], j1)
+        i4h = _row(p4h["ind"], j4)
 
-        vol = abs((price - (float(c1h[-24]) if len(c1h)>=24 else float(c1h[0]))) / price)
+        vol = abs((price - float(p1h["close"][j1-23])) / price)
         sig, score, atr = get_signal(i15, i1h, i4h, price, vol)
         if not sig: continue
 
@@ -395,7 +383,7 @@ def run_sweep(cached, start_bal):
         all_t = []; bal = start_bal
         for sym, dfs in cached.items():
             if dfs is None: continue
-            t, bal = backtest_symbol(None, sym, dfs["15m"], dfs["1h"], dfs["4h"], bal)
+            t, bal = backtest_symbol(None, sym, dfs["15m"], dfs["1h"], dfs["4h"], bal, dfs["pre"])
             all_t.extend(t)
         if not all_t:
             print(f"  {risk*100:>4.0f}%  {rr:>5.1f}  {thr:>5.2f} |   no trades"); continue
@@ -461,7 +449,7 @@ def main():
         d1h = fetch_candles(ws, sym, 3600,  min(1500, args.days*24)); time.sleep(0.4)
         d4h = fetch_candles(ws, sym, 14400, min(500,  args.days*6));  time.sleep(0.4)
         if d15 is not None and d1h is not None and d4h is not None:
-            cached[sym] = {"15m": d15, "1h": d1h, "4h": d4h}
+            cached[sym] = {"15m": d15, "1h": d1h, "4h": d4h, "pre": precompute(d15, d1h, d4h)}
             print(f"   ✅ {sym}: {len(d15)} × 15m bars")
         else:
             cached[sym] = None
@@ -475,7 +463,7 @@ def main():
     all_trades = []; balance = args.balance
     for sym, dfs in cached.items():
         if dfs is None: continue
-        t, balance = backtest_symbol(None, sym, dfs["15m"], dfs["1h"], dfs["4h"], balance)
+        t, balance = backtest_symbol(None, sym, dfs["15m"], dfs["1h"], dfs["4h"], balance, dfs["pre"])
         all_trades.extend(t)
 
     print_summary(all_trades, args.balance, balance)
@@ -10,11 +10,16 @@ LINKUSDT, and BNBUSDT.
 Outputs a rich feature dataset (trade_log.csv) formatted for XGBoost ML model training.
 
 REQUIREMENTS:
-    pip install pandas numpy requests ta-lib python-dotenv
+    pip install pandas numpy requests python-dotenv
 
 USAGE:
     python backtest.py --days 365 --balance 100
     python backtest.py --start-year 2022 --balance 100
+    python backtest_futures.py --start-year 2022 --offline   # cached klines only
+    python backtest_futures.py --sr-lookback 100            # S/R from the last 100 1h/4h bars, like the live bot
+
+Klines are cached per month under kline_cache/ (see market/kline_cache.py);
+repeat runs only download bars that are not cached yet.
 """
 
 import argparse
@@ -23,16 +28,14 @@ import os
 import time
 import numpy as np
 import pandas as pd
-import requests
-try:
-    import talib
-except ImportError:
-    talib = None
+from market import http_client
 from datetime import datetime, timezone, timedelta
-from factors.support_resistance import detect_sr_levels_from_arrays
+from factors import ta
+from factors.support_resistance import SRIndex
+from market.history import download_funding, download_klines
+from market.kline_cache import KlineCache
 
-BYBIT_KLINE_URL = "https://api.bybit.com/v5/market/kline"
-BYBIT_MKT_URL   = "https://api.bybit.com/v5/market"
+KLINE_CACHE = KlineCache()
 
 # ---- Multi-Asset Universe Configuration ----
 TRADE_SYMBOLS = ["SOLUSDT", "ETHUSDT", "AVAXUSDT", "LINKUSDT", "BNBUSDT"]
@@ -63,54 +66,27 @@ MF_WEIGHTS          = {"regime": 0.25, "derivatives": 0.22,
 MF_LONG_THRESHOLD   = 0.25   # production threshold
 MF_SHORT_THRESHOLD  = 0.15   # production threshold
 
+# ---- S/R history (the live bot detects levels on its last 100 1h / 4h bars) ----
+SR_LOOKBACK_BARS    = 0      # 0 = every bar since the start of the backtest; 100 = live bot window
+
 
 # ----------------------------------------------------------------------
 # Data fetching
 # ----------------------------------------------------------------------
 def fetch_klines(symbol, interval, start_ms, end_ms):
-    """Paginate Bybit's public kline endpoint to build a full historical range."""
-    all_rows = []
-    cursor_end = end_ms
-    print(f"   Fetching {symbol} ({interval}m)...")
-    while cursor_end > start_ms:
-        params = {
-            "category": "linear",
-            "symbol": symbol,
-            "interval": interval,
-            "start": start_ms,
-            "end": cursor_end,
-            "limit": 1000,
-        }
-        try:
-            resp = requests.get(BYBIT_KLINE_URL, params=params, timeout=20)
-            data = resp.json()
-            if data.get("retCode") != 0:
-                print(f"⚠️ Bybit API warning ({symbol}): {data.get('retMsg')}")
-                break
-            rows = data["result"]["list"]
-            if not rows:
-                break
-            all_rows.extend(rows)
-            oldest_ts = int(rows[-1][0])
-            if oldest_ts <= start_ms:
-                break
-            cursor_end = oldest_ts - 1
-            time.sleep(0.12)  # rate limit safety
-        except Exception as e:
-            print(f"⚠️ Fetch exception ({symbol}): {e}")
-            break
-
-    if not all_rows:
+    """Historical klines for [start_ms, end_ms] from the on-disk cache, downloading only missing months."""
+    print(f"   Loading {symbol} ({interval}m)...")
+    ts, cols = KLINE_CACHE.load(
+        "linear", symbol, interval, start_ms, end_ms,
+        download=lambda s, e: download_klines(symbol, interval, s, e),
+    )
+    if len(ts) == 0:
         return pd.DataFrame()
 
-    df = pd.DataFrame(
-        all_rows,
-        columns=["ts", "open", "high", "low", "close", "volume", "turnover"],
-    )
-    df["ts"] = pd.to_numeric(df["ts"])
-    for c in ["open", "high", "low", "close", "volume"]:
-        df[c] = pd.to_numeric(df[c])
-    df = df.drop_duplicates(subset="ts").sort_values("ts").reset_index(drop=True)
+    df = pd.DataFrame({
+        "ts": ts, "open": cols[0], "high": cols[1], "low": cols[2],
+        "close": cols[3], "volume": cols[4],
+    })
     df["time"] = pd.to_datetime(df["ts"], unit="ms")
     return df
 
@@ -126,17 +102,17 @@ def build_indicators(df):
     volume = df["volume"].values
 
     out = pd.DataFrame(index=df.index)
-    out["rsi"] = talib.RSI(close, timeperiod=14)
-    macd, macd_signal, macd_hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    out["rsi"] = ta.rsi(close, 14)
+    macd, macd_signal, macd_hist = ta.macd(close, 12, 26, 9)
     out["macd"] = macd
     out["macd_signal"] = macd_signal
     out["macd_histogram"] = macd_hist
-    out["ema_21"] = talib.EMA(close, timeperiod=21)
-    out["ema_50"] = talib.EMA(close, timeperiod=50)
-    out["atr"] = talib.ATR(high, low, close, timeperiod=14)
-    out["volume_sma"] = talib.SMA(volume, timeperiod=20)
-    out["adx"] = talib.ADX(high, low, close, timeperiod=14)
-    stoch_k, stoch_d = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowd_period=3)
+    out["ema_21"] = ta.ema(close, 21)
+    out["ema_50"] = ta.ema(close, 50)
+    out["atr"] = ta.atr(high, low, close, 14)
+    out["volume_sma"] = ta.sma(volume, 20)
+    out["adx"] = ta.adx(high, low, close, 14)
+    stoch_k, stoch_d = ta.stoch(high, low, close, 14, 3, 3)
     out["stoch_k"] = stoch_k
     out["stoch_d"] = stoch_d
     out["volume_ratio"] = volume / out["volume_sma"].replace(0, np.nan)
@@ -154,39 +130,18 @@ def build_indicators(df):
 
 def fetch_historical_funding(symbol: str, start_ms: int, end_ms: int) -> dict:
     """Pull full Bybit funding-rate history for a symbol."""
-    url = f"{BYBIT_MKT_URL}/funding/history"
-    result = {}
-    cursor_end = end_ms
-    while cursor_end > start_ms:
-        try:
-            resp = requests.get(url, params={
-                "category": "linear", "symbol": symbol,
-                "startTime": start_ms, "endTime": cursor_end, "limit": 200,
-            }, timeout=15)
-            data = resp.json()
-            if data.get("retCode") != 0:
-                break
-            items = data["result"]["list"]
-            if not items:
-                break
-            for item in items:
-                ts = int(item["fundingRateTimestamp"])
-                result[ts] = float(item["fundingRate"])
-            oldest = int(items[-1]["fundingRateTimestamp"])
-            if oldest <= start_ms:
-                break
-            cursor_end = oldest - 1
-            time.sleep(0.12)
-        except Exception:
-            break
-    return result
+    got = download_funding(symbol, start_ms, end_ms)
+    if got is None:
+        return {}
+    ts, rates = got
+    return dict(zip(ts.tolist(), rates.tolist()))
 
 
 def fetch_historical_fng(days: int) -> dict:
     """Fetch Fear & Greed history from alternative.me."""
     try:
-        resp = requests.get("https://api.alternative.me/fng/",
-                            params={"limit": days}, timeout=12)
+        resp = http_client.get("https://api.alternative.me/fng/",
+                               params={"limit": days}, timeout=12)
         data = resp.json()
         result = {}
         for entry in data.get("data", []):
@@ -415,7 +370,8 @@ def calculate_position_size(symbol, balance, entry_price, stop_loss, leverage):
 # ----------------------------------------------------------------------
 # Multi-Asset Backtest Execution Engine
 # ----------------------------------------------------------------------
-def run_multi_asset_backtest(symbols, start_ms, end_ms, starting_balance, no_factors=False):
+def run_multi_asset_backtest(symbols, start_ms, end_ms, starting_balance, no_factors=False,
+                             sr_lookback=SR_LOOKBACK_BARS):
     """Executes multi-asset bar-by-bar backtest across all symbols in universe."""
 
     print("\n" + "=" * 60)
@@ -433,6 +389,14 @@ def run_multi_asset_backtest(symbols, start_ms, end_ms, starting_balance, no_fac
         data1h[sym] = build_indicators(df1h)
         data4h[sym] = build_indicators(df4h)
 
+    # Incremental S/R level index per symbol (levels confirmed as bars arrive)
+    sr_index = {
+        sym: SRIndex(data1h[sym]["high"].values, data1h[sym]["low"].values,
+                     data4h[sym]["high"].values, data4h[sym]["low"].values,
+                     lookback=sr_lookback or None)
+        for sym in symbols
+    }
+
     # Fetch BTC data for macro correlation and regime
     dfbtc = fetch_klines("BTCUSDT", HIGHER_TF, start_ms, end_ms)
     btc1h = build_indicators(dfbtc)
@@ -451,11 +415,14 @@ def run_multi_asset_backtest(symbols, start_ms, end_ms, starting_balance, no_fac
         print("=" * 60)
         regime_scores = build_regime_scores(btc1h)
         days_count = (end_ms - start_ms) // (24 * 3600 * 1000)
-        fng_map = fetch_historical_fng(min(days_count, 365))
 
-        for sym in symbols:
-            funding_maps[sym] = fetch_historical_funding(sym, start_ms, end_ms)
-            print(f"  Funding history for {sym}: {len(funding_maps[sym])} records ✓")
+        if KLINE_CACHE.offline:
+            print("  Offline: funding & F&G history not fetched — using fallbacks")
+        else:
+            fng_map = fetch_historical_fng(min(days_count, 365))
+            for sym in symbols:
+                funding_maps[sym] = fetch_historical_funding(sym, start_ms, end_ms)
+                print(f"  Funding history for {sym}: {len(funding_maps[sym])} records ✓")
 
     # Establish master timeline based on first symbol's 15m candles
     master_df = data15[symbols[0]]
@@ -666,12 +633,8 @@ def run_multi_asset_backtest(symbols, start_ms, end_ms, starting_balance, no_fac
                 if not signal["signal"] or signal["strength"] < SIGNAL_STRENGTH_THRESHOLD:
                     continue
 
-                # Compute S/R levels
-                h1 = ind1h_df["high"].values[:idx1h + 1]
-                l1 = ind1h_df["low"].values[:idx1h + 1]
-                h4 = ind4h_df["high"].values[:idx4h + 1]
-                l4 = ind4h_df["low"].values[:idx4h + 1]
-                sr_res = detect_sr_levels_from_arrays(h1, l1, h4, l4, current_price)
+                # S/R levels as of this bar (1h/4h bars up to idx1h/idx4h)
+                sr_res = sr_index[sym].query(idx1h, idx4h, current_price)
 
                 # Multi-Factor Consensus Evaluation
                 if no_factors:
@@ -806,8 +769,16 @@ def main():
     parser.add_argument("--start-year", type=int,   default=None,  help="Start calendar year (e.g. 2022)")
     parser.add_argument("--balance",    type=float, default=100.0, help="Starting balance in USDT")
     parser.add_argument("--no-factors", action="store_true",    help="Pure TA mode — skip multi-factor gating")
+    parser.add_argument("--offline",    action="store_true",    help="Use cached klines only (no network)")
+    parser.add_argument("--cache-dir",  type=str,   default=None,  help="Kline cache directory (default kline_cache/)")
+    parser.add_argument("--sr-lookback", type=int,  default=SR_LOOKBACK_BARS,
+                        help="1h/4h bars of S/R history per query (default 0 = all; 100 matches the live bot)")
     args = parser.parse_args()
 
+    KLINE_CACHE.offline = args.offline
+    if args.cache_dir:
+        KLINE_CACHE.root = args.cache_dir
+
     if args.start_year:
         start_ms = int(datetime(args.start_year, 1, 1).timestamp() * 1000)
         end_ms   = int(time.time() * 1000)
@@ -825,7 +796,8 @@ def main():
     print(f"{'='*60}")
 
     trades, equity = run_multi_asset_backtest(
-        TRADE_SYMBOLS, start_ms, end_ms, args.balance, no_factors=args.no_factors
+        TRADE_SYMBOLS, start_ms, end_ms, args.balance, no_factors=args.no_factors,
+        sr_lookback=args.sr_lookback,
     )
 
     tlog = "trade_log.csv"
@@ -20,8 +20,9 @@ import sqlite3
 import numpy as np
 import argparse
 from datetime import datetime, timezone, timedelta
-from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from factors.indicators import ENGINE as indicator_engine
+from factors.cache import cached, scored
 
 # Try importing websocket-client
 try:
@@ -31,21 +32,8 @@ except ImportError:
     websocket = None
     HAS_WEBSOCKET = False
 
-# Try importing feedparser for News RSS
-try:
-    import feedparser
-    HAS_FEEDPARSER = True
-except ImportError:
-    feedparser = None
-    HAS_FEEDPARSER = False
-
-# Try importing TA-Lib
-try:
-    import talib
-    HAS_TALIB = True
-except ImportError:
-    talib = None
-    HAS_TALIB = False
+# News RSS via the shared conditional-GET feed cache
+from market import rss
 
 # Try importing Support & Resistance factor from factors module
 try:
@@ -115,9 +103,9 @@ NEGATIVE_KEYWORDS = {
     "slump", "deficit", "unemployment", "risk", "warning", "downside"
 }
 
-# News sentiment cache: {symbol: (cache_timestamp, score_dict)}
-_NEWS_CACHE: dict = {}
+# News sentiment cache TTL (factors/cache.py registry entry "deriv.news")
 NEWS_CACHE_TTL = 900  # 15 minutes — avoid hammering Google News RSS every cycle
+NEWS_RETRY_TTL = 300  # failed / empty fetches are retried after 5 minutes, not every poll
 
 primary_timeframe = "15m"
 higher_timeframe  = "1h"
@@ -168,36 +156,23 @@ bot_state = {
 }
 
 
+@cached("deriv.news", ttl=NEWS_CACHE_TTL, accept=scored, negative_ttl=NEWS_RETRY_TTL)
 def get_forex_news_score(symbol: str) -> dict:
     """Fetch Google News RSS for USD Macro & Pair Specific Forex News.
-    Results are cached per symbol for NEWS_CACHE_TTL seconds (15 min) to
-    avoid hammering Google's RSS endpoint every polling cycle.
+    Results are cached per symbol for NEWS_CACHE_TTL seconds (15 min), and
+    failures for NEWS_RETRY_TTL (5 min), to avoid hammering Google's RSS
+    endpoint every polling cycle.
     """
-    now_ts = time.time()
-    # Return cached result if still fresh
-    if symbol in _NEWS_CACHE:
-        cache_time, cached_result = _NEWS_CACHE[symbol]
-        if now_ts - cache_time < NEWS_CACHE_TTL:
-            return cached_result
-
-    def _cache_and_return(result: dict) -> dict:
-        _NEWS_CACHE[symbol] = (now_ts, result)
-        return result
-
-    if not HAS_FEEDPARSER:
-        return _cache_and_return({"score": 0.0, "confidence": 0.0, "block_long_only": False, "details": {"reason": "feedparser not installed"}})
-
     try:
-        macro_url = f"https://news.google.com/rss/search?q={quote_plus(FOREX_NEWS_QUERIES['MACRO'])}&hl=en-US&gl=US&ceid=US:en"
-        macro_feed = feedparser.parse(macro_url)
+        # Macro feed is shared by every pair in the scan (one download per cycle)
+        macro_feed = rss.fetch_feed(rss.google_news_url(FOREX_NEWS_QUERIES['MACRO']))
 
         query_str = FOREX_NEWS_QUERIES.get(symbol, f"{symbol} forex news")
-        pair_url = f"https://news.google.com/rss/search?q={quote_plus(query_str)}&hl=en-US&gl=US&ceid=US:en"
-        pair_feed = feedparser.parse(pair_url)
+        pair_feed = rss.fetch_feed(rss.google_news_url(query_str))
 
         entries = (macro_feed.entries[:5] if macro_feed.entries else []) + (pair_feed.entries[:5] if pair_feed.entries else [])
         if not entries:
-            return _cache_and_return({"score": 0.0, "confidence": 0.2, "block_long_only": False, "details": {"reason": "No news found"}})
+            return {"score": 0.0, "confidence": 0.2, "block_long_only": False, "details": {"reason": "No news found"}}
 
         net_score = 0.0
         for entry in entries:
@@ -211,15 +186,15 @@ def get_forex_news_score(symbol: str) -> dict:
         final_score = max(-1.0, min(1.0, net_score / len(entries)))
         block_long_only = final_score <= -0.5
 
-        return _cache_and_return({
+        return {
             "score": round(final_score, 3),
             "confidence": 0.70,
             "block_long_only": block_long_only,
             "block_reason": f"Negative Forex News Score ({final_score:.2f})" if block_long_only else "",
             "details": {"articles_count": len(entries), "score": round(final_score, 3)}
-        })
+        }
     except Exception as e:
-        return _cache_and_return({"score": 0.0, "confidence": 0.0, "block_long_only": False, "details": {"err": str(e)}})
+        return {"score": 0.0, "confidence": 0.0, "block_long_only": False, "details": {"err": str(e)}}
 
 
 class DerivForexBot:
@@ -714,101 +689,28 @@ class DerivForexBot:
         data["240"] = data["4h"]
         return data
 
-    def calculate_indicators(self, data):
-        """Calculate technical indicators using TA-Lib or fallback numpy implementation"""
+    def calculate_indicators(self, data, symbol=None):
+        """Technical indicators per timeframe (streaming engine, TA-Lib-equal values)"""
         indicators = {}
 
         for tf_name in ["15m", "1h", "4h"]:
-            closes  = data[tf_name]['close']
-            highs   = data[tf_name]['high']
-            lows    = data[tf_name]['low']
             volumes = data[tf_name]['volume']
 
-            if HAS_TALIB:
-                rsi       = talib.RSI(closes, timeperiod=14)[-1]
-                macd_line, macd_signal, macd_hist = talib.MACD(closes, fastperiod=12, slowperiod=26, signalperiod=9)
-                ema_21    = talib.EMA(closes, timeperiod=21)[-1]
-                ema_50    = talib.EMA(closes, timeperiod=50)[-1]
-                atr       = talib.ATR(highs, lows, closes, timeperiod=14)[-1]
-                adx       = talib.ADX(highs, lows, closes, timeperiod=14)[-1]
-                stoch_k, stoch_d = talib.STOCH(highs, lows, closes, fastk_period=14, slowk_period=3, slowd_period=3)
-                volume_sma = talib.SMA(volumes, timeperiod=20)[-1]
-            else:
-                def _ema(arr, n):
-                    k = 2.0 / (n + 1)
-                    val = float(np.mean(arr[:n]))
-                    for v in arr[n:]:
-                        val = float(v) * k + val * (1.0 - k)
-                    return val
-
-                diff = np.diff(closes)
-                gains = np.where(diff > 0, diff, 0.0)
-                losses = np.where(diff < 0, -diff, 0.0)
-                rsi_period = 14
-                avg_gain = float(np.mean(gains[:rsi_period]))
-                avg_loss = float(np.mean(losses[:rsi_period]))
-                for i in range(rsi_period, len(gains)):
-                    avg_gain = (avg_gain * (rsi_period - 1) + gains[i]) / rsi_period
-                    avg_loss = (avg_loss * (rsi_period - 1) + losses[i]) / rsi_period
-                rs = avg_gain / (avg_loss + 1e-9)
-                rsi = 100.0 - (100.0 / (1.0 + rs))
-
-                ema_21 = _ema(closes, 21)
-                ema_50 = _ema(closes, 50)
-
-                ema_12 = _ema(closes, 12)
-                ema_26 = _ema(closes, 26)
-                macd_line_val = ema_12 - ema_26
-                start_idx = max(26, len(closes) - 20)
-                macd_vals = [_ema(closes[:i + 1], 12) - _ema(closes[:i + 1], 26)
-                             for i in range(start_idx, len(closes))]
-                macd_signal_val = _ema(np.array(macd_vals), 9) if len(macd_vals) >= 9 else macd_vals[-1]
-                macd_hist_val = macd_line_val - macd_signal_val
-                macd_line   = np.array([macd_line_val])
-                macd_signal = np.array([macd_signal_val])
-                macd_hist   = np.array([macd_hist_val])
-
-                tr_arr = np.maximum(
-                    highs[1:] - lows[1:],
-                    np.maximum(np.abs(highs[1:] - closes[:-1]),
-                               np.abs(lows[1:]  - closes[:-1]))
-                )
-                atr_period = 14
-                atr = float(np.mean(tr_arr[:atr_period]))
-                for v in tr_arr[atr_period:]:
-                    atr = (atr * (atr_period - 1) + float(v)) / atr_period
-
-                stoch_period = 14
-                recent_high = float(np.max(highs[-stoch_period:]))
-                recent_low  = float(np.min(lows[-stoch_period:]))
-                stoch_k_val = ((float(closes[-1]) - recent_low) /
-                               (recent_high - recent_low + 1e-9)) * 100.0
-                stoch_k = np.array([stoch_k_val])
-                stoch_d = np.array([stoch_k_val])
-
-                dm_plus  = np.where((highs[1:] - highs[:-1]) > (lows[:-1] - lows[1:]),
-                                    np.maximum(highs[1:] - highs[:-1], 0.0), 0.0)
-                dm_minus = np.where((lows[:-1] - lows[1:]) > (highs[1:] - highs[:-1]),
-                                    np.maximum(lows[:-1] - lows[1:], 0.0), 0.0)
-                atr_window = np.mean(tr_arr[-atr_period:])
-                di_plus  = 100.0 * np.mean(dm_plus[-atr_period:])  / (atr_window + 1e-9)
-                di_minus = 100.0 * np.mean(dm_minus[-atr_period:]) / (atr_window + 1e-9)
-                dx = 100.0 * abs(di_plus - di_minus) / (di_plus + di_minus + 1e-9)
-                adx = dx
-
-                volume_sma = np.mean(volumes[-20:])
+            # O(1) per new bar when the symbol is known; full replay of the window otherwise
+            ta = indicator_engine.latest(data[tf_name], key=("deriv", symbol, tf_name) if symbol else None)
+            volume_sma = ta['volume_sma']
 
             indicators[tf_name] = {
-                'rsi': float(rsi),
-                'macd': float(macd_line[-1]),
-                'macd_signal': float(macd_signal[-1]),
-                'macd_histogram': float(macd_hist[-1]),
-                'ema_21': float(ema_21),
-                'ema_50': float(ema_50),
-                'atr': float(atr),
-                'adx': float(adx),
-                'stoch_k': float(stoch_k[-1]),
-                'stoch_d': float(stoch_d[-1]),
+                'rsi': float(ta['rsi']),
+                'macd': float(ta['macd']),
+                'macd_signal': float(ta['macd_signal']),
+                'macd_histogram': float(ta['macd_histogram']),
+                'ema_21': float(ta['ema_21']),
+                'ema_50': float(ta['ema_50']),
+                'atr': float(ta['atr']),
+                'adx': float(ta['adx']),
+                'stoch_k': float(ta['stoch_k']),
+                'stoch_d': float(ta['stoch_d']),
                 'volume_ratio': float(volumes[-1] / volume_sma if volume_sma > 0 else 1.0)
             }
 
@@ -1247,7 +1149,7 @@ class DerivForexBot:
                 print(f" ⚠️ Could not fetch market data for {symbol}. Skipping.")
                 continue
 
-            indicators, current_price, volatility = self.calculate_indicators(data)
+            indicators, current_price, volatility = self.calculate_indicators(data, symbol)
             print(f"   Current Price: {current_price:.5f} | Volatility: {volatility*100:.3f}% | 15m ATR: {indicators['15m']['atr']:.5f}")
 
             signal_data = self.evaluate_multi_factor_consensus(symbol, indicators, current_price, volatility, data, spread_pips)
@@ -16,16 +16,34 @@ Key behaviours:
   - block_long_only  = True  → LONG blocked, SHORT allowed (news bad-coin logic)
   - Regime bearish ≤ -0.4   → LONG threshold raised from 0.25 to 0.40
 
+Factor fetches (regime, derivatives, sentiment, news, S/R) run concurrently
+on a shared pool.  Each has its own deadline (FACTOR_DEADLINES_S), counted
+from when it starts running, and must start within EVALUATION_BUDGET_S; a
+factor that misses either counts as neutral with confidence 0 and
+timed_out=True, so one slow upstream cannot stall the scan.  Its thread
+finishes in the background (every fetch has an HTTP timeout) and the late
+result is dropped.  The pool is sized for the caller's concurrent_symbols
+(futures.py passes SCAN_CONCURRENCY) twice over, so workers still held by
+timed-out calls do not starve the next symbols.  A timed-out factor keeps the vetoes (block_trade /
+block_long_only) of its last completed result for that symbol, so a slow
+news feed does not lift a LONG block.
+
+Every get_*_score is wrapped by factors/cache.py (regime 5 min,
+derivatives 1 min, news 15 min, sentiment 1 h), so market-wide factors
+are fetched once per scan rather than once per symbol.
+
 Usage in futures.py:
     from factors.aggregator import MultiFactorAggregator
-    agg = MultiFactorAggregator()
+    agg = MultiFactorAggregator(concurrent_symbols=SCAN_CONCURRENCY)
     # precomputed contains pre-fetched regime (and optionally sentiment)
     # to avoid redundant API calls across the symbol scanner loop.
     consensus = agg.evaluate(ta_signal, symbol, current_price,
                              precomputed={"regime": regime_info})
 """
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 from factors.regime             import get_regime_score
 from factors.derivatives        import get_derivatives_score
@@ -48,19 +66,38 @@ LONG_ENTRY_THRESHOLD          = 0.25
 SHORT_ENTRY_THRESHOLD         = 0.15
 LONG_THRESHOLD_BEARISH_REGIME = 0.40   # elevated when regime_score <= -0.4
 
-# ---------------------------------------------------------------------------
-# 1-hour sentiment TTL cache (F&G updates once per day — no need to fetch 5x)
-# ---------------------------------------------------------------------------
-_sentiment_cache = {"result": None, "fetched_at": 0.0}
-_SENTIMENT_TTL   = 3600  # seconds
+# Per-factor deadlines, counted from when the factor starts running
+FACTOR_DEADLINES_S = {
+    "regime":              8.0,   # one BTC daily kline call
+    "derivatives":         6.0,   # up to four Bybit calls
+    "sentiment":           5.0,   # F&G API (1h cache)
+    "news":                6.0,   # two RSS fetches
+    "support_resistance":  2.0,   # local computation only
+}
+EVALUATION_BUDGET_S = 8.0         # a factor not started by then is not waited for
+VETO_KEEP_S         = 1800        # a timed-out factor reuses vetoes this recent
+VETO_FIELDS         = ("block_trade", "block_long_only", "block_reason")
+
+# Up to five jobs per symbol; doubled so calls still running past their
+# deadline leave room for the next symbols
+FACTOR_JOBS_PER_SYMBOL = 5
+
+_pools = {}                       # worker count → shared ThreadPoolExecutor
+_pools_lock = threading.Lock()
+_last_vetoes = {}                 # (factor, symbol) → (completed_at, {veto fields})
+_vetoes_lock = threading.Lock()
 
 
 class MultiFactorAggregator:
     """
     Collect all factor scores and emit a final consensus signal.
     Stateless: safe to instantiate once and reuse across cycles.
+    concurrent_symbols is how many symbols the caller evaluates at once.
     """
 
+    def __init__(self, concurrent_symbols: int = 1):
+        self._pool = _shared_pool(2 * FACTOR_JOBS_PER_SYMBOL * max(1, concurrent_symbols))
+
     def evaluate(
         self,
         ta_signal:     dict,
@@ -88,77 +125,39 @@ class MultiFactorAggregator:
             block_trade    : bool   (hard veto — both directions)
             block_long_only: bool   (LONG blocked, SHORT allowed)
             block_reason   : str
-            factor_scores  : dict   (per-factor detail for logging)
-            elapsed_s      : float
+            factor_scores  : dict   (per-factor detail for logging; timed_out=True
+                                     on a factor that missed its deadline)
+            elapsed_s      : float  (whole evaluation)
+            factor_elapsed_s: dict  (seconds per factor)
         """
         print("\n🔬 Running multi-factor evaluation...")
         t0 = time.time()
         precomputed = precomputed or {}
 
-        factor_scores = {}
+        # Factors that need fetching or computing, started together
+        jobs = {}
+        if "regime" not in precomputed:
+            jobs["regime"] = (get_regime_score,)                       # macro BTC trend
+        jobs["derivatives"] = (get_derivatives_score, symbol)           # always symbol-specific
+        if "sentiment" not in precomputed:
+            jobs["sentiment"] = (get_sentiment_score,)                  # 1-hour TTL cache
+        jobs["news"] = (get_news_score, symbol)                         # BTC macro + coin
+        if indicators and data:
+            jobs["support_resistance"] = (get_sr_score, symbol, current_price, indicators, data)
+        fetched, factor_elapsed = self._run_factors(jobs, t0, symbol)
 
-        # 1. Technical Analysis
+        factor_scores = {}
+        factor_elapsed["technical"] = 0.0
         factor_scores["technical"] = self._ta_to_score(ta_signal)
-
-        # 2. Regime — use precomputed if available
-        if "regime" in precomputed:
-            factor_scores["regime"] = precomputed["regime"]
-        else:
-            try:
-                factor_scores["regime"] = get_regime_score()
-            except Exception as e:
-                factor_scores["regime"] = {
-                    "score": 0.0, "confidence": 0.0,
-                    "block_trade": False, "details": {"err": str(e)},
-                }
-
-        # 3. Derivatives — always symbol-specific
-        try:
-            factor_scores["derivatives"] = get_derivatives_score(symbol)
-        except Exception as e:
-            factor_scores["derivatives"] = {
-                "score": 0.0, "confidence": 0.0,
-                "block_trade": False, "details": {"err": str(e)},
-            }
-
-        # 4. Sentiment — 1-hour TTL cache
-        if "sentiment" in precomputed:
-            factor_scores["sentiment"] = precomputed["sentiment"]
-        else:
-            factor_scores["sentiment"] = _get_cached_sentiment()
-
-        # 5. News — two-layer BTC macro + coin-specific
-        try:
-            factor_scores["news"] = get_news_score(symbol)
-        except Exception as e:
-            factor_scores["news"] = {
-                "score": 0.0, "confidence": 0.0,
-                "block_trade": False, "block_long_only": False,
-                "block_reason": "", "details": {"err": str(e)},
-            }
-
-        # 6. Support & Resistance — multi-timeframe level detection
-        try:
-            if indicators and data:
-                factor_scores["support_resistance"] = get_sr_score(
-                    symbol, current_price, indicators, data
-                )
+        for name in ("regime", "derivatives", "sentiment", "news", "support_resistance"):
+            if name in fetched:
+                factor_scores[name] = fetched[name]
+            elif name in precomputed:
+                factor_scores[name] = precomputed[name]
+                factor_elapsed[name] = 0.0
             else:
-                factor_scores["support_resistance"] = {
-                    "score": 0.0, "confidence": 0.0, "block_trade": False,
-                    "scenario": "MID_RANGE",
-                    "suggested_stop": None, "suggested_target": None,
-                    "suggested_leverage": 10.0,
-                    "details": {"reason": "No indicator/data passed"},
-                }
-        except Exception as e:
-            factor_scores["support_resistance"] = {
-                "score": 0.0, "confidence": 0.0, "block_trade": False,
-                "scenario": "MID_RANGE",
-                "suggested_stop": None, "suggested_target": None,
-                "suggested_leverage": 10.0,
-                "details": {"err": str(e)},
-            }
+                factor_scores[name] = _neutral(name, reason="No indicator/data passed")
+                factor_elapsed[name] = 0.0
 
         # --- Hard vetoes (block_trade = both directions) ---
         block_trade     = False
@@ -214,7 +213,7 @@ class MultiFactorAggregator:
         elapsed = time.time() - t0
         self._print_summary(
             factor_scores, final_score, consensus_signal,
-            block_trade, block_long_only, block_reason, elapsed,
+            block_trade, block_long_only, block_reason, elapsed, factor_elapsed,
         )
 
         # Extract S/R suggestions to return alongside consensus
@@ -228,6 +227,7 @@ class MultiFactorAggregator:
             "block_reason":    block_reason,
             "factor_scores":   factor_scores,
             "elapsed_s":       round(elapsed, 1),
+            "factor_elapsed_s": {name: round(factor_elapsed[name], 2) for name in factor_scores},
             # S/R pass-through for stop/target/leverage in futures.py
             "sr_scenario":         sr_fs.get("scenario", "MID_RANGE"),
             "sr_suggested_stop":   sr_fs.get("suggested_stop"),
@@ -239,6 +239,32 @@ class MultiFactorAggregator:
     # Internal helpers
     # -----------------------------------------------------------------------
 
+    def _run_factors(self, jobs: dict, t0: float, symbol: str):
+        """
+        Run {name: (fn, *args)} concurrently; returns ({name: result},
+        {name: seconds}).  Each result is waited for until its deadline
+        after it started; one still queued at the evaluation budget is
+        given up on.
+        """
+        started    = {name: threading.Event() for name in jobs}
+        started_at = {}                              # name → time.time() when it began
+        futures = {name: self._pool.submit(_timed, name, symbol, started, started_at, *job)
+                   for name, job in jobs.items()}
+        budget_at = t0 + EVALUATION_BUDGET_S
+        results, elapsed = {}, {}
+        for name, future in futures.items():
+            try:
+                if not started[name].wait(timeout=max(0.0, budget_at - time.time())):
+                    raise FutureTimeout
+                deadline = started_at[name] + FACTOR_DEADLINES_S.get(name, EVALUATION_BUDGET_S)
+                results[name], elapsed[name] = future.result(timeout=max(0.0, deadline - time.time()))
+            except FutureTimeout:
+                future.cancel()                      # only helps if it never started
+                elapsed[name] = time.time() - started_at.get(name, t0)
+                results[name] = _with_last_veto(name, symbol, _neutral(
+                    name, timed_out=True, reason=f"timed out after {elapsed[name]:.1f}s"))
+        return results, elapsed
+
     @staticmethod
     def _ta_to_score(ta_signal: dict) -> dict:
         """Map existing TA signal strength to standard [-1, +1] factor format."""
@@ -261,7 +287,7 @@ class MultiFactorAggregator:
 
     @staticmethod
     def _print_summary(factor_scores, final_score, signal,
-                       blocked, block_long_only, block_reason, elapsed):
+                       blocked, block_long_only, block_reason, elapsed, factor_elapsed):
         bar = "=" * 55
         print(f"\n{bar}")
         print("  MULTI-FACTOR CONSENSUS")
@@ -273,7 +299,9 @@ class MultiFactorAggregator:
             arrow    = "▲" if s > 0 else ("▼" if s < 0 else "─")
             flag     = "  🚫LONG-ONLY" if (name == "news" and fs.get("block_long_only")) else ""
             scenario = f"  [{fs['scenario']}]" if name == "support_resistance" and "scenario" in fs else ""
-            print(f"  {name:<20} score={s:+.3f}  conf={c:.2f}  wt={w:.2f}  {arrow}{flag}{scenario}")
+            late     = "  ⏰TIMED OUT" if fs.get("timed_out") else ""
+            secs     = factor_elapsed.get(name, 0.0)
+            print(f"  {name:<20} score={s:+.3f}  conf={c:.2f}  wt={w:.2f}  {arrow}  {secs:4.1f}s{flag}{scenario}{late}")
         print(f"  {'─'*51}")
         print(f"  Final score : {final_score:+.3f}")
         if blocked:
@@ -287,22 +315,49 @@ class MultiFactorAggregator:
 
 
 # ---------------------------------------------------------------------------
-# Sentiment cache
+# Factor helpers
 # ---------------------------------------------------------------------------
 
-def _get_cached_sentiment() -> dict:
-    """Return cached F&G result if < 1h old, else fetch fresh."""
-    now = time.time()
-    if (_sentiment_cache["result"] is not None
-            and (now - _sentiment_cache["fetched_at"]) < _SENTIMENT_TTL):
-        return _sentiment_cache["result"]
+def _shared_pool(workers: int) -> ThreadPoolExecutor:
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="factor")
+        return _pools[workers]
+
+
+def _timed(name, symbol, started, started_at, fn, *args):
+    started_at[name] = start = time.time()
+    started[name].set()
     try:
-        result = get_sentiment_score()
+        result = fn(*args)
     except Exception as e:
-        result = {
-            "score": 0.0, "confidence": 0.0,
-            "block_trade": False, "details": {"err": str(e)},
-        }
-    _sentiment_cache["result"]     = result
-    _sentiment_cache["fetched_at"] = now
+        return _neutral(name, err=str(e)), time.time() - start
+    if isinstance(result, dict):
+        with _vetoes_lock:
+            _last_vetoes[(name, symbol)] = (time.time(),
+                                            {k: result[k] for k in VETO_FIELDS if k in result})
+    return result, time.time() - start
+
+
+def _with_last_veto(name: str, symbol: str, result: dict) -> dict:
+    """Carry the vetoes of the last completed result (if recent) into `result`."""
+    with _vetoes_lock:
+        last = _last_vetoes.get((name, symbol))
+    if last is not None and time.time() - last[0] <= VETO_KEEP_S:
+        result.update(last[1])
+    return result
+
+
+def _neutral(name: str, timed_out: bool = False, reason: str = None, err: str = None) -> dict:
+    """A factor result that moves nothing: score 0, confidence 0, no veto."""
+    details = {"err": err} if err is not None else {"reason": reason}
+    result = {"score": 0.0, "confidence": 0.0, "block_trade": False, "details": details}
+    if timed_out:
+        result["timed_out"] = True
+    if name == "news":
+        result.update(block_long_only=False, block_reason="")
+    elif name == "support_resistance":
+        result.update(scenario="MID_RANGE", suggested_stop=None, suggested_target=None,
+                      suggested_leverage=10.0)
     return result
+
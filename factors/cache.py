@@ -0,0 +1,242 @@
+"""
+Factor Cache  (factors/cache.py)
+================================
+One registry of TTL/LRU caches shared by every `get_*_score()` factor and
+the raw fetches behind them, so a scan over N symbols pays for market-wide
+inputs (BTC dailies, Fear & Greed) once and for per-symbol inputs once per
+their natural update period instead of once per call.
+
+    @cached("regime.btc_daily", ttl=until_next(DAY), persist=True)
+    def _fetch_btc_daily(limit): ...
+
+  - ttl is seconds, or a callable(now) → absolute expiry (wall clock).
+    until_next(period_s) expires on the next UTC boundary of that period:
+    daily close, 8h funding settlement, 4h/1h bar close.
+  - stale=s keeps serving an expired entry for up to s seconds while one
+    background thread refreshes it (stale-while-revalidate); past that the
+    caller fetches inline.
+  - maxsize bounds each cache; the least recently used key is evicted.
+  - accept(result) decides whether a result is cached for the full ttl —
+    failures (None, confidence 0) are not, so the next call retries.
+    negative_ttl=s instead keeps a rejected (non-None) result for s
+    seconds, so a failing upstream is retried at that pace rather than
+    on every call.
+  - persist=True mirrors the cache to FACTOR_CACHE_DIR/<name>.json so a
+    restart within the TTL does not refetch.  Values must be JSON-able.
+  - Concurrent misses on one key share a single call.
+
+stats() returns hits / stale hits / misses / refreshes / evictions per
+cache; clear(name) drops entries (all caches when name is None).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+CACHE_DIR       = os.getenv("FACTOR_CACHE_DIR", "factor_cache")
+CACHE_ENABLED   = os.getenv("FACTOR_CACHE", "1") != "0"
+DEFAULT_MAXSIZE = 256
+
+MINUTE = 60
+HOUR   = 3600
+DAY    = 86400
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def cached(name: str, ttl, stale: float = 0.0, maxsize: int = DEFAULT_MAXSIZE,
+           persist: bool = False, accept=None, negative_ttl: float = 0.0):
+    """Decorator: cache fn(*args, **kwargs) under registry entry `name`."""
+    def decorate(fn):
+        cache = TTLCache(name, fn, ttl, stale, maxsize, persist,
+                         accept or _not_none, negative_ttl)
+        with _registry_lock:
+            _registry[name] = cache
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache.get(args, kwargs)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+
+def until_next(period_s: float, offset_s: float = 0.0):
+    """TTL that expires on the next UTC multiple of period_s (+ offset_s)."""
+    def expiry(now: float) -> float:
+        return ((now - offset_s) // period_s + 1) * period_s + offset_s
+    return expiry
+
+
+def scored(result) -> bool:
+    """accept= for factor scores: keep only results that carry information."""
+    return isinstance(result, dict) and result.get("confidence", 0) > 0
+
+
+def stats() -> dict:
+    """{name: {"size", "hits", "stale_hits", "misses", "refreshes", "evictions", "hit_rate"}}"""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {c.name: c.stats() for c in caches}
+
+
+def clear(name: str = None):
+    with _registry_lock:
+        caches = [c for n, c in _registry.items() if name is None or n == name]
+    for c in caches:
+        c.clear()
+
+
+class TTLCache:
+    """Bounded key → (expires_at, value) map behind one registry entry."""
+
+    def __init__(self, name, fn, ttl, stale, maxsize, persist, accept, negative_ttl=0.0):
+        self.name     = name
+        self.fn       = fn
+        self.ttl      = ttl
+        self.negative_ttl = negative_ttl
+        self.stale    = stale
+        self.maxsize  = maxsize
+        self.persist  = persist
+        self.accept   = accept
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self._loading = {}                 # key → lock held by the loader
+        self._refreshing = set()
+        self._counts  = dict(hits=0, stale_hits=0, misses=0, refreshes=0, evictions=0)
+        if persist:
+            self._load()
+
+    def get(self, args: tuple, kwargs: dict):
+        if not CACHE_ENABLED:
+            return self.fn(*args, **kwargs)
+        key = _key(args, kwargs)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return value
+                if now < expires_at + self.stale:
+                    self._entries.move_to_end(key)
+                    self._counts["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, args, kwargs),
+                                         daemon=True, name=f"cache-{self.name}").start()
+                    return value
+            loader = self._loading.setdefault(key, threading.Lock())
+
+        # Miss: one caller per key fetches, the rest wait and reuse its result
+        with loader:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.time() < entry[0]:
+                    self._counts["hits"] += 1
+                    return entry[1]
+                self._counts["misses"] += 1
+            try:
+                value = self.fn(*args, **kwargs)
+                self._put(key, value)
+            finally:
+                with self._lock:
+                    if self._loading.get(key) is loader:
+                        del self._loading[key]
+            return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts, size=len(self._entries))
+        served = counts["hits"] + counts["stale_hits"]
+        total  = served + counts["misses"]
+        counts["hit_rate"] = round(served / total, 3) if total else 0.0
+        return counts
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.persist:
+            self._save()
+
+    # -----------------------------------------------------------------------
+    # Internal helpers
+    # -----------------------------------------------------------------------
+
+    def _refresh(self, key, args, kwargs):
+        try:
+            self._put(key, self.fn(*args, **kwargs))
+            with self._lock:
+                self._counts["refreshes"] += 1
+        except Exception:
+            pass   # keep serving the stale value until it ages out
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _put(self, key, value):
+        now = time.time()
+        if self.accept(value):
+            expires_at = self.ttl(now) if callable(self.ttl) else now + self.ttl
+        elif self.negative_ttl and value is not None:
+            expires_at = now + self.negative_ttl
+        else:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+        if self.persist:
+            self._save()
+
+    def _path(self) -> str:
+        return os.path.join(CACHE_DIR, f"{self.name}.json")
+
+    def _load(self):
+        try:
+            with open(self._path()) as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, expires_at, value in rows:
+            if now < expires_at + self.stale:
+                self._entries[key] = (expires_at, value)
+
+    def _save(self):
+        with self._lock:
+            rows = [[k, exp, v] for k, (exp, v) in self._entries.items()]
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{self._path()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(rows, f)
+            os.replace(tmp, self._path())
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Factor cache {self.name}: could not persist ({e})")
+
+
+def _key(args: tuple, kwargs: dict) -> str:
+    """Stable string key (also the on-disk key) for one call's arguments."""
+    return json.dumps([list(args), sorted(kwargs.items())], default=str)
+
+
+def _not_none(result) -> bool:
+    return result is not None
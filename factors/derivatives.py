@@ -9,19 +9,29 @@ Sub-signals:
   open_interest  – OI direction vs price direction reveals conviction
   ls_ratio       – Retail long/short ratio as a contrarian signal
 
+Each raw series is cached until the exchange can next change it: funding
+history until the next 8h settlement, 4h OI until the next 4h bar, the
+1h L/S ratio until the next hour.  Live price / current funding come from
+the shared tickers snapshot.
+
 Score : -1.0 (longs crowded / SHORT setup) … +1.0 (shorts crowded / LONG setup)
 """
 
-import requests
+from market import http_client
+from market.endpoints import MARKET_URL
+from market.snapshot import get_ticker
 import numpy as np
 
-BYBIT_URL = "https://api.bybit.com/v5/market"
+from factors.cache import cached, scored, until_next, HOUR, MINUTE
+
+BYBIT_URL = MARKET_URL
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
+@cached("derivatives", ttl=MINUTE, accept=scored)
 def get_derivatives_score(symbol: str) -> dict:
     """Combine funding, OI trend, and L/S ratio into one derivatives score."""
     funding = _funding(symbol)
@@ -72,22 +82,15 @@ def _funding(symbol: str):
     High negative funding → shorts overcrowded → LONG bias (positive score).
     """
     try:
-        # Current rate from ticker
-        r = requests.get(f"{BYBIT_URL}/tickers",
-                         params={"category": "linear", "symbol": symbol}, timeout=8)
-        d = r.json()
-        if d.get("retCode") != 0:
+        # Current rate from the shared tickers snapshot
+        ticker = get_ticker(symbol)
+        if ticker is None:
             return None
-        current_rate = float(d["result"]["list"][0].get("fundingRate", 0))
+        current_rate = ticker["funding_rate"] or 0.0
 
         # 8-period history (~2.67 days at 8-hour intervals)
-        h = requests.get(f"{BYBIT_URL}/funding/history",
-                         params={"category": "linear", "symbol": symbol, "limit": 8}, timeout=8)
-        hd = h.json()
-        avg_rate = current_rate
-        if hd.get("retCode") == 0:
-            rates = [float(x["fundingRate"]) for x in hd["result"]["list"]]
-            avg_rate = float(np.mean(rates)) if rates else current_rate
+        rates    = _funding_history(symbol)
+        avg_rate = float(np.mean(rates)) if rates else current_rate
 
         # Map to score — contrarian interpretation
         # Standard neutral range: 0.0% to +0.015% per 8h (0.00015) — normal bull market baseline
@@ -117,31 +120,20 @@ def _open_interest(symbol: str):
     Falling OI                → deleveraging → neutral
     """
     try:
-        r = requests.get(f"{BYBIT_URL}/open-interest",
-                         params={"category": "linear", "symbol": symbol,
-                                 "intervalTime": "4h", "limit": 8}, timeout=8)
-        d = r.json()
-        if d.get("retCode") != 0:
-            return None
-
-        items = d["result"]["list"]
-        if len(items) < 4:
+        items = _oi_history(symbol)
+        if items is None or len(items) < 4:
             return None
 
-        oi_now  = float(items[0]["openInterest"])
-        oi_then = float(items[3]["openInterest"])
+        oi_now  = items[0]
+        oi_then = items[3]
         oi_chg  = (oi_now - oi_then) / oi_then if oi_then > 0 else 0.0
 
         if abs(oi_chg) < 0.02:  # < 2% OI change → noise
             return {"score": 0.0, "oi_change_pct": round(oi_chg * 100, 2)}
 
-        # Get 24h price change from ticker
-        t = requests.get(f"{BYBIT_URL}/tickers",
-                         params={"category": "linear", "symbol": symbol}, timeout=8)
-        td = t.json()
-        price_chg = 0.0
-        if td.get("retCode") == 0:
-            price_chg = float(td["result"]["list"][0].get("price24hPcnt", 0))
+        # 24h price change from the shared tickers snapshot
+        ticker    = get_ticker(symbol)
+        price_chg = (ticker or {}).get("price_24h_pcnt") or 0.0
 
         if oi_chg > 0 and price_chg > 0:
             score = min(1.0, oi_chg * 5)     # rising OI + rising price = LONG
@@ -166,19 +158,10 @@ def _long_short_ratio(symbol: str):
     <30% long  → crowded short → LONG bias
     """
     try:
-        r = requests.get(f"{BYBIT_URL}/account-ratio",
-                         params={"category": "linear", "symbol": symbol,
-                                 "period": "1h", "limit": 4}, timeout=8)
-        d = r.json()
-        if d.get("retCode") != 0:
+        long_ratio = _latest_long_ratio(symbol)
+        if long_ratio is None:
             return None
 
-        items = d["result"]["list"]
-        if not items:
-            return None
-
-        long_ratio = float(items[0].get("buyRatio", 0.5))
-
         # Contrarian: 70% long → -0.8 score, 30% long → +0.8 score
         deviation = long_ratio - 0.5          # +0.2 means 70% long
         score     = max(-1.0, min(1.0, -deviation * 4))
@@ -192,6 +175,54 @@ def _long_short_ratio(symbol: str):
         return None
 
 
+# ---------------------------------------------------------------------------
+# Raw series (cached until the next exchange update)
+# ---------------------------------------------------------------------------
+
+@cached("derivatives.funding", ttl=until_next(8 * HOUR))
+def _funding_history(symbol: str):
+    """Last 8 settled funding rates, newest first, or None."""
+    try:
+        r = http_client.get(f"{BYBIT_URL}/funding/history",
+                            params={"category": "linear", "symbol": symbol, "limit": 8}, timeout=8)
+        d = r.json()
+        if d.get("retCode") != 0:
+            return None
+        return [float(x["fundingRate"]) for x in d["result"]["list"]] or None
+    except Exception:
+        return None
+
+
+@cached("derivatives.open_interest", ttl=until_next(4 * HOUR))
+def _oi_history(symbol: str):
+    """Last 8 × 4h open-interest values, newest first, or None."""
+    try:
+        r = http_client.get(f"{BYBIT_URL}/open-interest",
+                            params={"category": "linear", "symbol": symbol,
+                                    "intervalTime": "4h", "limit": 8}, timeout=8)
+        d = r.json()
+        if d.get("retCode") != 0:
+            return None
+        return [float(x["openInterest"]) for x in d["result"]["list"]] or None
+    except Exception:
+        return None
+
+
+@cached("derivatives.long_short", ttl=until_next(HOUR))
+def _latest_long_ratio(symbol: str):
+    """Latest 1h retail long ratio (0…1), or None."""
+    try:
+        r = http_client.get(f"{BYBIT_URL}/account-ratio",
+                            params={"category": "linear", "symbol": symbol,
+                                    "period": "1h", "limit": 4}, timeout=8)
+        d = r.json()
+        if d.get("retCode") != 0 or not d["result"]["list"]:
+            return None
+        return float(d["result"]["list"][0].get("buyRatio", 0.5))
+    except Exception:
+        return None
+
+
 def _neutral(reason=""):
     return {"score": 0.0, "confidence": 0.0, "block_trade": False,
             "details": {"reason": reason}}
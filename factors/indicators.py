@@ -0,0 +1,656 @@
+"""
+Streaming Indicators  (factors/indicators.py)
+=============================================
+Incremental technical indicators for the live bots.  Instead of running
+TA-Lib over the whole 100-bar window on every call and keeping only [-1],
+each (symbol, timeframe) keeps its Wilder/EMA/window state and advances
+it by one bar per closed candle — constant work per bar regardless of how
+much history the state has seen.
+
+Indicators (same parameters as calculate_indicators always used):
+  rsi (14)  macd / macd_signal / macd_histogram (12, 26, 9)
+  ema_21    ema_50    atr (14)    volume_sma (20)
+  bb_upper / bb_middle / bb_lower (20, 2σ)    adx (14)
+  stoch_k / stoch_d (14, 3, 3)
+
+Every recurrence follows TA-Lib's C implementation (SMA-seeded EMAs,
+MACD's offset fast-EMA seed, Wilder sums for ATR/ADX, add-then-subtract
+running totals for SMA/BBANDS, TA_IS_ZERO guards), so values equal TA-Lib
+run over the same bars, to floating-point rounding.  Before its lookback
+is filled an indicator is NaN, as in TA-Lib.
+
+Live use:
+
+    ind = ENGINE.latest(prices, key=(symbol, "15m"), fields=("rsi", "macd", "atr"))
+    ind["rsi"], ind["macd_signal"]      # declared (macd brings its signal/histogram)
+    ind["bb_upper"]                     # not declared: computed from this window on access
+
+Only the declared fields' primitives are kept and advanced per bar, so a
+strategy pays for what it reads; fields=None streams every indicator.
+
+`prices` is a bar dict (open/high/low/close/volume arrays, plus an
+optional timestamp array).  All bars except the last are treated as
+closed; the last is the one still forming, applied to a throw-away copy of
+the state so it can tick every call without being double counted.  Bars
+are matched to the state by timestamp; if the window no longer lines up
+(gap, restart, different data) the state is rebuilt from the window.
+Without a key or timestamps the window is replayed from scratch, which is
+still exactly TA-Lib over that window.
+
+Results are memoized per key and field set on the last closed bar and the forming bar
+(timestamp and values), LRU-bounded at MEMO_SIZE: the restart path and
+the slow loop asking again about unchanged candles get the stored values
+back without touching the state.  Keys include the market, so the hybrid
+bot's spot and futures engines (different candles) never share entries.
+"""
+
+import math
+import threading
+from collections import OrderedDict, deque
+
+from factors import ta
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+RSI_PERIOD   = 14
+MACD_FAST    = 12
+MACD_SLOW    = 26
+MACD_SIGNAL  = 9
+ATR_PERIOD   = 14
+ADX_PERIOD   = 14
+BB_PERIOD    = 20
+BB_DEV       = 2.0
+VOL_SMA      = 20
+STOCH_K      = 14
+STOCH_SLOW_K = 3
+STOCH_D      = 3
+MEMO_SIZE    = 512             # (key, newest bars) results kept by IndicatorEngine
+
+# field → the primitive that produces it (and the other fields of that primitive)
+FIELDS = {
+    "rsi": "rsi",
+    "macd": "macd", "macd_signal": "macd", "macd_histogram": "macd",
+    "ema_21": "ema_21", "ema_50": "ema_50",
+    "atr": "atr",
+    "volume_sma": "volume_sma",
+    "bb_upper": "bbands", "bb_middle": "bbands", "bb_lower": "bbands",
+    "adx": "adx",
+    "stoch_k": "stoch", "stoch_d": "stoch",
+}
+_ALL_GROUPS = frozenset(FIELDS.values())
+
+_NAN     = float("nan")
+_EPSILON = 1e-14                 # TA-Lib's TA_IS_ZERO threshold
+
+
+def _is_zero(x: float) -> bool:
+    return -_EPSILON < x < _EPSILON
+
+
+# ---------------------------------------------------------------------------
+# Primitives (each push() is O(1); copy() is bounded by the period)
+# ---------------------------------------------------------------------------
+
+class _State:
+    __slots__ = ()
+
+    def copy(self):
+        new = object.__new__(type(self))
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(new, name, value.copy() if hasattr(value, "copy") else value)
+        return new
+
+
+class Sma(_State):
+    """TA-Lib SMA: running total, new value added before the oldest is dropped."""
+    __slots__ = ("period", "window", "total", "value")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total  = 0.0
+        self.value  = _NAN
+
+    def push(self, x: float) -> float:
+        self.window.append(x)
+        self.total += x
+        if len(self.window) == self.period:
+            self.value  = self.total / self.period
+            self.total -= self.window.popleft()
+        return self.value
+
+
+class Ema(_State):
+    """TA-Lib EMA: seeded with the SMA of the first `period` values, k = 2/(period+1)."""
+    __slots__ = ("period", "k", "count", "total", "value")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k      = 2.0 / (period + 1)
+        self.count  = 0
+        self.total  = 0.0
+        self.value  = _NAN
+
+    def push(self, x: float) -> float:
+        if self.count < self.period:
+            self.count += 1
+            self.total += x
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+
+class Macd(_State):
+    """TA-Lib MACD: the fast EMA starts (slow - fast) bars late so both seeds end on the same bar."""
+    __slots__ = ("skip", "fast", "slow", "signal", "macd", "signal_value")
+
+    def __init__(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL):
+        self.skip         = slow - fast
+        self.fast         = Ema(fast)
+        self.slow         = Ema(slow)
+        self.signal       = Ema(signal)
+        self.macd         = _NAN
+        self.signal_value = _NAN
+
+    def push(self, x: float):
+        slow = self.slow.push(x)
+        if self.skip > 0:
+            self.skip -= 1
+        else:
+            self.fast.push(x)
+        if not math.isnan(slow):
+            line = self.fast.value - slow
+            self.signal_value = self.signal.push(line)
+            # TA-Lib reports the line only once the signal exists
+            self.macd = line if not math.isnan(self.signal_value) else _NAN
+
+    @property
+    def histogram(self) -> float:
+        return self.macd - self.signal_value
+
+
+class Rsi(_State):
+    """Wilder RSI as TA-Lib computes it (no MetaStock extra bar)."""
+    __slots__ = ("period", "count", "prev", "gain", "loss", "value")
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self.count  = 0               # price changes seen
+        self.prev   = None
+        self.gain   = 0.0
+        self.loss   = 0.0
+        self.value  = _NAN
+
+    def push(self, x: float) -> float:
+        if self.prev is None:
+            self.prev = x
+            return self.value
+        diff, self.prev = x - self.prev, x
+        self.count += 1
+        n = self.period
+        if self.count <= n:
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            if self.count < n:
+                return self.value
+        else:
+            self.loss *= (n - 1)
+            self.gain *= (n - 1)
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+        self.loss /= n
+        self.gain /= n
+        total = self.gain + self.loss
+        self.value = 100.0 * (self.gain / total) if not _is_zero(total) else 0.0
+        return self.value
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    tr = high - low
+    up = abs(high - prev_close)
+    if up > tr:
+        tr = up
+    down = abs(low - prev_close)
+    if down > tr:
+        tr = down
+    return tr
+
+
+class Atr(_State):
+    """TA-Lib ATR: SMA of the first `period` true ranges, then Wilder smoothing."""
+    __slots__ = ("period", "count", "prev_close", "total", "value")
+
+    def __init__(self, period: int = ATR_PERIOD):
+        self.period     = period
+        self.count      = 0           # true ranges seen
+        self.prev_close = None
+        self.total      = 0.0
+        self.value      = _NAN
+
+    def push(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+        tr, self.prev_close = _true_range(high, low, self.prev_close), close
+        self.count += 1
+        n = self.period
+        if self.count < n:
+            self.total += tr
+        elif self.count == n:
+            self.total += tr
+            self.value = self.total / n
+        else:
+            self.value = (self.value * (n - 1) + tr) / n
+        return self.value
+
+
+class Adx(_State):
+    """
+    TA-Lib ADX: +DM/-DM and TR are summed over period-1 bars, then
+    Wilder-smoothed; the first ADX is the mean DX of the next `period`
+    bars (bar 2·period-1), after which ADX itself is Wilder-smoothed.
+    """
+    __slots__ = ("period", "count", "prev_high", "prev_low", "prev_close",
+                 "plus_dm", "minus_dm", "tr", "sum_dx", "value")
+
+    def __init__(self, period: int = ADX_PERIOD):
+        self.period     = period
+        self.count      = 0           # bars after the first
+        self.prev_high  = None
+        self.prev_low   = None
+        self.prev_close = None
+        self.plus_dm    = 0.0
+        self.minus_dm   = 0.0
+        self.tr         = 0.0
+        self.sum_dx     = 0.0
+        self.value      = _NAN
+
+    def push(self, high: float, low: float, close: float) -> float:
+        if self.prev_high is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return self.value
+        n = self.period
+        self.count += 1
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        if self.count < n:
+            if diff_m > 0 and diff_p < diff_m:
+                self.minus_dm += diff_m
+            elif diff_p > 0 and diff_p > diff_m:
+                self.plus_dm += diff_p
+            self.tr += tr
+            return self.value
+
+        self.minus_dm -= self.minus_dm / n
+        self.plus_dm  -= self.plus_dm / n
+        if diff_m > 0 and diff_p < diff_m:
+            self.minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            self.plus_dm += diff_p
+        self.tr = self.tr - (self.tr / n) + tr
+
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di  = 100.0 * (self.plus_dm / self.tr)
+            total = minus_di + plus_di
+            if not _is_zero(total):
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+
+        if self.count < 2 * n - 1:
+            if dx is not None:
+                self.sum_dx += dx
+        elif self.count == 2 * n - 1:
+            if dx is not None:
+                self.sum_dx += dx
+            self.value = self.sum_dx / n
+        elif dx is not None:
+            self.value = ((self.value * (n - 1)) + dx) / n
+        return self.value
+
+
+class BollingerBands(_State):
+    """
+    TA-Lib BBANDS: SMA middle band, population σ.  σ comes from running
+    sums of (x - shift) and (x - shift)², shift being the first value seen,
+    which keeps E[x²] - E[x]² from cancelling away the small variance of a
+    high-priced series.
+    """
+    __slots__ = ("period", "dev", "mid", "shift", "window", "total1", "total2",
+                 "upper", "middle", "lower")
+
+    def __init__(self, period: int = BB_PERIOD, dev: float = BB_DEV):
+        self.period = period
+        self.dev    = dev
+        self.mid    = Sma(period)
+        self.shift  = None
+        self.window = deque()
+        self.total1 = 0.0
+        self.total2 = 0.0
+        self.upper = self.middle = self.lower = _NAN
+
+    def push(self, x: float):
+        mid = self.mid.push(x)
+        if self.shift is None:
+            self.shift = x
+        y = x - self.shift
+        self.window.append(y)
+        self.total1 += y
+        self.total2 += y * y
+        if len(self.window) == self.period:
+            mean1 = self.total1 / self.period
+            mean2 = self.total2 / self.period
+            old = self.window.popleft()
+            self.total1 -= old
+            self.total2 -= old * old
+            variance = mean2 - mean1 * mean1
+            width = (math.sqrt(variance) if variance >= _EPSILON else 0.0) * self.dev
+            self.upper, self.middle, self.lower = mid + width, mid, mid - width
+
+
+class Stochastic(_State):
+    """TA-Lib STOCH with SMA slowing: fast %K over `k` bars, then SMA(slow_k), SMA(d)."""
+    __slots__ = ("highs", "lows", "slow_k", "slow_d", "k", "d")
+
+    def __init__(self, k: int = STOCH_K, slow_k: int = STOCH_SLOW_K, d: int = STOCH_D):
+        self.highs  = deque(maxlen=k)
+        self.lows   = deque(maxlen=k)
+        self.slow_k = Sma(slow_k)
+        self.slow_d = Sma(d)
+        self.k = self.d = _NAN
+
+    def push(self, high: float, low: float, close: float):
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.highs.maxlen:
+            return
+        lowest = min(self.lows)
+        diff = (max(self.highs) - lowest) / 100.0
+        fast_k = (close - lowest) / diff if diff != 0.0 else 0.0
+        k = self.slow_k.push(fast_k)
+        if not math.isnan(k):
+            self.k = k
+            self.d = self.slow_d.push(k)
+            if math.isnan(self.d):
+                self.k = _NAN             # TA-Lib aligns %K with the first %D
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class IndicatorState(_State):
+    """
+    The indicators for one bar series, advanced by push() once per closed
+    bar.  `fields` (names from FIELDS) limits which primitives exist at all;
+    None keeps every one.
+    """
+    __slots__ = ("rsi", "macd", "ema_21", "ema_50", "atr", "volume_sma", "bbands",
+                 "adx", "stoch", "bars", "last_bar")
+
+    def __init__(self, fields=None):
+        groups = _groups(fields)
+        self.rsi        = Rsi() if "rsi" in groups else None
+        self.macd       = Macd() if "macd" in groups else None
+        self.ema_21     = Ema(21) if "ema_21" in groups else None
+        self.ema_50     = Ema(50) if "ema_50" in groups else None
+        self.atr        = Atr() if "atr" in groups else None
+        self.volume_sma = Sma(VOL_SMA) if "volume_sma" in groups else None
+        self.bbands     = BollingerBands() if "bbands" in groups else None
+        self.adx        = Adx() if "adx" in groups else None
+        self.stoch      = Stochastic() if "stoch" in groups else None
+        self.bars       = 0
+        self.last_bar   = None        # (ts, high, low, close) of the newest pushed bar
+
+    def push(self, high: float, low: float, close: float, volume: float, ts=None):
+        if self.rsi is not None:
+            self.rsi.push(close)
+        if self.macd is not None:
+            self.macd.push(close)
+        if self.ema_21 is not None:
+            self.ema_21.push(close)
+        if self.ema_50 is not None:
+            self.ema_50.push(close)
+        if self.atr is not None:
+            self.atr.push(high, low, close)
+        if self.volume_sma is not None:
+            self.volume_sma.push(volume)
+        if self.bbands is not None:
+            self.bbands.push(close)
+        if self.adx is not None:
+            self.adx.push(high, low, close)
+        if self.stoch is not None:
+            self.stoch.push(high, low, close)
+        self.bars += 1
+        self.last_bar = (ts, high, low, close)
+
+    def values(self) -> dict:
+        out = {}
+        if self.rsi is not None:
+            out["rsi"] = self.rsi.value
+        if self.macd is not None:
+            out["macd"]           = self.macd.macd
+            out["macd_signal"]    = self.macd.signal_value
+            out["macd_histogram"] = self.macd.histogram
+        if self.ema_21 is not None:
+            out["ema_21"] = self.ema_21.value
+        if self.ema_50 is not None:
+            out["ema_50"] = self.ema_50.value
+        if self.atr is not None:
+            out["atr"] = self.atr.value
+        if self.volume_sma is not None:
+            out["volume_sma"] = self.volume_sma.value
+        if self.bbands is not None:
+            out["bb_upper"]  = self.bbands.upper
+            out["bb_middle"] = self.bbands.middle
+            out["bb_lower"]  = self.bbands.lower
+        if self.adx is not None:
+            out["adx"] = self.adx.value
+        if self.stoch is not None:
+            out["stoch_k"] = self.stoch.k
+            out["stoch_d"] = self.stoch.d
+        return out
+
+
+class Indicators(dict):
+    """
+    One bar's indicator values, as returned by IndicatorEngine.latest().
+    Fields the caller declared are filled in up front.  Any other field in
+    FIELDS is computed on first access from the bar window alone, with
+    factors.ta, and then kept.  So is a derived field registered with
+    derive().  .get() goes through the same path.
+    """
+
+    def __init__(self, values: dict, prices: dict = None):
+        super().__init__(values)
+        self._prices  = prices
+        self._derived = {}
+
+    def derive(self, name: str, fn):
+        """Register `name` as fn(self), computed the first time it is read."""
+        self._derived[name] = fn
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __missing__(self, name):
+        if name in self._derived:
+            value = self[name] = self._derived.pop(name)(self)
+            return value
+        if name not in FIELDS or self._prices is None:
+            raise KeyError(name)
+        self.update(_window_values(self._prices, FIELDS[name]))
+        return dict.__getitem__(self, name)
+
+
+class IndicatorEngine:
+    """IndicatorState per key (e.g. (symbol, timeframe)), kept in step with incoming bar windows."""
+
+    def __init__(self, memo_size: int = MEMO_SIZE):
+        self._states     = {}
+        self._locks      = {}
+        self._lock       = threading.Lock()
+        self._memo       = OrderedDict()
+        self._memo_size  = memo_size
+        self.memo_hits   = 0
+        self.memo_misses = 0
+
+    def latest(self, prices: dict, key=None, fields=None) -> Indicators:
+        """
+        Indicator values as of the newest bar in `prices` (last bar treated
+        as forming).  `fields` declares what the caller reads; only those
+        are streamed, the rest are computed on access (see Indicators).
+        """
+        highs, lows   = prices["high"], prices["low"]
+        closes, vols  = prices["close"], prices["volume"]
+        stamps = prices.get("timestamp")
+        n = len(closes)
+        if n == 0:
+            return Indicators(IndicatorState(fields).values())
+
+        if key is None or stamps is None:
+            state = IndicatorState(fields)
+            for i in range(n):
+                state.push(float(highs[i]), float(lows[i]), float(closes[i]), float(vols[i]))
+            return Indicators(state.values(), prices)
+
+        # States and memo entries are per declared indicator set
+        key = (key, _groups(fields))
+        memo_key = (key, _bar_key(prices, n - 2), _bar_key(prices, n - 1))
+        cached = self._memo_get(memo_key)
+        if cached is not None:
+            return Indicators(cached, prices)
+
+        with self._key_lock(key):
+            state = self._states.get(key)
+            start = _resume_index(state, stamps, highs, lows, closes) if state is not None else None
+            if start is None:
+                state, start = IndicatorState(fields), 0
+            for i in range(start, n - 1):
+                state.push(float(highs[i]), float(lows[i]), float(closes[i]), float(vols[i]),
+                           stamps[i])
+            self._states[key] = state
+            live = state.copy()
+        live.push(float(highs[-1]), float(lows[-1]), float(closes[-1]), float(vols[-1]), stamps[-1])
+        values = live.values()
+        self._memo_put(memo_key, values)
+        return Indicators(values, prices)
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._states.clear()
+                self._memo.clear()
+            else:
+                for state_key in [k for k in self._states if k[0] == key]:
+                    del self._states[state_key]
+                for memo_key in [k for k in self._memo if k[0][0] == key]:
+                    del self._memo[memo_key]
+
+    def _memo_get(self, memo_key):
+        with self._lock:
+            values = self._memo.get(memo_key)
+            if values is None:
+                self.memo_misses += 1
+                return None
+            self._memo.move_to_end(memo_key)
+            self.memo_hits += 1
+            return values
+
+    def _memo_put(self, memo_key, values):
+        with self._lock:
+            self._memo[memo_key] = values
+            self._memo.move_to_end(memo_key)
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+
+ENGINE = IndicatorEngine()
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _groups(fields) -> frozenset:
+    """Primitive groups behind a field list (None → all of them)."""
+    if fields is None:
+        return _ALL_GROUPS
+    try:
+        return frozenset(FIELDS[f] for f in fields)
+    except KeyError as e:
+        raise ValueError(f"Unknown indicator field {e.args[0]!r}") from None
+
+
+def _window_values(prices: dict, group: str) -> dict:
+    """One primitive group's fields at the last bar, from the window alone."""
+    high, low = prices["high"], prices["low"]
+    close, volume = prices["close"], prices["volume"]
+    if group == "rsi":
+        cols = {"rsi": ta.rsi(close, RSI_PERIOD)}
+    elif group == "macd":
+        line, signal, hist = ta.macd(close, MACD_FAST, MACD_SLOW, MACD_SIGNAL)
+        cols = {"macd": line, "macd_signal": signal, "macd_histogram": hist}
+    elif group in ("ema_21", "ema_50"):
+        cols = {group: ta.ema(close, int(group[4:]))}
+    elif group == "atr":
+        cols = {"atr": ta.atr(high, low, close, ATR_PERIOD)}
+    elif group == "volume_sma":
+        cols = {"volume_sma": ta.sma(volume, VOL_SMA)}
+    elif group == "bbands":
+        upper, middle, lower = ta.bbands(close, BB_PERIOD, BB_DEV, BB_DEV)
+        cols = {"bb_upper": upper, "bb_middle": middle, "bb_lower": lower}
+    elif group == "adx":
+        cols = {"adx": ta.adx(high, low, close, ADX_PERIOD)}
+    else:
+        k, d = ta.stoch(high, low, close, STOCH_K, STOCH_SLOW_K, STOCH_D)
+        cols = {"stoch_k": k, "stoch_d": d}
+    return {name: float(col[-1]) if len(col) else _NAN for name, col in cols.items()}
+
+
+def _bar_key(prices, i):
+    if i < 0:
+        return None
+    return (int(prices["timestamp"][i]), float(prices["high"][i]), float(prices["low"][i]),
+            float(prices["close"][i]), float(prices["volume"][i]))
+
+
+def _resume_index(state, stamps, highs, lows, closes):
+    """
+    Index of the first bar in the window the state has not absorbed, or
+    None if the window does not continue the state (the newest pushed bar
+    is missing or its values changed, or nothing was absorbed yet).
+    """
+    if state.last_bar is None:
+        return None
+    ts, high, low, close = state.last_bar
+    # The newest absorbed bar is normally second to last; walk back from the end
+    for j in range(len(stamps) - 2, -1, -1):
+        if stamps[j] == ts:
+            if highs[j] == high and lows[j] == low and closes[j] == close:
+                return j + 1
+            return None
+        if stamps[j] < ts:
+            return None
+    return None
@@ -23,24 +23,33 @@ Asymmetric Block Logic (preserves SHORT opportunity on bad coin news):
 Sentiment scoring method:
   Since we have no vote-counts (unlike CryptoPanic), we score via keyword
   matching on the article title. Each hit adds ±KEYWORD_WEIGHT to the
-  article score, capped at [-1, +1]. The per-article scores are averaged
-  and then the lookback window is applied.
+  article score, capped at [-1, +1]. The score is the mean over every
+  article published within the lookback window.  Articles are scored once,
+  when first seen, and kept in factors/news_store.py; each query's window
+  is updated incrementally as headlines arrive and age out.
+
+Feeds are read through market/rss.py: the BTC macro feed is downloaded
+once per scan cycle and shared by every symbol, revalidated with a
+conditional GET, and the macro and coin layers are fetched concurrently.
 """
 
-import feedparser
 import re
-from datetime import datetime, timezone, timedelta
-from urllib.parse import quote_plus
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from factors.cache import cached, scored, MINUTE
+from factors.news_store import ArticleStore
+from market import rss
 
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
 
-GOOGLE_NEWS_RSS  = "https://news.google.com/rss/search"
 LOOKBACK_HOURS   = 6          # wider window since RSS is slower than live API
 BLOCK_THRESHOLD  = 0.55       # |score| above this triggers a block flag
 KEYWORD_WEIGHT   = 0.25       # score contribution per keyword hit
-MAX_ARTICLES     = 15         # cap to avoid overwhelming keyword scorer
+CACHE_TTL_S      = 15 * MINUTE  # per-symbol result cache (factors/cache.py)
+FEED_MAX_AGE_S   = 5 * MINUTE   # shared feed copy reused within one scan
 
 MACRO_WEIGHT = 0.40
 COIN_WEIGHT  = 0.60
@@ -56,6 +65,9 @@ SYMBOL_TO_QUERY = {
 
 MACRO_QUERY = "Bitcoin BTC crypto market"
 
+_pool  = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news")
+_store = ArticleStore()
+
 # Keyword dictionaries — tuned for crypto news
 POSITIVE_KEYWORDS = {
     # Institutional / adoption
@@ -94,6 +106,7 @@ NEGATIVE_KEYWORDS = {
 # Public API
 # ---------------------------------------------------------------------------
 
+@cached("news", ttl=CACHE_TTL_S, stale=5 * MINUTE, accept=scored)
 def get_news_score(symbol: str) -> dict:
     """
     Fetch Google News RSS headlines and return a two-layer composite score.
@@ -116,15 +129,14 @@ def get_news_score(symbol: str) -> dict:
                                      symbol.replace("USDT", "") + " crypto")
     coin_code  = symbol.replace("USDT", "")
 
-    # Layer 1: BTC macro
-    macro_result = _fetch_and_score(MACRO_QUERY,  label="BTC-macro")
-
-    # Layer 2: Coin-specific
+    # Layer 1 (BTC macro, shared across symbols) and Layer 2 (coin) together
+    macro_job = _pool.submit(_fetch_and_score, MACRO_QUERY, "BTC-macro")
     if coin_code.upper() == "BTC":
-        coin_result = macro_result
+        coin_result = macro_result = macro_job.result()
         mw, cw = 1.0, 0.0
     else:
-        coin_result = _fetch_and_score(coin_query, label=coin_code)
+        coin_result  = _fetch_and_score(coin_query, label=coin_code)
+        macro_result = macro_job.result()
         mw, cw = MACRO_WEIGHT, COIN_WEIGHT
 
     macro_score = macro_result["score"]
@@ -185,84 +197,37 @@ def get_news_score(symbol: str) -> dict:
 # ---------------------------------------------------------------------------
 
 def _fetch_and_score(query: str, label: str = "") -> dict:
-    """Fetch Google News RSS for `query`, score by keyword analysis."""
+    """Fetch Google News RSS for `query`; score = rolling mean over the lookback."""
     try:
-        url  = f"{GOOGLE_NEWS_RSS}?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
-        feed = feedparser.parse(url)
+        lookback_s = LOOKBACK_HOURS * 3600
+        feed = rss.fetch_feed(rss.google_news_url(query), max_age=FEED_MAX_AGE_S,
+                              since=time.time() - lookback_s)
 
         if feed.bozo and not feed.entries:
             return _raw_neutral(f"RSS parse error for '{label}'")
 
-        cutoff  = datetime.now(timezone.utc) - timedelta(hours=LOOKBACK_HOURS)
-        recent  = _filter_recent(feed.entries, cutoff)
-
-        if not recent:
+        window = _store.update(query, feed, lookback_s, _score_title)
+        if not window.count:
             return _raw_neutral(f"No news in last {LOOKBACK_HOURS}h for '{label}'")
 
-        recent = recent[:MAX_ARTICLES]
-        score, headlines = _score_by_keywords(recent)
-        score = max(-1.0, min(1.0, score))
-
         return {
-            "score": score,
+            "score": max(-1.0, min(1.0, window.mean)),
             "details": {
-                "articles_found": len(recent),
-                "top_headlines":  headlines[:3],
+                "articles_found": window.count,
+                "top_headlines":  window.headlines(3),
             },
         }
     except Exception as e:
         return _raw_neutral(f"Exception for '{label}': {e}")
 
 
-def _filter_recent(entries: list, cutoff: datetime) -> list:
-    recent = []
-    for entry in entries:
-        try:
-            # feedparser normalises published_parsed to a time.struct_time in UTC
-            pub_struct = entry.get("published_parsed")
-            if pub_struct:
-                pub = datetime(*pub_struct[:6], tzinfo=timezone.utc)
-            else:
-                # Fallback: parse published string if struct not available
-                pub_str = entry.get("published", "")
-                pub     = datetime.strptime(pub_str, "%a, %d %b %Y %H:%M:%S %Z").replace(
-                    tzinfo=timezone.utc
-                )
-            if pub >= cutoff:
-                recent.append(entry)
-        except Exception:
-            recent.append(entry)   # include if date parse fails — better than missing news
-    return recent
-
-
-def _score_by_keywords(entries: list):
-    """
-    Score articles by positive/negative keyword hits in title.
-    Returns (average_score, headline_log).
-    """
-    net = 0.0
-    log = []
-
-    for entry in entries:
-        title  = entry.get("title", "")
-        words  = set(re.findall(r"[a-z]+", title.lower()))
-
-        pos_hits = words & POSITIVE_KEYWORDS
-        neg_hits = words & NEGATIVE_KEYWORDS
-
-        article_score = (len(pos_hits) - len(neg_hits)) * KEYWORD_WEIGHT
-        article_score = max(-1.0, min(1.0, article_score))
-
-        net += article_score
-        log.append({
-            "title":   title[:80],
-            "score":   round(article_score, 2),
-            "pos":     list(pos_hits)[:3],
-            "neg":     list(neg_hits)[:3],
-        })
-
-    final = net / len(entries) if entries else 0.0
-    return final, log
+def _score_title(title: str):
+    """Keyword score of one headline → (score, pos_hits, neg_hits)."""
+    words    = set(re.findall(r"[a-z]+", title.lower()))
+    pos_hits = sorted(words & POSITIVE_KEYWORDS)
+    neg_hits = sorted(words & NEGATIVE_KEYWORDS)
+    score    = (len(pos_hits) - len(neg_hits)) * KEYWORD_WEIGHT
+    return max(-1.0, min(1.0, score)), pos_hits, neg_hits
 
 
 def _label(score: float) -> str:
@@ -0,0 +1,205 @@
+"""
+News Article Store  (factors/news_store.py)
+===========================================
+Seen-article index behind the news factor.  Every headline is tokenised
+and scored exactly once, when it is first seen, and recorded in SQLite
+(keyed by a hash of its GUID / link) with its score and publish time.
+
+Each feed query then keeps a rolling window in memory:
+
+  - new articles (not yet seen for that query) are added, old ones fall
+    off the front as the lookback cutoff advances — the running sum is
+    updated incrementally, never recomputed
+  - a feed object already ingested (RSS 304 / served from memory) is not
+    walked again at all
+  - on start-up a query's window is rebuilt from the store, so a restart
+    neither re-scores nor forgets articles that have left the feed
+
+News evaluation cost therefore scales with new headlines only, and the
+lookback can be widened without re-scoring anything.
+
+    store = ArticleStore()
+    window = store.update("Bitcoin BTC crypto market", feed, lookback_s, score_fn)
+    # feed: market.rss.Feed — entries with title, link, id, published (epoch)
+    window.mean, window.count, window.headlines(3)
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+NEWS_DB_PATH   = os.getenv("NEWS_DB_PATH", "news_articles.db")
+RETENTION_S    = 7 * 86400      # articles older than this are pruned from disk
+PRUNE_EVERY_S  = 86400
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class Window:
+    """Articles of one query inside the lookback, ordered by publish time."""
+
+    def __init__(self):
+        self.rows  = []          # (published, article_id, score, title, pos, neg)
+        self.ids   = set()       # ids currently in rows
+        self.seen  = set()       # ids ever ingested for this query
+        self.total = 0.0
+        self.feed  = None        # last feed object ingested
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.rows) if self.rows else 0.0
+
+    def add(self, row: tuple):
+        bisect.insort(self.rows, row)
+        self.ids.add(row[1])
+        self.total += row[2]
+
+    def expire(self, cutoff: float):
+        drop = bisect.bisect_left(self.rows, (cutoff,))
+        for row in self.rows[:drop]:
+            self.ids.discard(row[1])
+            self.total -= row[2]
+        del self.rows[:drop]
+        if not self.rows:
+            self.total = 0.0     # no float drift carried into the next window
+
+    def headlines(self, n: int) -> list:
+        """Newest n articles in the shape of the news factor's headline log."""
+        return [{"title": title[:80], "score": round(score, 2), "pos": pos[:3], "neg": neg[:3]}
+                for _, _, score, title, pos, neg in reversed(self.rows[-n:])]
+
+
+class ArticleStore:
+    def __init__(self, path: str = NEWS_DB_PATH):
+        self.path      = path
+        self._conn     = None
+        self._lock     = threading.Lock()
+        self._windows  = {}
+        self._pruned_at = 0.0
+        self.scored    = 0       # articles tokenised + scored since start-up
+        self.reused    = 0       # articles whose score came from the store
+
+    def update(self, query: str, feed, lookback_s: float, score_fn) -> Window:
+        """
+        Fold `feed` (market.rss.Feed) into the window for `query` and
+        expire anything older than lookback_s.  score_fn(title) →
+        (score, pos_hits, neg_hits) runs only for never-seen articles.
+        """
+        now    = time.time()
+        cutoff = now - lookback_s
+        with self._lock:
+            conn = self._db()
+            if now - self._pruned_at > PRUNE_EVERY_S:
+                self._prune(conn, now)
+            window = self._windows.get(query)
+            if window is None:
+                window = self._windows[query] = self._load(conn, query, cutoff)
+            if feed is not window.feed:
+                self._ingest(conn, query, window, feed.entries, cutoff, score_fn, now)
+                window.feed = feed
+            window.expire(cutoff)
+            return window
+
+    def stats(self) -> dict:
+        return {"scored": self.scored, "reused": self.reused,
+                "windows": {q: w.count for q, w in self._windows.items()}}
+
+    # -----------------------------------------------------------------------
+    # Internal helpers
+    # -----------------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id        TEXT PRIMARY KEY,
+                    published REAL NOT NULL,
+                    score     REAL NOT NULL,
+                    title     TEXT NOT NULL,
+                    pos       TEXT NOT NULL,
+                    neg       TEXT NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_articles (
+                    query      TEXT NOT NULL,
+                    article_id TEXT NOT NULL,
+                    PRIMARY KEY (query, article_id)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_published "
+                               "ON articles (published)")
+            self._conn.commit()
+        return self._conn
+
+    def _load(self, conn, query: str, cutoff: float) -> Window:
+        window = Window()
+        rows = conn.execute("""
+            SELECT a.published, a.id, a.score, a.title, a.pos, a.neg
+            FROM feed_articles f JOIN articles a ON a.id = f.article_id
+            WHERE f.query = ? AND a.published >= ?""", (query, cutoff)).fetchall()
+        for published, aid, score, title, pos, neg in rows:
+            window.add((published, aid, score, title, json.loads(pos), json.loads(neg)))
+            window.seen.add(aid)
+        return window
+
+    def _ingest(self, conn, query, window, entries, cutoff, score_fn, now):
+        for entry in entries:
+            aid = _article_id(entry)
+            if aid is None or aid in window.seen:
+                continue
+            window.seen.add(aid)
+
+            row = conn.execute("SELECT published, score, title, pos, neg FROM articles "
+                               "WHERE id = ?", (aid,)).fetchone()
+            if row is not None:
+                published, score, title, pos, neg = row
+                pos, neg = json.loads(pos), json.loads(neg)
+                self.reused += 1
+            else:
+                title = entry.get("title", "")
+                published = _published(entry, now)
+                score, pos, neg = score_fn(title)
+                conn.execute("INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?)",
+                             (aid, published, score, title, json.dumps(pos), json.dumps(neg)))
+                self.scored += 1
+            conn.execute("INSERT OR IGNORE INTO feed_articles VALUES (?, ?)", (query, aid))
+            if published >= cutoff:
+                window.add((published, aid, score, title, pos, neg))
+        conn.commit()
+
+    def _prune(self, conn, now: float):
+        horizon = now - RETENTION_S
+        conn.execute("DELETE FROM feed_articles WHERE article_id IN "
+                     "(SELECT id FROM articles WHERE published < ?)", (horizon,))
+        conn.execute("DELETE FROM articles WHERE published < ?", (horizon,))
+        conn.commit()
+        for window in self._windows.values():
+            window.seen = set(window.ids)   # forgotten ids cost one lookup if re-listed
+        self._pruned_at = now
+
+
+def _article_id(entry) -> str:
+    key = entry.get("id") or entry.get("link") or entry.get("title")
+    if not key:
+        return None
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _published(entry, now: float) -> float:
+    """Publish time (epoch s); first-seen time if the feed gives none usable."""
+    return entry.get("published") or now   # include undated news — better than missing it
@@ -8,25 +8,27 @@ Signals derived from BTC daily klines:
   - 7-day momentum           (short-term direction)
   - ATR volatility ratio     (regime quality: trending vs whipsawing)
 
+Closed BTC dailies are cached until the next daily close (and across
+restarts); each evaluation refetches only the forming bar.
+
 Score : -1.0 (risk-off / downtrend) … +1.0 (risk-on / uptrend)
 """
 
-import requests
+from market import http_client
+from market.endpoints import MARKET_URL
 import numpy as np
 
-try:
-    import talib
-    _TALIB = True
-except ImportError:
-    _TALIB = False
+from factors import ta
+from factors.cache import cached, scored, until_next, DAY, MINUTE
 
-BYBIT_URL = "https://api.bybit.com/v5/market"
+BYBIT_URL = MARKET_URL
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
+@cached("regime", ttl=5 * MINUTE, stale=5 * MINUTE, accept=scored)
 def get_regime_score() -> dict:
     """Return a macro regime assessment based on BTC daily data."""
     try:
@@ -88,8 +90,24 @@ def get_regime_score() -> dict:
 # ---------------------------------------------------------------------------
 
 def _fetch_btc_daily(limit: int):
+    """Closed dailies (cached until the next daily close) + the forming bar."""
+    closed  = _fetch_btc_closed_daily(limit)
+    forming = _fetch_klines(1)
+    if closed is None or not forming:
+        return None
+    start = int(forming[-1][0])
+    return [c for c in closed if int(c[0]) < start][-(limit - 1):] + forming
+
+
+@cached("regime.btc_daily", ttl=until_next(DAY), persist=True)
+def _fetch_btc_closed_daily(limit: int):
+    candles = _fetch_klines(limit)
+    return candles[:-1] if candles else None
+
+
+def _fetch_klines(limit: int):
     try:
-        resp = requests.get(
+        resp = http_client.get(
             f"{BYBIT_URL}/kline",
             params={"category": "linear", "symbol": "BTCUSDT", "interval": "D", "limit": limit},
             timeout=10,
@@ -103,23 +121,12 @@ def _fetch_btc_daily(limit: int):
 
 
 def _ema(series: np.ndarray, period: int) -> float:
-    if _TALIB:
-        result = talib.EMA(series.astype(float), timeperiod=period)
-        return float(result[-1]) if not np.isnan(result[-1]) else 0.0
-    # Fallback: simple EMA via pandas-style calculation
-    k = 2.0 / (period + 1)
-    ema = float(series[0])
-    for v in series[1:]:
-        ema = v * k + ema * (1 - k)
-    return ema
+    result = ta.ema(series, period)
+    return float(result[-1]) if not np.isnan(result[-1]) else 0.0
 
 
 def _atr(highs, lows, closes, period):
-    if _TALIB:
-        return talib.ATR(highs.astype(float), lows.astype(float), closes.astype(float), timeperiod=period)
-    # Fallback: simple TR-based ATR
-    trs = [highs[i] - lows[i] for i in range(len(closes))]
-    return np.array(trs)
+    return ta.atr(highs, lows, closes, period)
 
 
 def _neutral(reason=""):
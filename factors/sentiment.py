@@ -17,7 +17,8 @@ Confidence is highest at extremes (where the contrarian edge is proven).
 Score: -1.0 (extreme greed → SHORT) … +1.0 (extreme fear → LONG)
 """
 
-import requests
+from market import http_client
+from factors.cache import cached, scored, HOUR, MINUTE
 
 FNG_URL = "https://api.alternative.me/fng/"
 
@@ -26,10 +27,11 @@ FNG_URL = "https://api.alternative.me/fng/"
 # Public API
 # ---------------------------------------------------------------------------
 
+@cached("sentiment", ttl=HOUR, stale=10 * MINUTE, persist=True, accept=scored)
 def get_sentiment_score() -> dict:
     """Fetch Fear & Greed Index and return a contrarian directional score."""
     try:
-        resp = requests.get(FNG_URL, params={"limit": 7}, timeout=8)
+        resp = http_client.get(FNG_URL, params={"limit": 7}, timeout=8)
         data = resp.json()
 
         if "data" not in data or not data["data"]:
@@ -114,7 +116,7 @@ def fetch_historical_fng(days: int = 365) -> dict:
     date_str format: "YYYY-MM-DD"
     """
     try:
-        resp = requests.get(FNG_URL, params={"limit": days, "date_format": "us"}, timeout=15)
+        resp = http_client.get(FNG_URL, params={"limit": days, "date_format": "us"}, timeout=15)
         data = resp.json()
         result = {}
         for entry in data.get("data", []):
@@ -4,10 +4,13 @@ Support & Resistance Factor  (factors/support_resistance.py)
 Detects key S/R levels from multiple timeframes and classifies the
 current price position into one of 5 actionable scenarios.
 
-Level detection uses THREE complementary sources (no external API needed):
+Level detection uses FOUR complementary sources (no external API needed):
   1. Swing highs/lows on 1h candles   (last 100 bars ≈ 4 days)
   2. Swing highs/lows on 4h candles   (last 100 bars ≈ 17 days)
   3. Psychological round-number levels (auto-scaled to price magnitude)
+  4. High-volume nodes of the 1h / 4h volume-by-price profile
+     (np.histogram of typical price weighted by volume, on a fixed
+     log-price grid; local peaks well above the mean bin are nodes)
 
 The FIVE scenarios:
   AT_SUPPORT      — price testing a known floor    → LONG bias
@@ -29,9 +32,29 @@ Instead it provides:
 
 These are consumed by futures.py's order-placement logic to replace
 pure-ATR stops with S/R-anchored stops for better R:R.
+
+Clustered zones are held in a ZoneIndex (sorted NumPy price array), so the
+nearest / next-level lookups are binary searches however many levels
+the sources produce.
+
+Swing levels are cached per symbol and timeframe.  Everything derived
+from closed bars (swings and their touch counts) is reused until a new
+1h / 4h bar closes; each call only folds in the forming bar (its touches,
+and the one candidate swing it neighbours).  Round numbers, clustering
+and the scenario still follow the live price every call.  Volume profiles
+are cached the same way but updated incrementally: when the window rolls,
+the dropped bars are subtracted from the histogram and the newly closed
+ones added.  Hit rate: level_cache_stats(), printed per scan by
+futures.py when SR_CACHE_STATS=1.
 """
 
+import bisect
+import os
+import threading
+from collections import OrderedDict, deque
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 # ---------------------------------------------------------------------------
 # Config
@@ -46,6 +69,13 @@ SWING_WINDOW_1H     = 5      # candles each side for 1h swing detection
 SWING_WINDOW_4H     = 3      # candles each side for 4h swing detection
 CLUSTER_TOL         = 0.005  # 0.5% clustering tolerance
 N_PSYCH_LEVELS      = 6      # number of round-number levels to generate
+ZONE_MARGIN         = 3      # SRIndex: complete zones kept either side of a query
+VP_BIN_PCT          = 0.005  # volume-profile bin width (log grid, ≈ CLUSTER_TOL)
+VP_NODE_MULT        = 1.5    # node = local peak ≥ this × mean non-empty bin volume
+N_VOLUME_NODES      = 3      # strongest nodes kept per timeframe
+VP_MAX_ROLL         = 4      # bars dropped / added per update before a full rebuild
+LEVEL_CACHE_SIZE    = 128    # (symbol, source) closed-bar level sets kept
+REPORT_LEVEL_CACHE  = os.getenv("SR_CACHE_STATS", "0") == "1"
 
 BREAKOUT_LEVERAGE   = 12.0
 NORMAL_LEVERAGE     = 10.0
@@ -59,6 +89,11 @@ PRICE_GRIDS = [
     (0,      1),       # LINK and below
 ]
 
+_level_cache = OrderedDict()   # (symbol, source) → _ClosedSwings | _VolumeProfile
+_level_cache_lock = threading.Lock()
+_level_counts = {"hits": 0, "updates": 0, "misses": 0}
+_VP_LOG_STEP = np.log1p(VP_BIN_PCT)
+
 
 # ---------------------------------------------------------------------------
 # Public API
@@ -98,33 +133,35 @@ def get_sr_score(symbol: str, current_price: float,
         volume_ratio = indicators.get("15m", {}).get("volume_ratio", 1.0)
 
         # --- Detect levels from three sources ---
-        levels_1h = _detect_swing_levels(
+        levels_1h = _cached_swing_levels(
+            symbol,
             data.get("60", {}).get("high",  np.array([])),
             data.get("60", {}).get("low",   np.array([])),
             window=SWING_WINDOW_1H,
             source="1h_swing",
         )
-        levels_4h = _detect_swing_levels(
+        levels_4h = _cached_swing_levels(
+            symbol,
             data.get("240", {}).get("high", np.array([])),
             data.get("240", {}).get("low",  np.array([])),
             window=SWING_WINDOW_4H,
             source="4h_swing",
         )
         levels_psych = _detect_round_numbers(current_price, N_PSYCH_LEVELS)
+        levels_vol   = (_volume_node_levels(symbol, data.get("60",  {}), "1h_volume", current_price)
+                        + _volume_node_levels(symbol, data.get("240", {}), "4h_volume", current_price))
 
-        all_raw = levels_1h + levels_4h + levels_psych
+        all_raw = levels_1h + levels_4h + levels_psych + levels_vol
         if not all_raw:
             return _neutral("No price levels detected")
 
-        # Cluster nearby levels into zones
+        # Cluster nearby levels into zones, indexed by price
         clustered = _cluster_levels(all_raw, CLUSTER_TOL)
+        zones     = ZoneIndex(clustered)
 
-        # Separate into support (below) and resistance (above)
-        supports    = [l for l in clustered if l["price"] < current_price]
-        resistances = [l for l in clustered if l["price"] > current_price]
-
-        nearest_sup = max(supports,    key=lambda x: x["price"]) if supports    else None
-        nearest_res = min(resistances, key=lambda x: x["price"]) if resistances else None
+        # Nearest support (below) and resistance (above)
+        nearest_sup = zones.below(current_price)
+        nearest_res = zones.above(current_price)
 
         # --- Classify scenario and compute raw score ---
         scenario, score = _classify_scenario(
@@ -133,7 +170,7 @@ def get_sr_score(symbol: str, current_price: float,
 
         # --- Suggest S/R-anchored stops and targets ---
         sug_stop, sug_target, sug_lev = _suggest_stops_targets(
-            scenario, current_price, nearest_sup, nearest_res, atr_15m, clustered,
+            scenario, current_price, nearest_sup, nearest_res, atr_15m, zones,
         )
 
         # Confidence: more distinct levels = better picture
@@ -155,6 +192,7 @@ def get_sr_score(symbol: str, current_price: float,
                 "levels_1h":      len(levels_1h),
                 "levels_4h":      len(levels_4h),
                 "levels_psych":   len(levels_psych),
+                "levels_volume":  len(levels_vol),
                 "scenario":       scenario,
                 "atr_15m":        round(atr_15m, 4),
                 "volume_ratio":   round(volume_ratio, 2),
@@ -165,6 +203,20 @@ def get_sr_score(symbol: str, current_price: float,
         return _neutral(f"Exception: {e}")
 
 
+def level_cache_stats() -> dict:
+    """
+    {"hits", "updates", "misses", "size", "hit_rate"} of the per-symbol
+    level cache.  updates = volume profiles rolled forward incrementally;
+    they count as hits in hit_rate.
+    """
+    with _level_cache_lock:
+        counts = dict(_level_counts, size=len(_level_cache))
+    served = counts["hits"] + counts["updates"]
+    total  = served + counts["misses"]
+    counts["hit_rate"] = round(served / total, 3) if total else 0.0
+    return counts
+
+
 # ---------------------------------------------------------------------------
 # Level Detection
 # ---------------------------------------------------------------------------
@@ -174,35 +226,237 @@ def _detect_swing_levels(highs: np.ndarray, lows: np.ndarray,
     """Detect local swing highs (resistance) and swing lows (support)."""
     if len(highs) < window * 2 + 1:
         return []
+    highs = np.asarray(highs, dtype=float)
+    lows  = np.asarray(lows,  dtype=float)
+    res_prices, sup_prices = _swing_prices(highs, lows, window)
+    strengths = _count_touches(np.concatenate([res_prices, sup_prices]), highs, lows)
+    return _level_dicts(res_prices, sup_prices, strengths, source)
 
-    levels = []
-    n = len(highs)
 
-    # Swing highs
-    for i in range(window, n - window):
-        segment_h = highs[max(0, i - window): i + window + 1]
-        if highs[i] == np.max(segment_h):
-            strength = _count_touches(highs[i], highs, lows)
-            levels.append({
-                "price":    float(highs[i]),
-                "type":     "resistance",
-                "strength": strength,
-                "source":   source,
-            })
+def _swing_prices(highs: np.ndarray, lows: np.ndarray, window: int):
+    """Prices of swing highs and swing lows, each in bar order."""
+    if len(highs) < window * 2 + 1:
+        return highs[:0], lows[:0]
+    # Bar i is a swing when it equals the extreme of its ±window neighbourhood
+    span      = 2 * window + 1
+    centre    = slice(window, len(highs) - window)
+    swing_hi  = np.flatnonzero(highs[centre] == sliding_window_view(highs, span).max(axis=1)) + window
+    swing_lo  = np.flatnonzero(lows[centre]  == sliding_window_view(lows,  span).min(axis=1)) + window
+    return highs[swing_hi], lows[swing_lo]
+
+
+def _level_dicts(res_prices, sup_prices, strengths, source: str) -> list:
+    kinds = ["resistance"] * len(res_prices) + ["support"] * len(sup_prices)
+    return [
+        {"price": float(p), "type": kind, "strength": int(st), "source": source}
+        for p, kind, st in zip(np.concatenate([res_prices, sup_prices]), kinds, strengths)
+    ]
+
+
+def _cached_swing_levels(symbol: str, highs, lows, window: int, source: str) -> list:
+    """
+    _detect_swing_levels(highs, lows) with the closed-bar part cached per
+    (symbol, source).  The last bar is treated as forming; the entry is
+    reused while every earlier bar is unchanged, i.e. until a bar closes
+    and the window rolls.
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows  = np.asarray(lows,  dtype=float)
+    if len(highs) < window * 2 + 1:
+        return []
+
+    key = highs[:-1].tobytes() + lows[:-1].tobytes()
+    with _level_cache_lock:
+        entry = _level_cache.get((symbol, source))
+        hit = entry is not None and entry.key == key and entry.window == window
+        _level_counts["hits" if hit else "misses"] += 1
+        if hit:
+            _level_cache.move_to_end((symbol, source))
+
+    if not hit:
+        entry = _ClosedSwings(key, highs[:-1], lows[:-1], window)
+        with _level_cache_lock:
+            _level_cache[(symbol, source)] = entry
+            _level_cache.move_to_end((symbol, source))
+            while len(_level_cache) > LEVEL_CACHE_SIZE:
+                _level_cache.popitem(last=False)
+    return entry.levels(highs[-1], lows[-1], source)
+
+
+class _ClosedSwings:
+    """
+    Swing levels of the closed bars plus what the forming bar can change:
+    its own touches, and whether bar n-1-window (the only candidate whose
+    neighbourhood reaches it) is a swing.
+    """
 
-    # Swing lows
-    for i in range(window, n - window):
-        segment_l = lows[max(0, i - window): i + window + 1]
-        if lows[i] == np.min(segment_l):
-            strength = _count_touches(lows[i], highs, lows)
+    def __init__(self, key: bytes, highs: np.ndarray, lows: np.ndarray, window: int):
+        self.key    = key
+        self.window = window
+        self.res, self.sup = _swing_prices(highs, lows, window)
+
+        # Edge candidate: its ±window neighbourhood ends on the forming bar
+        edge = len(highs) - window
+        self.edge_hi     = highs[edge]
+        self.edge_lo     = lows[edge]
+        self.edge_hi_max = np.max(highs[edge - window:])    # NaN if any NaN, as in the detector
+        self.edge_lo_min = np.min(lows[edge - window:])
+
+        # Closed-bar touches of every swing, then of the two edge candidates
+        self.prices  = np.concatenate([self.res, self.sup, [self.edge_hi, self.edge_lo]])
+        self.touches = _touch_counts(self.prices, highs, lows)
+
+    def levels(self, high: float, low: float, source: str) -> list:
+        touches = self.touches + _touch_counts(self.prices, np.array([high]), np.array([low]))
+        is_hi = self.edge_hi == np.maximum(self.edge_hi_max, high)
+        is_lo = self.edge_lo == np.minimum(self.edge_lo_min, low)
+
+        n_res = len(self.res)
+        res = np.append(self.res, self.edge_hi) if is_hi else self.res
+        sup = np.append(self.sup, self.edge_lo) if is_lo else self.sup
+        strengths = np.concatenate([
+            touches[:n_res],         touches[-2:-1] if is_hi else touches[:0],
+            touches[n_res:-2],       touches[-1:]   if is_lo else touches[:0],
+        ])
+        return _level_dicts(res, sup, np.maximum(1, strengths), source)
+
+
+# ---------------------------------------------------------------------------
+# Volume Profile
+# ---------------------------------------------------------------------------
+
+def _volume_node_levels(symbol: str, bars: dict, source: str, price: float) -> list:
+    """
+    High-volume nodes of one timeframe's volume-by-price profile.  The
+    closed bars' histogram is cached per (symbol, source) and rolled
+    forward as bars close; the forming bar is added per call.
+    """
+    if not all(k in bars for k in ("high", "low", "close", "volume")) or len(bars["close"]) < 2:
+        return []
+    typical = (np.asarray(bars["high"], dtype=float) + np.asarray(bars["low"], dtype=float)
+               + np.asarray(bars["close"], dtype=float)) / 3
+    volume  = np.asarray(bars["volume"], dtype=float)
+    valid   = np.isfinite(typical) & (typical > 0) & np.isfinite(volume) & (volume > 0)
+    bins    = np.zeros(len(typical), dtype=np.int64)
+    bins[valid] = np.floor(np.log(typical[valid]) / _VP_LOG_STEP)
+    volume  = np.where(valid, volume, 0.0)            # invalid bars carry no weight
+
+    with _level_cache_lock:
+        profile = _level_cache.get((symbol, source))
+        if profile is not None:
+            _level_cache.move_to_end((symbol, source))
+        # One caller at a time mutates a profile; others wait on the lock
+        lock = profile.lock if profile is not None else threading.Lock()
+
+    with lock:
+        outcome = profile.roll(bins[:-1], volume[:-1]) if profile is not None else "misses"
+        if outcome == "misses":
+            profile = _VolumeProfile(bins[:-1], volume[:-1], lock)
+            with _level_cache_lock:
+                _level_cache[(symbol, source)] = profile
+                while len(_level_cache) > LEVEL_CACHE_SIZE:
+                    _level_cache.popitem(last=False)
+        with _level_cache_lock:
+            _level_counts[outcome] += 1
+        return profile.nodes(bins[-1], volume[-1], price, source)
+
+
+class _VolumeProfile:
+    """
+    Volume histogram of the closed bars over log-price bins k (bin k spans
+    [(1+VP_BIN_PCT)^k, (1+VP_BIN_PCT)^(k+1))), stored from bin k0 up.
+    A bar count per bin lets emptied bins return to exactly zero.
+    """
+
+    def __init__(self, bins: np.ndarray, volume: np.ndarray, lock):
+        self.lock   = lock
+        self.bins   = bins
+        self.volume = volume
+        self.k0     = 0
+        self.hist   = np.zeros(0)
+        self.count  = np.zeros(0, dtype=np.int64)
+        self._add(bins, volume, +1)
+
+    def roll(self, bins: np.ndarray, volume: np.ndarray) -> str:
+        """Bring the profile up to these closed bars: "hits", "updates" or "misses"."""
+        old = len(self.bins)
+        for dropped in range(VP_MAX_ROLL + 1):
+            added = len(bins) - old + dropped
+            if not 0 <= added <= VP_MAX_ROLL or added > len(bins):
+                continue
+            kept = len(bins) - added
+            if (np.array_equal(bins[:kept], self.bins[dropped:])
+                    and np.array_equal(volume[:kept], self.volume[dropped:])):
+                if not dropped and not added:
+                    return "hits"
+                self._add(self.bins[:dropped], self.volume[:dropped], -1)
+                self._add(bins[kept:], volume[kept:], +1)
+                self.bins, self.volume = bins, volume
+                return "updates"
+        return "misses"
+
+    def nodes(self, k: int, volume: float, price: float, source: str) -> list:
+        k0, hist, count = self._with_bar(k, volume)
+        filled = count > 0
+        if not filled.any():
+            return []
+        padded = np.concatenate([[0.0], hist, [0.0]])
+        mean   = hist[filled].mean()
+        peaks  = np.flatnonzero((hist >= padded[:-2]) & (hist > padded[2:])
+                                & (hist >= VP_NODE_MULT * mean))
+        top    = peaks[np.argsort(hist[peaks], kind="stable")[::-1][:N_VOLUME_NODES]]
+        levels = []
+        for i in np.sort(top):
+            lvl = float(np.exp((k0 + i + 0.5) * _VP_LOG_STEP))   # geometric bin centre
             levels.append({
-                "price":    float(lows[i]),
-                "type":     "support",
-                "strength": strength,
+                "price":    lvl,
+                "type":     "resistance" if lvl > price else "support",
+                "strength": max(1, int(round(hist[i] / mean))),
                 "source":   source,
             })
-
-    return levels
+        return levels
+
+    def _add(self, bins: np.ndarray, volume: np.ndarray, sign: int):
+        bins = bins[volume > 0]
+        if not len(bins):
+            return
+        self._extend(int(bins.min()), int(bins.max()))
+        edges = np.arange(self.k0, self.k0 + len(self.hist) + 1)
+        weight, _ = np.histogram(bins, bins=edges, weights=volume[volume > 0])
+        bars, _   = np.histogram(bins, bins=edges)
+        self.hist  += sign * weight
+        self.count += sign * bars
+        self.hist[self.count == 0] = 0.0
+        if sign < 0:                                      # trim bins the window left behind
+            filled = np.flatnonzero(self.count)
+            lo, hi = (filled[0], filled[-1] + 1) if len(filled) else (0, 0)
+            self.k0 += lo
+            self.hist, self.count = self.hist[lo:hi], self.count[lo:hi]
+
+    def _extend(self, lo: int, hi: int):
+        if not len(self.hist):
+            self.k0 = lo
+        left  = max(0, self.k0 - lo)
+        right = max(0, hi - (self.k0 + len(self.hist) - 1))
+        if left or right:
+            self.hist  = np.pad(self.hist,  (left, right))
+            self.count = np.pad(self.count, (left, right))
+            self.k0   -= left
+
+    def _with_bar(self, k: int, volume: float):
+        """(k0, hist, count) copies with one more bar folded in."""
+        if not volume > 0:
+            return self.k0, self.hist, self.count
+        lo = min(k, self.k0) if len(self.hist) else k
+        hi = max(k, self.k0 + len(self.hist) - 1) if len(self.hist) else k
+        hist  = np.zeros(hi - lo + 1)
+        count = np.zeros(hi - lo + 1, dtype=np.int64)
+        start = self.k0 - lo
+        hist[start:start + len(self.hist)]   = self.hist
+        count[start:start + len(self.count)] = self.count
+        hist[k - lo]  += volume
+        count[k - lo] += 1
+        return lo, hist, count
 
 
 def _detect_round_numbers(price: float, n: int = 6) -> list:
@@ -223,14 +477,28 @@ def _detect_round_numbers(price: float, n: int = 6) -> list:
     return levels
 
 
-def _count_touches(level_price: float, highs: np.ndarray,
-                   lows: np.ndarray, tolerance: float = 0.005) -> int:
-    """Count candles that touched within ±tolerance% of this level."""
-    lo_bound = level_price * (1 - tolerance)
-    hi_bound = level_price * (1 + tolerance)
-    n = int(np.sum((highs >= lo_bound) & (highs <= hi_bound)) +
-            np.sum((lows  >= lo_bound) & (lows  <= hi_bound)))
-    return max(1, n)
+def _count_touches(level_prices, highs: np.ndarray,
+                   lows: np.ndarray, tolerance: float = 0.005):
+    """
+    Count candles that touched within ±tolerance% of each level (highs and
+    lows counted separately, minimum 1).  Accepts one level or an array of
+    levels; the bands are counted by binary search over sorted highs/lows.
+    """
+    n = np.maximum(1, _touch_counts(level_prices, highs, lows, tolerance))
+    return int(n) if n.ndim == 0 else n
+
+
+def _touch_counts(level_prices, highs: np.ndarray, lows: np.ndarray,
+                  tolerance: float = 0.005) -> np.ndarray:
+    """_count_touches without the minimum of 1, so partial counts can be added."""
+    levels   = np.asarray(level_prices, dtype=float)
+    lo_bound = levels * (1 - tolerance)
+    hi_bound = levels * (1 + tolerance)
+    n = np.zeros(levels.shape, dtype=np.int64)
+    for series in (np.sort(highs), np.sort(lows)):          # NaNs sort last, never counted
+        n += np.searchsorted(series, hi_bound, side="right")
+        n -= np.searchsorted(series, lo_bound, side="left")
+    return n
 
 
 def _cluster_levels(levels: list, tolerance: float = 0.005) -> list:
@@ -265,6 +533,51 @@ def _merge(cluster: list) -> dict:
     }
 
 
+class ZoneIndex:
+    """
+    Clustered zones (as _cluster_levels returns them, ascending) with a
+    sorted NumPy price array, so nearest-level and next-level lookups are
+    binary searches instead of scans.  Lookups return the zone dicts
+    themselves; prices are zone prices.
+    """
+
+    def __init__(self, zones: list):
+        self.zones  = zones
+        self.prices = np.array([z["price"] for z in zones], dtype=float)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def below(self, price: float):
+        """Highest zone strictly below price, or None."""
+        i = int(np.searchsorted(self.prices, price, side="left")) - 1
+        return self.zones[i] if i >= 0 else None
+
+    def above(self, price: float):
+        """Lowest zone strictly above price, or None."""
+        i = int(np.searchsorted(self.prices, price, side="right"))
+        return self.zones[i] if i < len(self.zones) else None
+
+    def next_above(self, price: float, exclude_price: float = None):
+        """Lowest zone price above price, skipping zones within 0.5% of exclude_price."""
+        i = int(np.searchsorted(self.prices, price, side="right"))
+        while i < len(self.prices) and _near(self.prices[i], exclude_price):
+            i += 1
+        return float(self.prices[i]) if i < len(self.prices) else None
+
+    def next_below(self, price: float, exclude_price: float = None):
+        """Highest zone price below price, skipping zones within 0.5% of exclude_price."""
+        i = int(np.searchsorted(self.prices, price, side="left")) - 1
+        while i >= 0 and _near(self.prices[i], exclude_price):
+            i -= 1
+        return float(self.prices[i]) if i >= 0 else None
+
+
+def _near(level: float, exclude_price: float, eps: float = 0.005) -> bool:
+    """True if level is the excluded (broken) level: within eps of it."""
+    return exclude_price is not None and not abs(level - exclude_price) / exclude_price > eps
+
+
 # ---------------------------------------------------------------------------
 # Scenario Classification
 # ---------------------------------------------------------------------------
@@ -307,7 +620,7 @@ def _classify_scenario(price, nearest_sup, nearest_res, atr, volume_ratio):
 # ---------------------------------------------------------------------------
 
 def _suggest_stops_targets(scenario, price, nearest_sup, nearest_res,
-                            atr, all_levels):
+                            atr, zones):
     """
     Return (suggested_stop, suggested_target, suggested_leverage).
     ATR floor ensures stops are never dangerously tight.
@@ -333,7 +646,7 @@ def _suggest_stops_targets(scenario, price, nearest_sup, nearest_res,
         stop   = (res_p - STOP_CLEARANCE_ATR * atr) if res_p else (price - min_dist)
         stop   = min(stop, price - min_dist)
         # Target: next resistance above current price
-        nxt = _next_above(price, all_levels, exclude_price=res_p)
+        nxt = zones.next_above(price, exclude_price=res_p)
         target = nxt if nxt else (price + 3 * abs(price - stop))
         return round(stop, 6), round(target, 6), BREAKOUT_LEVERAGE
 
@@ -341,7 +654,7 @@ def _suggest_stops_targets(scenario, price, nearest_sup, nearest_res,
         # Stop just above the broken support (now acting as resistance)
         stop   = (sup_p + STOP_CLEARANCE_ATR * atr) if sup_p else (price + min_dist)
         stop   = max(stop, price + min_dist)
-        nxt = _next_below(price, all_levels, exclude_price=sup_p)
+        nxt = zones.next_below(price, exclude_price=sup_p)
         target = nxt if nxt else (price - 3 * abs(stop - price))
         return round(stop, 6), round(target, 6), BREAKOUT_LEVERAGE
 
@@ -349,30 +662,6 @@ def _suggest_stops_targets(scenario, price, nearest_sup, nearest_res,
     return None, None, NORMAL_LEVERAGE
 
 
-def _next_above(price, levels, exclude_price=None):
-    eps = 0.005   # 0.5% tolerance to exclude the broken level
-    candidates = [
-        l["price"] for l in levels
-        if l["price"] > price and (
-            exclude_price is None
-            or abs(l["price"] - exclude_price) / exclude_price > eps
-        )
-    ]
-    return min(candidates) if candidates else None
-
-
-def _next_below(price, levels, exclude_price=None):
-    eps = 0.005
-    candidates = [
-        l["price"] for l in levels
-        if l["price"] < price and (
-            exclude_price is None
-            or abs(l["price"] - exclude_price) / exclude_price > eps
-        )
-    ]
-    return max(candidates) if candidates else None
-
-
 # ---------------------------------------------------------------------------
 # Backtest-compatible standalone detection (no live indicators dict needed)
 # ---------------------------------------------------------------------------
@@ -392,18 +681,25 @@ def detect_sr_levels_from_arrays(highs_1h, lows_1h, highs_4h, lows_4h,
     all_raw      = levels_1h + levels_4h + levels_psych
 
     if not all_raw:
-        return {
-            "scenario": "MID_RANGE", "score": -0.10,
-            "nearest_support": None, "nearest_resistance": None,
-            "suggested_stop": None, "suggested_target": None,
-            "suggested_leverage": NORMAL_LEVERAGE,
-        }
+        return _no_levels()
+
+    return _sr_decision(_cluster_levels(all_raw, CLUSTER_TOL), current_price)
+
+
+def _no_levels() -> dict:
+    return {
+        "scenario": "MID_RANGE", "score": -0.10,
+        "nearest_support": None, "nearest_resistance": None,
+        "suggested_stop": None, "suggested_target": None,
+        "suggested_leverage": NORMAL_LEVERAGE,
+    }
+
 
-    clustered = _cluster_levels(all_raw, CLUSTER_TOL)
-    supports  = [l for l in clustered if l["price"] < current_price]
-    resis     = [l for l in clustered if l["price"] > current_price]
-    nearest_sup = max(supports, key=lambda x: x["price"]) if supports else None
-    nearest_res = min(resis,    key=lambda x: x["price"]) if resis    else None
+def _sr_decision(clustered: list, current_price: float) -> dict:
+    """Scenario, stops and targets from clustered zones (backtest form)."""
+    zones       = ZoneIndex(clustered)
+    nearest_sup = zones.below(current_price)
+    nearest_res = zones.above(current_price)
 
     # Use a rough ATR proxy (0.5% of price) for standalone use
     atr_proxy = current_price * 0.005
@@ -411,7 +707,7 @@ def detect_sr_levels_from_arrays(highs_1h, lows_1h, highs_4h, lows_4h,
         current_price, nearest_sup, nearest_res, atr_proxy, volume_ratio=1.0
     )
     sug_stop, sug_target, sug_lev = _suggest_stops_targets(
-        scenario, current_price, nearest_sup, nearest_res, atr_proxy, clustered
+        scenario, current_price, nearest_sup, nearest_res, atr_proxy, zones
     )
 
     return {
@@ -425,6 +721,178 @@ def detect_sr_levels_from_arrays(highs_1h, lows_1h, highs_4h, lows_4h,
     }
 
 
+# ---------------------------------------------------------------------------
+# Incremental S/R index for bar-by-bar backtests
+# ---------------------------------------------------------------------------
+
+class SRIndex:
+    """
+    detect_sr_levels_from_arrays() for a replay that queries bar after bar,
+    without re-detecting levels from the whole history each time:
+
+        index = SRIndex(highs_1h, lows_1h, highs_4h, lows_4h)
+        index.query(idx1h, idx4h, price)
+            == detect_sr_levels_from_arrays(highs_1h[:idx1h + 1], lows_1h[:idx1h + 1],
+                                            highs_4h[:idx4h + 1], lows_4h[:idx4h + 1], price)
+
+      - Swing flags are computed once, vectorised; a swing at bar i is
+        confirmed into one price-sorted level list (both timeframes) when
+        bar i + window arrives.
+      - Each timeframe's highs/lows enter a Fenwick tree over their price
+        ranks as bars arrive, so a level's touch count is two O(log n)
+        prefix sums instead of a scan of the history.
+      - A query clusters only the zones around the price: ZONE_MARGIN
+        complete zones either side (nearest and next-level targets need at
+        most two), cut at gaps no round-number level falls into.  Chain
+        clustering is local, so these zones equal the full clustering's.
+      - lookback=N reproduces the live bot's last-N-bars view: bars and
+        swings leaving the window are dropped.  None keeps all history.
+
+    Indices passed to query() must not decrease.
+    """
+
+    def __init__(self, highs_1h, lows_1h, highs_4h, lows_4h, lookback: int = None):
+        self._feeds = (
+            _SwingFeed(highs_1h, lows_1h, SWING_WINDOW_1H, "1h_swing", lookback),
+            _SwingFeed(highs_4h, lows_4h, SWING_WINDOW_4H, "4h_swing", lookback),
+        )
+        self._prices  = []    # sorted level prices
+        self._entries = []    # parallel (price, feed, bar, type)
+
+    def query(self, idx1h: int, idx4h: int, current_price: float) -> dict:
+        for feed, idx in zip(self._feeds, (idx1h, idx4h)):
+            added, removed = feed.advance(idx)
+            for entry in removed:
+                self._remove(entry)
+            for entry in added:
+                pos = bisect.bisect_right(self._prices, entry[0])
+                self._prices.insert(pos, entry[0])
+                self._entries.insert(pos, entry)
+
+        levels_psych = _detect_round_numbers(current_price, N_PSYCH_LEVELS)
+        if not self._prices and not levels_psych:
+            return _no_levels()
+
+        psych = sorted(l["price"] for l in levels_psych)
+        pos   = bisect.bisect_left(self._prices, current_price)
+        start = self._zone_start(pos, psych)
+        end   = self._zone_end(pos, psych)
+        lo    = self._prices[start - 1] if start > 0 else -np.inf
+        hi    = self._prices[end] if end < len(self._prices) else np.inf
+        nearby = [{"price": price, "type": kind, "strength": feed.touches(price), "source": feed.source}
+                  for price, feed, _, kind in self._entries[start:end]]
+        nearby += [l for l in levels_psych if lo < l["price"] < hi]
+        return _sr_decision(_cluster_levels(nearby, CLUSTER_TOL), current_price)
+
+    # -----------------------------------------------------------------------
+
+    def _zone_start(self, pos: int, psych: list) -> int:
+        """Start of the ZONE_MARGIN-th complete zone below position pos."""
+        breaks = 0
+        for j in range(pos - 1, 0, -1):
+            if self._clean_break(j, psych):
+                breaks += 1
+                if breaks > ZONE_MARGIN:
+                    return j
+        return 0
+
+    def _zone_end(self, pos: int, psych: list) -> int:
+        """End (exclusive) of the ZONE_MARGIN-th complete zone from position pos up."""
+        breaks = 0
+        for j in range(pos + 1, len(self._prices)):
+            if self._clean_break(j, psych):
+                breaks += 1
+                if breaks > ZONE_MARGIN:
+                    return j
+        return len(self._prices)
+
+    def _clean_break(self, j: int, psych: list) -> bool:
+        """Zone boundary between levels j-1 and j that no round number can bridge."""
+        lower, upper = self._prices[j - 1], self._prices[j]
+        if abs(upper - lower) / lower <= CLUSTER_TOL:
+            return False
+        k = bisect.bisect_left(psych, lower)
+        return k == len(psych) or psych[k] > upper
+
+    def _remove(self, entry):
+        pos = bisect.bisect_left(self._prices, entry[0])
+        while self._entries[pos] is not entry:
+            pos += 1
+        del self._prices[pos]
+        del self._entries[pos]
+
+
+class _SwingFeed:
+    """One timeframe of an SRIndex: confirmed swings + touch counts so far."""
+
+    def __init__(self, highs, lows, window, source, lookback):
+        self.highs    = np.asarray(highs, dtype=float)
+        self.lows     = np.asarray(lows,  dtype=float)
+        self.window   = window
+        self.source   = source
+        self.lookback = lookback
+        n, span = len(self.highs), 2 * window + 1
+
+        self.is_high = np.zeros(n, dtype=bool)
+        self.is_low  = np.zeros(n, dtype=bool)
+        if n >= span:
+            centre = slice(window, n - window)
+            self.is_high[centre] = self.highs[centre] == sliding_window_view(self.highs, span).max(axis=1)
+            self.is_low[centre]  = self.lows[centre]  == sliding_window_view(self.lows,  span).min(axis=1)
+
+        values = np.concatenate([self.highs, self.lows])
+        self.ranks = np.unique(values[~np.isnan(values)]).tolist()
+        self.tree  = [0] * (len(self.ranks) + 1)      # Fenwick counts per price rank
+        self.start = 0                                # bars [start, end) are counted
+        self.end   = 0
+        self.swings = deque()                         # confirmed entries, by bar
+
+    def advance(self, idx: int):
+        """Count bars up to idx; return (entries confirmed, entries expired)."""
+        if idx + 1 < self.end:
+            raise ValueError(f"{self.source}: bar {idx} is before bar {self.end - 1} already read")
+        start = 0 if self.lookback is None else max(0, idx + 1 - self.lookback)
+        w, added, removed = self.window, [], []
+
+        for k in range(max(self.end, start), idx + 1):
+            self._count(k, +1)
+            i = k - w                                  # swing confirmed by bar k
+            if i - w >= start:
+                if self.is_high[i]:
+                    added.append((float(self.highs[i]), self, i, "resistance"))
+                if self.is_low[i]:
+                    added.append((float(self.lows[i]), self, i, "support"))
+        for k in range(self.start, min(start, self.end)):
+            self._count(k, -1)
+        self.start, self.end = start, max(self.end, idx + 1)
+
+        while self.swings and self.swings[0][2] - w < start:
+            removed.append(self.swings.popleft())
+        self.swings.extend(added)
+        return added, removed
+
+    def touches(self, price: float) -> int:
+        """_count_touches(price) over the counted bars."""
+        lo = bisect.bisect_left(self.ranks, price * (1 - 0.005))
+        hi = bisect.bisect_right(self.ranks, price * (1 + 0.005))
+        return max(1, self._prefix(hi) - self._prefix(lo))
+
+    def _count(self, k: int, delta: int):
+        for value in (self.highs[k], self.lows[k]):
+            if value == value:                         # NaN never touches
+                i = bisect.bisect_left(self.ranks, value) + 1
+                while i < len(self.tree):
+                    self.tree[i] += delta
+                    i += i & -i
+
+    def _prefix(self, i: int) -> int:
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
 # ---------------------------------------------------------------------------
 # Neutral fallback
 # ---------------------------------------------------------------------------
@@ -439,3 +907,50 @@ def _neutral(reason: str = "") -> dict:
         "levels": [],
         "details": {"reason": reason},
     }
+
+
+# ---------------------------------------------------------------------------
+# Benchmark — python -m factors.support_resistance
+# ---------------------------------------------------------------------------
+
+def _reference_swing_levels(highs, lows, window, source):
+    """The original per-bar loop, kept as the reference for tests/test_support_resistance.py."""
+    if len(highs) < window * 2 + 1:
+        return []
+
+    def touches(level):
+        lo, hi = level * (1 - 0.005), level * (1 + 0.005)
+        return max(1, int(np.sum((highs >= lo) & (highs <= hi)) + np.sum((lows >= lo) & (lows <= hi))))
+
+    n = len(highs)
+    levels = [{"price": float(highs[i]), "type": "resistance", "strength": touches(highs[i]), "source": source}
+              for i in range(window, n - window) if highs[i] == np.max(highs[i - window: i + window + 1])]
+    levels += [{"price": float(lows[i]), "type": "support", "strength": touches(lows[i]), "source": source}
+               for i in range(window, n - window) if lows[i] == np.min(lows[i - window: i + window + 1])]
+    return levels
+
+
+def _benchmark(sizes=(100, 1_000, 10_000), seed: int = 11):
+    import time
+
+    rng = np.random.default_rng(seed)
+    for n in sizes:
+        # Tick-rounded random walk so equal highs/lows (ties) occur as in live data
+        close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.006, n))), 2)
+        highs = np.round(close * (1 + rng.random(n) * 0.004), 2)
+        lows  = np.round(close * (1 - rng.random(n) * 0.004), 2)
+        timings = {}
+        for label, fn in (("loop", _reference_swing_levels), ("vectorised", _detect_swing_levels)):
+            rounds = max(1, 2_000 // n) if label == "loop" else max(5, 20_000 // n)
+            start = time.perf_counter()
+            for _ in range(rounds):
+                result = fn(highs, lows, SWING_WINDOW_1H, "1h_swing")
+            timings[label] = ((time.perf_counter() - start) / rounds * 1000, result)
+        same = timings["loop"][1] == timings["vectorised"][1]
+        loop_ms, vec_ms = timings["loop"][0], timings["vectorised"][0]
+        print(f"   {'✅' if same else '❌'} {n:>6} bars  {len(timings['loop'][1]):>5} levels  "
+              f"loop {loop_ms:9.3f} ms  vectorised {vec_ms:7.3f} ms  ×{loop_ms / vec_ms:6.1f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
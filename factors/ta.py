@@ -0,0 +1,337 @@
+"""
+Vectorized Indicators  (factors/ta.py)
+======================================
+Full-series technical indicators in NumPy, for code that needs whole
+indicator columns (backtests, the regime factor) and must not depend on
+TA-Lib being installed.  Each function takes and returns float arrays of
+the input's length, NaN until its lookback is filled — the same shape and
+the same values (to floating-point rounding) as the TA-Lib call it names:
+
+  sma(x, 20)                 talib.SMA
+  ema(x, 21)                 talib.EMA
+  macd(x, 12, 26, 9)         talib.MACD       → (line, signal, histogram)
+  rsi(x, 14)                 talib.RSI
+  true_range(h, l, c)        talib.TRANGE
+  atr(h, l, c, 14)           talib.ATR
+  adx(h, l, c, 14)           talib.ADX
+  stoch(h, l, c, 14, 3, 3)   talib.STOCH      (SMA slowing) → (k, d)
+  bbands(x, 20, 2, 2)        talib.BBANDS     (SMA middle)  → (upper, middle, lower)
+  indicators(h, l, c, v)     every column calculate_indicators uses, by name
+
+Window statistics (SMA, BBANDS, STOCH extremes) come from
+sliding_window_view.  The recursive ones (EMA, Wilder RSI/ATR/ADX) are
+first-order linear recurrences y[t] = a·y[t-1] + b[t], solved by
+scipy.signal.lfilter when SciPy is installed and otherwise in blocks of
+cumulative products and sums — no per-bar Python loop either way.
+
+The seeding rules are TA-Lib's and match factors/indicators.py, the
+streaming version the live bots use: SMA-seeded EMAs, MACD's fast EMA
+started (slow - fast) bars late, Wilder sums over period-1 bars for ADX.
+
+    python -m factors.ta       # compare against TA-Lib, when installed
+                               # (also tests/test_ta.py, both scan paths)
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+_EPSILON     = 1e-14             # TA-Lib's TA_IS_ZERO threshold
+_SCAN_GROWTH = 1e3               # block length for the NumPy scan: 1/∏a stays below this
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def sma(x, period: int = 20) -> np.ndarray:
+    x = _f64(x)
+    out = _nans(len(x))
+    if len(x) >= period:
+        out[period - 1:] = sliding_window_view(x, period).mean(axis=1)
+    return out
+
+
+def ema(x, period: int = 21) -> np.ndarray:
+    """EMA seeded with the SMA of the first `period` values, k = 2/(period+1)."""
+    x = _f64(x)
+    out = _nans(len(x))
+    if len(x) < period:
+        return out
+    k = 2.0 / (period + 1)
+    seed = x[:period].mean()
+    out[period - 1] = seed
+    out[period:] = _scan(k * x[period:], 1.0 - k, seed)
+    return out
+
+
+def macd(x, fast: int = 12, slow: int = 26, signal: int = 9):
+    """(line, signal, histogram); all three start together, where the signal EMA has its seed."""
+    x = _f64(x)
+    n = len(x)
+    line, sig = _nans(n), _nans(n)
+    skip = slow - fast
+    slow_ema = ema(x, slow)
+    fast_ema = _nans(n)
+    fast_ema[skip:] = ema(x[skip:], fast)
+    first = slow - 1
+    if n > first:
+        raw = fast_ema[first:] - slow_ema[first:]
+        sig[first:] = ema(raw, signal)
+        start = first + signal - 1
+        line[start:] = raw[signal - 1:]
+    return line, sig, line - sig
+
+
+def rsi(x, period: int = 14) -> np.ndarray:
+    """Wilder RSI (TA-Lib's, without the MetaStock extra bar)."""
+    x = _f64(x)
+    out = _nans(len(x))
+    if len(x) <= period:
+        return out
+    diff = np.diff(x)
+    gain = np.where(diff > 0, diff, 0.0)
+    loss = np.where(diff < 0, -diff, 0.0)
+    a = (period - 1) / period
+    avg_gain = np.empty(len(diff) - period + 1)
+    avg_loss = np.empty_like(avg_gain)
+    avg_gain[0] = gain[:period].sum() / period
+    avg_loss[0] = loss[:period].sum() / period
+    avg_gain[1:] = _scan(gain[period:] / period, a, avg_gain[0])
+    avg_loss[1:] = _scan(loss[period:] / period, a, avg_loss[0])
+    total = avg_gain + avg_loss
+    nonzero = ~_is_zero(total)
+    out[period:] = np.where(nonzero, 100.0 * avg_gain / np.where(nonzero, total, 1.0), 0.0)
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    out = _nans(len(close))
+    if len(close) > 1:
+        prev = close[:-1]
+        out[1:] = np.maximum(high[1:] - low[1:],
+                             np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev)))
+    return out
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Mean of the first `period` true ranges, then Wilder smoothing."""
+    tr = true_range(high, low, close)
+    out = _nans(len(tr))
+    if len(tr) <= period:
+        return out
+    seed = tr[1:period + 1].mean()
+    out[period] = seed
+    out[period + 1:] = _scan(tr[period + 1:] / period, (period - 1) / period, seed)
+    return out
+
+
+def adx(high, low, close, period: int = 14) -> np.ndarray:
+    """
+    +DM/-DM and TR summed over period-1 bars then Wilder-smoothed; the
+    first ADX is the mean DX of the next `period` bars (bar 2·period-1),
+    after which ADX is Wilder-smoothed over the bars where DX is defined.
+    """
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    n = len(close)
+    out = _nans(n)
+    if n < 2 * period:
+        return out
+    diff_p = high[1:] - high[:-1]
+    diff_m = low[:-1] - low[1:]
+    minus_dm = np.where((diff_m > 0) & (diff_p < diff_m), diff_m, 0.0)
+    plus_dm  = np.where((diff_p > 0) & (diff_p > diff_m), diff_p, 0.0)
+    tr = true_range(high, low, close)[1:]
+
+    # Wilder sums, one entry per bar from bar period-1 on
+    a = (period - 1) / period
+    seed = period - 1
+    sums = []
+    for series in (plus_dm, minus_dm, tr):
+        s = np.empty(n - seed)
+        s[0] = series[:seed].sum()
+        s[1:] = _scan(series[seed:], a, s[0])
+        sums.append(s[1:])                         # bars period .. n-1
+    plus_s, minus_s, tr_s = sums
+
+    valid_tr = ~_is_zero(tr_s)
+    safe_tr  = np.where(valid_tr, tr_s, 1.0)
+    plus_di  = 100.0 * (plus_s / safe_tr)
+    minus_di = 100.0 * (minus_s / safe_tr)
+    di_sum   = plus_di + minus_di
+    valid    = valid_tr & ~_is_zero(di_sum)
+    dx = np.where(valid, 100.0 * (np.abs(minus_di - plus_di) / np.where(valid, di_sum, 1.0)), 0.0)
+
+    first = dx[:period].sum() / period              # invalid DX counts as 0, as in TA-Lib
+    out[2 * period - 1] = first
+    rest_valid = valid[period:]
+    out[2 * period:] = _scan(np.where(rest_valid, dx[period:] / period, 0.0),
+                             np.where(rest_valid, a, 1.0), first)
+    return out
+
+
+def stoch(high, low, close, k_period: int = 14, slow_k: int = 3, d_period: int = 3):
+    """(slow %K, %D) with SMA slowing; %K is reported from the bar %D starts."""
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    n = len(close)
+    k_out, d_out = _nans(n), _nans(n)
+    start = k_period - 1
+    if n <= start:
+        return k_out, d_out
+    highest = sliding_window_view(high, k_period).max(axis=1)
+    lowest  = sliding_window_view(low, k_period).min(axis=1)
+    scale = (highest - lowest) / 100.0
+    fast_k = np.where(scale != 0.0, (close[start:] - lowest) / np.where(scale != 0.0, scale, 1.0), 0.0)
+    k = sma(fast_k, slow_k)
+    d = sma(k[slow_k - 1:], d_period) if len(k) >= slow_k else k[:0]
+    lag = slow_k + d_period - 2
+    if len(fast_k) > lag:
+        k_out[start + lag:] = k[lag:]
+        d_out[start + lag:] = d[d_period - 1:]
+    return k_out, d_out
+
+
+def bbands(x, period: int = 20, dev_up: float = 2.0, dev_down: float = 2.0):
+    """(upper, middle, lower): SMA middle band ± population σ over the same window."""
+    x = _f64(x)
+    n = len(x)
+    upper, middle, lower = _nans(n), _nans(n), _nans(n)
+    if n < period:
+        return upper, middle, lower
+    windows = sliding_window_view(x, period)
+    mean = windows.mean(axis=1)
+    variance = windows.var(axis=1)
+    sigma = np.where(variance >= _EPSILON, np.sqrt(variance), 0.0)
+    middle[period - 1:] = mean
+    upper[period - 1:]  = mean + dev_up * sigma
+    lower[period - 1:]  = mean - dev_down * sigma
+    return upper, middle, lower
+
+
+def indicators(high, low, close, volume) -> dict:
+    """Every column the bots' calculate_indicators reads, keyed as in factors.indicators."""
+    line, sig, hist = macd(close)
+    bb_upper, bb_middle, bb_lower = bbands(close)
+    stoch_k, stoch_d = stoch(high, low, close)
+    return {
+        "rsi":            rsi(close),
+        "macd":           line,
+        "macd_signal":    sig,
+        "macd_histogram": hist,
+        "ema_21":         ema(close, 21),
+        "ema_50":         ema(close, 50),
+        "atr":            atr(high, low, close),
+        "volume_sma":     sma(volume, 20),
+        "bb_upper":       bb_upper,
+        "bb_middle":      bb_middle,
+        "bb_lower":       bb_lower,
+        "adx":            adx(high, low, close),
+        "stoch_k":        stoch_k,
+        "stoch_d":        stoch_d,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _f64(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _nans(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def _is_zero(x):
+    return (-_EPSILON < x) & (x < _EPSILON)
+
+
+def _scan(b, a, y0: float) -> np.ndarray:
+    """
+    y[t] = a[t]·y[t-1] + b[t] with y[-1] = y0, for 0 < a ≤ 1 (scalar or
+    per-element).  Within a block, y = P·(y_prev + cumsum(b / P)) with P the
+    running product of a; blocks are cut before 1/P exceeds _SCAN_GROWTH so
+    the division never costs more than a few digits.
+    """
+    b = _f64(b)
+    n = len(b)
+    if n == 0:
+        return b.copy()
+    if np.ndim(a) == 0:
+        if lfilter is not None:
+            y, _ = lfilter([1.0], [1.0, -a], b, zi=[a * y0])
+            return y
+        a_min = float(a)
+        a = np.full(n, a_min)
+    else:
+        a = _f64(a)
+        a_min = float(a.min())
+    block = n if a_min >= 1.0 else max(1, int(math.log(_SCAN_GROWTH) / -math.log(a_min)))
+
+    out = np.empty(n)
+    prev = y0
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        p = np.cumprod(a[start:stop])
+        out[start:stop] = p * (prev + np.cumsum(b[start:stop] / p))
+        prev = out[stop - 1]
+    return out
+
+
+def _talib_errors(n: int = 5000, seed: int = 7) -> dict:
+    """{name: (NaN lookback matches, max relative error)} against TA-Lib on a random walk."""
+    import talib
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.random(n) * 0.01)
+    low = close * (1 - rng.random(n) * 0.01)
+    volume = rng.random(n) * 1e4
+    ours = indicators(high, low, close, volume)
+    ref_macd = talib.MACD(close, 12, 26, 9)
+    ref_bb = talib.BBANDS(close, 20, 2, 2, 0)
+    ref_stoch = talib.STOCH(high, low, close, 14, 3, 0, 3, 0)
+    reference = {
+        "rsi": talib.RSI(close, 14), "macd": ref_macd[0], "macd_signal": ref_macd[1],
+        "macd_histogram": ref_macd[2], "ema_21": talib.EMA(close, 21), "ema_50": talib.EMA(close, 50),
+        "atr": talib.ATR(high, low, close, 14), "volume_sma": talib.SMA(volume, 20),
+        "bb_upper": ref_bb[0], "bb_middle": ref_bb[1], "bb_lower": ref_bb[2],
+        "adx": talib.ADX(high, low, close, 14), "stoch_k": ref_stoch[0], "stoch_d": ref_stoch[1],
+    }
+    errors = {}
+    for name, ref in reference.items():
+        mine = ours[name]
+        same_nans = np.array_equal(np.isnan(mine), np.isnan(ref))
+        ok = ~np.isnan(ref)
+        err = float(np.max(np.abs(mine[ok] - ref[ok]) / np.maximum(np.abs(ref[ok]), 1.0))) if ok.any() else 0.0
+        errors[name] = (same_nans, err)
+    return errors
+
+
+def _self_check(n: int = 5000, seed: int = 7):
+    try:
+        errors = _talib_errors(n, seed)
+    except ImportError:
+        print("⚠️ TA-Lib not installed — nothing to compare against")
+        return
+    for name, (same_nans, err) in errors.items():
+        print(f"   {'✅' if same_nans and err < 1e-9 else '❌'} {name:<15} max rel err {err:.1e}"
+              f"{'' if same_nans else '  (NaN lookback differs)'}")
+    worst = max(err for _, err in errors.values())
+    print(f"📊 {n} bars, worst {worst:.1e} ({'scipy.signal.lfilter' if lfilter else 'NumPy block scan'})")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -7,11 +7,10 @@ import requests
 import hmac
 import hashlib
 import time
-try:
-    import talib
-except ImportError:
-    talib = None
-import numpy as np
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pybit.unified_trading import HTTP
 from dotenv import load_dotenv
@@ -20,6 +19,13 @@ import json
 import sqlite3
 from factors.aggregator import MultiFactorAggregator
 from factors.regime import get_regime_score
+from factors.indicators import ENGINE as indicator_engine
+from factors import cache as factor_cache
+from factors import support_resistance as sr_factor
+from market.candles import CandleStore
+from market.kline_stream import KlineStream, LINEAR_WS_URL
+from market import endpoints, ratelimit
+from market import snapshot as market_snapshot
 
 # Load environment variables
 load_dotenv()
@@ -29,6 +35,10 @@ api_secret = os.getenv("API_SECRET")
 # Trading Configuration
 TRADE_SYMBOLS = ["SOLUSDT", "ETHUSDT", "AVAXUSDT", "LINKUSDT", "BNBUSDT"]
 
+# Symbols analysed in parallel per scan (1 = serial). Each worker makes its
+# own kline/derivatives/news calls, so keep this within Bybit's rate limits.
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "3"))
+
 # Per-symbol Bybit linear contract specs (last verified 2026-08)
 # min_qty  : minimum order size in base coin units
 # step_size: order size increment
@@ -43,6 +53,24 @@ SYMBOL_CONTRACT_SPECS = {
 primary_timeframe = "15"   # Primary analysis
 higher_timeframe = "60"    # Trend confirmation
 
+# Indicator label → Bybit interval
+TIMEFRAMES = {"15m": primary_timeframe, "1h": higher_timeframe, "4h": "240"}
+
+# Scan stages in order; a symbol is counted under the stage that rejected it
+SCAN_STAGES = ("fetch", "flat_1h", "trend_4h", "signal", "btc", "consensus")
+
+# Indicators each timeframe's consumers read (signals, stops, trailing, S/R, AI log).
+# Only these are streamed per bar; any other field is computed on first access.
+INDICATOR_FIELDS = {
+    "15m": ("rsi", "macd", "atr", "ema_21", "volume_sma", "adx", "stoch_k"),
+    "1h":  ("rsi", "ema_50", "atr", "adx"),
+    "4h":  ("ema_21", "ema_50"),
+}
+
+# Live klines over the public WebSocket; REST remains the fallback
+KLINE_STREAM_ENABLED = os.getenv("KLINE_STREAM", "1") != "0"
+KLINE_WS_URL = os.getenv("BYBIT_KLINE_WS_URL", LINEAR_WS_URL)
+
 # Futures Risk Management
 futures_risk_per_trade = 0.02  # 2% risk per futures trade
 max_leverage = 20.0            # Conservative max leverage
@@ -61,6 +89,8 @@ session = HTTP(
     api_secret=api_secret,
     recv_window=15000,
 )
+endpoints.point_session(session)    # BYBIT_BASE_URL, e.g. the offline stand-in server
+ratelimit.install(session.client)   # every pybit call shares the process-wide Bybit budget
 
 # Futures Trading State
 futures_state = {
@@ -78,6 +108,37 @@ futures_state = {
     'session_pnl': 0.0,
 }
 
+class _ThreadLogBuffer:
+    """
+    stdout proxy used during a concurrent scan: output printed inside run()
+    is collected per worker so symbol logs don't interleave, and everything
+    else (main thread, kline stream) passes straight through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            return self.stream.write(text)
+        buf.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def run(self, fn, *args):
+        """Call fn(*args) capturing its output; returns (result, output)"""
+        self._local.buf = []
+        try:
+            result = fn(*args)
+        finally:
+            output, self._local.buf = "".join(self._local.buf), None
+        return result, output
+
+
 class FuturesTradingBot:
     
     def __init__(self):
@@ -86,6 +147,15 @@ class FuturesTradingBot:
         self.load_position_state()
         self.initialize_balance()
         self.state_file = 'trading_state.json'
+        self.candles = CandleStore(self._fetch_kline_rows)
+        self.scan_stats = Counter()          # symbols pruned per SCAN_STAGES entry, last scan
+        self._scan_stats_lock = threading.Lock()
+        self.kline_stream = None
+        if KLINE_STREAM_ENABLED:
+            stream = KlineStream(KLINE_WS_URL, TRADE_SYMBOLS,
+                                 [primary_timeframe, higher_timeframe, "240"])
+            if stream.start():
+                self.kline_stream = stream
 
     def init_db(self):
         """Initialize SQLite database for state persistence"""
@@ -542,77 +612,64 @@ class FuturesTradingBot:
             print(f"❌ Error getting USDT balance: {e}")
             return 0.0
     
+    def _fetch_kline_rows(self, symbol, interval, start=None, limit=100):
+        """Raw Bybit kline rows (newest first); `start` limits it to bars since then"""
+        params = dict(category="linear", symbol=symbol, interval=interval, limit=limit)
+        if start is not None:
+            params["start"] = start
+        result = session.get_kline(**params)
+        if result.get("retCode") != 0:
+            return None
+        return result["result"]["list"]
+
     def fetch_multi_timeframe_data(self, symbol):
-        """Fetch data from multiple timeframes"""
+        """Fetch data from multiple timeframes (live stream first, delta REST on miss)"""
         data = {}
         
         for tf in [primary_timeframe, higher_timeframe, "240"]:  # 15m, 1h, 4h
-            try:
-                result = session.get_kline(
-                    category="linear",
-                    symbol=symbol,
-                    interval=tf,
-                    limit=100
-                )
-                if result.get("retCode") == 0:
-                    candles = result["result"]["list"]
-                    candles = list(reversed(candles))
-                    
-                    data[tf] = {
-                        'close': np.array([float(c[4]) for c in candles]),
-                        'high': np.array([float(c[2]) for c in candles]),
-                        'low': np.array([float(c[3]) for c in candles]),
-                        'volume': np.array([float(c[5]) for c in candles]),
-                        'timestamp': [int(c[0]) for c in candles]
-                    }
-            except Exception as e:
-                print(f"❌ Error fetching {tf} data: {e}")
+            candles = self.fetch_timeframe(symbol, tf)
+            if candles is None:
                 return None
-            
-            time.sleep(0.1)
+            data[tf] = candles
         
-        return data if len(data) == 3 else None
+        return data
+
+    def fetch_timeframe(self, symbol, tf):
+        """One timeframe's candles (live stream first, delta REST on miss); None on failure"""
+        if self.kline_stream is not None:
+            streamed = self.kline_stream.get_candles(symbol, tf)
+            if streamed is not None:
+                return streamed
+        try:
+            candles = self.candles.get(symbol, tf)
+            if candles is not None and self.kline_stream is not None and symbol in TRADE_SYMBOLS:
+                self.kline_stream.seed(symbol, tf, self.candles.buffer(symbol, tf))
+            return candles
+        except Exception as e:
+            print(f"❌ Error fetching {tf} data: {e}")
+            return None
     
-    def calculate_indicators(self, data):
-        """Calculate technical indicators using TA-Lib"""
-        indicators = {}
-        
-        for tf, prices in [("15m", data[primary_timeframe]), ("1h", data[higher_timeframe]), ("4h", data["240"])]:
-            closes = prices['close']
-            highs = prices['high']
-            lows = prices['low']
-            volumes = prices['volume']
-            
-            # TA-Lib calculations
-            rsi = talib.RSI(closes, timeperiod=14)[-1]
-            macd_line, macd_signal, macd_hist = talib.MACD(closes, fastperiod=12, slowperiod=26, signalperiod=9)
-            ema_21 = talib.EMA(closes, timeperiod=21)[-1]
-            ema_50 = talib.EMA(closes, timeperiod=50)[-1]
-            atr = talib.ATR(highs, lows, closes, timeperiod=14)[-1]
-            volume_sma = talib.SMA(volumes, timeperiod=20)[-1]
-            bb_upper, bb_middle, bb_lower = talib.BBANDS(closes, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
-            adx = talib.ADX(highs, lows, closes, timeperiod=14)[-1]
-            stoch_k, stoch_d = talib.STOCH(highs, lows, closes, fastk_period=14, slowk_period=3, slowd_period=3)
-            
-            indicators[tf] = {
-                'rsi': rsi,
-                'macd': macd_line[-1],
-                'macd_signal': macd_signal[-1],
-                'macd_histogram': macd_hist[-1],
-                'ema_21': ema_21,
-                'ema_50': ema_50,
-                'atr': atr,
-                'volume_sma': volume_sma,
-                'current_volume': volumes[-1],
-                'bb_upper': bb_upper[-1],
-                'bb_lower': bb_lower[-1],
-                'bb_middle': bb_middle[-1],
-                'adx': adx,
-                'stoch_k': stoch_k[-1],
-                'stoch_d': stoch_d[-1],
-                'volume_ratio': volumes[-1] / volume_sma if volume_sma > 0 else 1
-            }
+    def calculate_indicators(self, data, symbol=None):
+        """Technical indicators per timeframe (streaming engine, TA-Lib-equal values)"""
+        indicators = {tf: self.timeframe_indicators(tf, data[interval], symbol)
+                      for tf, interval in TIMEFRAMES.items()}
+        current_price, volatility = self.price_and_volatility(data)
+        return indicators, current_price, volatility
+
+    def timeframe_indicators(self, tf, prices, symbol=None):
+        """Indicators for one timeframe ('15m' / '1h' / '4h'), limited to INDICATOR_FIELDS[tf]"""
+        volumes = prices['volume']
         
+        # O(1) per new bar for the declared fields; anything else is computed only if read
+        ind = indicator_engine.latest(prices, key=("linear", symbol, tf) if symbol else None,
+                                      fields=INDICATOR_FIELDS[tf])
+        ind['current_volume'] = volumes[-1]
+        ind.derive('volume_ratio',
+                   lambda i, v=volumes[-1]: v / i['volume_sma'] if i['volume_sma'] > 0 else 1)
+        return ind
+
+    def price_and_volatility(self, data):
+        """Latest 15m close and the 24h change from the 1h closes"""
         current_price = data[primary_timeframe]['close'][-1]
         
         # Calculate volatility
@@ -622,7 +679,7 @@ class FuturesTradingBot:
         else:
             volatility = 0.02
         
-        return indicators, current_price, volatility
+        return current_price, volatility
 
     def check_btc_correlation(self):
         """Check Bitcoin trend correlation"""
@@ -640,6 +697,12 @@ class FuturesTradingBot:
                 btc_closes = [float(c[4]) for c in candles]
                 btc_current = btc_closes[-1]
                 btc_1h_ago = btc_closes[-2] if len(btc_closes) > 1 else btc_current
+                
+                # Prefer the live tickers snapshot for "now" and "1h ago"
+                btc_ticker = market_snapshot.get_ticker("BTCUSDT")
+                if btc_ticker and btc_ticker["last_price"]:
+                    btc_current = btc_ticker["last_price"]
+                    btc_1h_ago = btc_ticker["prev_price_1h"] or btc_1h_ago
                 btc_4h_ago = btc_closes[-5] if len(btc_closes) > 4 else btc_current
                 
                 btc_1h_change = (btc_current - btc_1h_ago) / btc_1h_ago * 100
@@ -1389,6 +1452,7 @@ class FuturesTradingBot:
         print(f"🔍 Scanning Universe: {', '.join(TRADE_SYMBOLS)}")
 
         # ── Pre-loop: fetch market-wide signals ONCE (avoids 5× redundant API calls) ──
+        market_snapshot.refresh("linear")   # every linear ticker in one call
         btc_data = self.check_btc_correlation()
         try:
             regime_info = get_regime_score()
@@ -1398,88 +1462,31 @@ class FuturesTradingBot:
         regime_score_global = regime_info.get("score", 0.0)
         precomputed         = {"regime": regime_info}   # passed to aggregator for every symbol
 
-        aggregator = MultiFactorAggregator()
-
-        for current_sym in TRADE_SYMBOLS:
-            print(f"\n📊 Analyzing {current_sym}...")
-
-            data = self.fetch_multi_timeframe_data(current_sym)
-            if not data:
-                print(f"   ❌ Failed to fetch data")
-                continue
-
-            indicators, current_price, volatility = self.calculate_indicators(data)
-            print(f"   💲 Price: ${current_price:,.4f}")
-
-            # Regime Filter: Block if flat
-            if indicators['1h']['adx'] < 18:
-                print(f"   🚫 Flat market (1h ADX: {indicators['1h']['adx']:.1f} < 18)")
-                continue
-
-            signal = self.calculate_futures_signals(
-                indicators, current_price, volatility, regime_score=regime_score_global
-            )
-
-            if signal["signal"] not in ["LONG", "SHORT"] or signal["strength"] < signal_strength_threshold:
-                continue
-
-            if signal["signal"] == "LONG" and btc_data['bearish']:
-                print("   ❌ BTC bearish — skipping LONG")
-                continue
-
-            # Full multi-factor evaluation (regime pre-fetched, sentiment uses 1h cache)
-            # Pass indicators+data so S/R factor can detect swing levels
-            consensus = aggregator.evaluate(signal, current_sym, current_price,
-                                            precomputed=precomputed,
-                                            indicators=indicators,
-                                            data=data)
-            if consensus["block_trade"] or consensus["signal"] is None:
-                continue
-
-            score_abs = abs(consensus["final_score"])
-            print(f"   ✅ {consensus['signal']} Passed! Score: {consensus['final_score']:+.3f}")
-
-            if score_abs > best_score:
-                best_score = score_abs
-                
-                scores    = consensus.get("factor_scores", {})
-                sr_fs     = scores.get("support_resistance", {})
-                deriv_det = scores.get("derivatives", {}).get("details", {})
-                ind4h_now = indicators.get("4h", {})
-                trend_4h  = "BULL" if ind4h_now.get("ema_21", 0) > ind4h_now.get("ema_50", 0) else "BEAR"
-                
-                context = {
-                    "ta_signal_strength":  signal.get("strength"),
-                    "aggregated_score":    consensus.get("final_score"),
-                    "volatility":          volatility,
-                    "atr_15m":             indicators["15m"]["atr"],
-                    "technical_score":     scores.get("technical", {}).get("score"),
-                    "regime_score":        scores.get("regime",    {}).get("score"),
-                    "derivatives_score":   scores.get("derivatives", {}).get("score"),
-                    "sentiment_score":     scores.get("sentiment", {}).get("score"),
-                    "news_score":          scores.get("news",      {}).get("score"),
-                    "sr_score":            sr_fs.get("score"),
-                    "sr_scenario":         consensus.get("sr_scenario", "MID_RANGE"),
-                    "sr_suggested_stop":   consensus.get("sr_suggested_stop"),
-                    "sr_suggested_target": consensus.get("sr_suggested_target"),
-                    "sr_suggested_leverage": consensus.get("sr_suggested_leverage", 10.0),
-                    "regime_class":        scores.get("regime", {}).get("details", {}).get("regime"),
-                    "funding_rate":        deriv_det.get("funding",        {}).get("current_rate_pct"),
-                    "open_interest":       deriv_det.get("open_interest",  {}).get("oi_change_pct"),
-                    "long_short_ratio":    deriv_det.get("long_short_ratio", {}).get("long_ratio_pct"),
-                    "news_sentiment":      scores.get("news", {}).get("details", {}).get("sentiment_label"),
-                    "market_trend_4h":     trend_4h,
-                }
-
-                best_setup = {
-                    "symbol": current_sym,
-                    "signal": consensus["signal"],
-                    "strength": signal["strength"],
-                    "leverage": signal["leverage"],
-                    "current_price": current_price,
-                    "indicators": indicators,
-                    "context": context
-                }
+        aggregator = MultiFactorAggregator(concurrent_symbols=SCAN_CONCURRENCY)
+
+        # ── Scan every symbol (concurrently when SCAN_CONCURRENCY > 1) ──────
+        scan_start = time.time()
+        self.scan_stats = Counter()
+        candidates = self._scan_universe(btc_data, regime_score_global, precomputed, aggregator)
+        print(f"\n⏱️  Universe scan: {time.time() - scan_start:.1f}s "
+              f"({len(TRADE_SYMBOLS)} symbols, concurrency {SCAN_CONCURRENCY})")
+        pruned = " | ".join(f"{stage} {self.scan_stats[stage]}" for stage in SCAN_STAGES)
+        print(f"🧮 Pruned per stage: {pruned} → {sum(1 for c in candidates if c)} candidate(s)")
+        cache_rates = " | ".join(f"{name} {st['hit_rate']:.0%}"
+                                 for name, st in sorted(factor_cache.stats().items())
+                                 if st["hits"] + st["stale_hits"] + st["misses"])
+        print(f"🗄️  Factor cache hit rate: {cache_rates or 'no lookups yet'}")
+        if sr_factor.REPORT_LEVEL_CACHE:
+            sr_cache = sr_factor.level_cache_stats()
+            print(f"🧱 S/R level cache hit rate: {sr_cache['hit_rate']:.0%} "
+                  f"({sr_cache['hits']} hits, {sr_cache['updates']} rolled, "
+                  f"{sr_cache['misses']} misses, {sr_cache['size']} sets)")
+
+        # Best setup chosen only after every symbol returned; ties keep universe order
+        for candidate in candidates:
+            if candidate and candidate["score_abs"] > best_score:
+                best_score = candidate["score_abs"]
+                best_setup = candidate["setup"]
 
         # ── Execute the Best Setup ──────────────────────────────────────────
         if best_setup:
@@ -1505,18 +1512,171 @@ class FuturesTradingBot:
             win_rate = futures_state['winning_trades'] / futures_state['total_trades'] * 100
             print(f"🎯 Win Rate: {win_rate:.1f}% ({futures_state['winning_trades']}/{futures_state['total_trades']})")
             
-        return indicators
-    
-    def get_current_price(self, symbol):
-        """Fast API call to get latest price for active position management"""
+        return best_setup["indicators"] if best_setup else None
+
+    def _scan_universe(self, btc_data, regime_score_global, precomputed, aggregator):
+        """Run _scan_symbol for every symbol; returns candidates in TRADE_SYMBOLS order"""
+        workers = max(1, min(SCAN_CONCURRENCY, len(TRADE_SYMBOLS)))
+        args = (btc_data, regime_score_global, precomputed, aggregator)
+        if workers == 1:
+            return [self._scan_symbol_safe(sym, *args) for sym in TRADE_SYMBOLS]
+
+        log = _ThreadLogBuffer(sys.stdout)
+        sys.stdout = log
         try:
-            result = session.get_tickers(category="linear", symbol=symbol)
-            if result.get("retCode") == 0:
-                list_data = result.get("result", {}).get("list", [])
-                if list_data:
-                    return float(list_data[0].get("lastPrice", "0"))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+                futures = [pool.submit(log.run, self._scan_symbol_safe, sym, *args)
+                           for sym in TRADE_SYMBOLS]
+                results = [f.result() for f in futures]
+        finally:
+            sys.stdout = log.stream
+
+        candidates = []
+        for candidate, output in results:
+            print(output, end="")
+            candidates.append(candidate)
+        return candidates
+
+    def _scan_symbol_safe(self, symbol, *args):
+        try:
+            return self._scan_symbol(symbol, *args)
         except Exception as e:
-            pass
+            print(f"   ❌ {symbol} scan failed: {e}")
+            return None
+
+    def _scan_symbol(self, current_sym, btc_data, regime_score_global, precomputed, aggregator):
+        """
+        Staged pipeline for one symbol; returns {'score_abs', 'setup'} or None.
+        Cheapest gates first, each timeframe fetched only once the previous
+        gate passed: 1h ADX → 4h trend (vs. BTC) → 15m, TA signal, factors.
+        """
+        print(f"\n📊 Analyzing {current_sym}...")
+        data, indicators = {}, {}
+
+        # Stage 1 — 1h: block if flat
+        data[higher_timeframe] = self.fetch_timeframe(current_sym, higher_timeframe)
+        if data[higher_timeframe] is None:
+            print("   ❌ Failed to fetch data")
+            return self._pruned("fetch")
+        indicators['1h'] = self.timeframe_indicators('1h', data[higher_timeframe], current_sym)
+        if indicators['1h']['adx'] < 18:
+            print(f"   🚫 Flat market (1h ADX: {indicators['1h']['adx']:.1f} < 18)")
+            return self._pruned("flat_1h")
+
+        # Stage 2 — 4h: the trend must leave a direction BTC doesn't veto
+        data["240"] = self.fetch_timeframe(current_sym, "240")
+        if data["240"] is None:
+            print("   ❌ Failed to fetch data")
+            return self._pruned("fetch")
+        indicators['4h'] = self.timeframe_indicators('4h', data["240"], current_sym)
+        if not self._trend_directions(indicators['4h'], btc_data):
+            if indicators['4h'].get("ema_21") == indicators['4h'].get("ema_50"):
+                print("   🚫 4h EMA21 equals EMA50 — no trend direction")
+            else:
+                print("   🚫 4h trend only allows LONG and BTC is bearish")
+            return self._pruned("trend_4h")
+
+        # Stage 3 — 15m, TA signal and the multi-factor consensus
+        data[primary_timeframe] = self.fetch_timeframe(current_sym, primary_timeframe)
+        if data[primary_timeframe] is None:
+            print("   ❌ Failed to fetch data")
+            return self._pruned("fetch")
+        indicators['15m'] = self.timeframe_indicators('15m', data[primary_timeframe], current_sym)
+        indicators = {tf: indicators[tf] for tf in TIMEFRAMES}      # 15m, 1h, 4h order
+
+        current_price, volatility = self.price_and_volatility(data)
+        ticker = market_snapshot.get_ticker(current_sym)
+        if ticker and ticker["price_24h_pcnt"] is not None:
+            volatility = abs(ticker["price_24h_pcnt"])   # exchange's rolling 24h change
+        print(f"   💲 Price: ${current_price:,.4f}")
+
+        signal = self.calculate_futures_signals(
+            indicators, current_price, volatility, regime_score=regime_score_global
+        )
+
+        if signal["signal"] not in ["LONG", "SHORT"] or signal["strength"] < signal_strength_threshold:
+            return self._pruned("signal")
+
+        if signal["signal"] == "LONG" and btc_data['bearish']:
+            print("   ❌ BTC bearish — skipping LONG")
+            return self._pruned("btc")
+
+        # Full multi-factor evaluation (regime pre-fetched, sentiment uses 1h cache)
+        # Pass indicators+data so S/R factor can detect swing levels
+        consensus = aggregator.evaluate(signal, current_sym, current_price,
+                                        precomputed=precomputed,
+                                        indicators=indicators,
+                                        data=data)
+        if consensus["block_trade"] or consensus["signal"] is None:
+            return self._pruned("consensus")
+
+        score_abs = abs(consensus["final_score"])
+        print(f"   ✅ {consensus['signal']} Passed! Score: {consensus['final_score']:+.3f}")
+
+        scores    = consensus.get("factor_scores", {})
+        sr_fs     = scores.get("support_resistance", {})
+        deriv_det = scores.get("derivatives", {}).get("details", {})
+        ind4h_now = indicators.get("4h", {})
+        trend_4h  = "BULL" if ind4h_now.get("ema_21", 0) > ind4h_now.get("ema_50", 0) else "BEAR"
+
+        context = {
+            "ta_signal_strength":  signal.get("strength"),
+            "aggregated_score":    consensus.get("final_score"),
+            "volatility":          volatility,
+            "atr_15m":             indicators["15m"]["atr"],
+            "technical_score":     scores.get("technical", {}).get("score"),
+            "regime_score":        scores.get("regime",    {}).get("score"),
+            "derivatives_score":   scores.get("derivatives", {}).get("score"),
+            "sentiment_score":     scores.get("sentiment", {}).get("score"),
+            "news_score":          scores.get("news",      {}).get("score"),
+            "sr_score":            sr_fs.get("score"),
+            "sr_scenario":         consensus.get("sr_scenario", "MID_RANGE"),
+            "sr_suggested_stop":   consensus.get("sr_suggested_stop"),
+            "sr_suggested_target": consensus.get("sr_suggested_target"),
+            "sr_suggested_leverage": consensus.get("sr_suggested_leverage", 10.0),
+            "regime_class":        scores.get("regime", {}).get("details", {}).get("regime"),
+            "funding_rate":        deriv_det.get("funding",        {}).get("current_rate_pct"),
+            "open_interest":       deriv_det.get("open_interest",  {}).get("oi_change_pct"),
+            "long_short_ratio":    deriv_det.get("long_short_ratio", {}).get("long_ratio_pct"),
+            "news_sentiment":      scores.get("news", {}).get("details", {}).get("sentiment_label"),
+            "market_trend_4h":     trend_4h,
+        }
+
+        setup = {
+            "symbol": current_sym,
+            "signal": consensus["signal"],
+            "strength": signal["strength"],
+            "leverage": signal["leverage"],
+            "current_price": current_price,
+            "indicators": indicators,
+            "context": context
+        }
+
+        return {"score_abs": score_abs, "setup": setup}
+
+    def _trend_directions(self, ind4h, btc_data):
+        """Directions calculate_futures_signals' 4h gate can still return, minus LONG when BTC is bearish"""
+        ema21_4h = ind4h.get("ema_21")
+        ema50_4h = ind4h.get("ema_50")
+        if ema21_4h is None or ema50_4h is None or not ema50_4h > 0:
+            directions = {"LONG", "SHORT"}        # gate relaxed when 4h EMA unavailable
+        else:
+            directions = ({"LONG"} if ema21_4h > ema50_4h else set()) | \
+                         ({"SHORT"} if ema21_4h < ema50_4h else set())
+        if btc_data['bearish']:
+            directions.discard("LONG")
+        return directions
+
+    def _pruned(self, stage):
+        with self._scan_stats_lock:
+            self.scan_stats[stage] += 1
+        return None
+    
+    def get_current_price(self, symbol):
+        """Latest price for active position management (tickers snapshot, ≤5s old)"""
+        ticker = market_snapshot.get_ticker(symbol, max_age=5, bulk=False)
+        if ticker and ticker["last_price"]:
+            return ticker["last_price"]
         return None
 
     def run_bot(self):
@@ -1548,7 +1708,7 @@ class FuturesTradingBot:
             print("🔄 Initializing indicators for active position management...")
             data = self.fetch_multi_timeframe_data(futures_state['position']['symbol'])
             if data:
-                indicators_cache, _, _ = self.calculate_indicators(data)
+                indicators_cache, _, _ = self.calculate_indicators(data, futures_state['position']['symbol'])
         
         while True:
             try:
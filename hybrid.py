@@ -17,6 +17,7 @@ import time
 from datetime import datetime
 from spot import SpotTradingBot
 from futures import FuturesTradingBot, futures_state
+from market import snapshot as market_snapshot
 
 # Portfolio Allocations
 SPOT_ALLOCATION    = 0.70    # 70% of total capital allocated to spot
@@ -52,10 +53,9 @@ class HybridTradingBot:
             from spot import spot_state
             if spot_state.get('position'):
                 sym = spot_state['position']['symbol']
-                data = self.spot_bot.fetch_multi_timeframe_data(sym)
-                if data:
-                    cur_price = data["15"]['close'][-1]
-                    self.spot_bot.check_position_exit(sym, cur_price)
+                ticker = market_snapshot.get_ticker(sym, category="spot", max_age=5, bulk=False)
+                if ticker and ticker["last_price"]:
+                    self.spot_bot.check_position_exit(sym, ticker["last_price"])
 
         except Exception as e:
             print(f"⚠️ Error in Hybrid Fast Loop: {e}")
@@ -0,0 +1,9 @@
+"""
+Market Data Plumbing Package
+============================
+Shared exchange-facing infrastructure used by the trading bots and the
+factor modules.  Nothing in here produces a trading signal — it only
+delivers market data faster and more reliably.
+
+    from market.kline_stream import KlineStream
+"""
@@ -0,0 +1,178 @@
+"""
+Candle Buffers  (market/candles.py)
+===================================
+Rolling per-(symbol, interval) OHLCV windows backed by preallocated NumPy
+arrays, kept current by delta fetches instead of re-downloading the full
+100-bar history every cycle.
+
+  CandleBuffer  — fixed-capacity window.  Storage is 2 × capacity so the
+                  window can slide forward by plain appends; when the end
+                  of the storage is reached the live window is copied back
+                  to the front once (amortised O(1) per bar).  view() hands
+                  out contiguous slices, never rebuilt lists.
+
+  CandleStore   — one CandleBuffer per key plus a fetch function.  First
+                  call loads `capacity` bars; every later call requests
+                  only bars from the last stored start time onwards (Bybit
+                  kline `start` param), which returns the still-forming bar
+                  (updated in place) plus any bars that opened since.
+
+Steady state: 1–2 rows per request instead of 100.
+
+Views returned by CandleStore are live: they are only valid until the next
+get() for the same key.  Use CandleBuffer.view(copy=True) when the data
+must outlive that (e.g. handing it to another thread).
+"""
+
+import threading
+
+import numpy as np
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def interval_ms(interval: str) -> int:
+    """Bybit kline interval string → bar length in milliseconds."""
+    if interval == "D":
+        return 86_400_000
+    if interval == "W":
+        return 7 * 86_400_000
+    return int(interval) * 60_000
+
+
+def decode_rows(rows: list):
+    """
+    Bybit kline rows ([start, open, high, low, close, volume, turnover],
+    strings) → (int64 start times, float64 array of shape (5, n)).
+    Row order is preserved.
+    """
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((5, 0))
+    arr = np.array([r[:6] for r in rows], dtype=np.float64)
+    # ms timestamps are < 2**53, so the float round-trip is exact
+    return arr[:, 0].astype(np.int64), np.ascontiguousarray(arr[:, 1:6].T)
+
+
+class CandleBuffer:
+    """Fixed-capacity OHLCV window over preallocated arrays."""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._ts      = np.zeros(2 * capacity, dtype=np.int64)
+        self._cols    = np.zeros((5, 2 * capacity))
+        self._start   = 0
+        self._end     = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def last_ts(self):
+        return int(self._ts[self._end - 1]) if self._end > self._start else None
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def load(self, ts: np.ndarray, cols: np.ndarray):
+        """Replace the window with `ts` / `cols` (oldest → newest)."""
+        n = min(len(ts), self.capacity)
+        self._ts[:n]      = ts[len(ts) - n:]
+        self._cols[:, :n] = cols[:, len(ts) - n:]
+        self._start, self._end = 0, n
+
+    def update(self, ts: np.ndarray, cols: np.ndarray, step_ms: int) -> bool:
+        """
+        Merge rows (oldest → newest) into the window: a row with the last
+        stored start time overwrites the forming bar, newer rows are
+        appended.  Returns False — leaving the buffer untouched — if the
+        rows would leave a gap, so the caller can reload in full.
+        """
+        if self._end == self._start:
+            return False
+        last = self._ts[self._end - 1]
+        new  = ts >= last
+        ts, cols = ts[new], cols[:, new]
+        if len(ts) == 0:
+            return True
+        if ts[0] not in (last, last + step_ms) or np.any(np.diff(ts) != step_ms):
+            return False
+
+        if ts[0] == last:
+            self._cols[:, self._end - 1] = cols[:, 0]
+            ts, cols = ts[1:], cols[:, 1:]
+        for i in range(len(ts)):
+            self._append(ts[i], cols[:, i])
+        return True
+
+    def _append(self, ts, col):
+        if self._end == len(self._ts):
+            keep = min(len(self), self.capacity - 1)
+            lo   = self._end - keep
+            self._ts[:keep]      = self._ts[lo:self._end]
+            self._cols[:, :keep] = self._cols[:, lo:self._end]
+            self._start, self._end = 0, keep
+        self._ts[self._end]      = ts
+        self._cols[:, self._end] = col
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def view(self, copy: bool = False) -> dict:
+        """Window as the dict shape the bots' calculate_indicators expects."""
+        s, e = self._start, self._end
+        out = {
+            'open':      self._cols[OPEN, s:e],
+            'close':     self._cols[CLOSE, s:e],
+            'high':      self._cols[HIGH, s:e],
+            'low':       self._cols[LOW, s:e],
+            'volume':    self._cols[VOLUME, s:e],
+            'timestamp': self._ts[s:e],
+        }
+        if copy:
+            out = {k: v.copy() for k, v in out.items()}
+        return out
+
+    def copy(self) -> "CandleBuffer":
+        other = CandleBuffer(self.capacity)
+        other.load(self._ts[self._start:self._end], self._cols[:, self._start:self._end])
+        return other
+
+
+class CandleStore:
+    """
+    Delta-fetching cache of CandleBuffers.
+
+    fetch(symbol, interval, start, limit) must return Bybit kline rows in
+    the API's native newest-first order, or None on failure.  `start` is
+    None for a full load.
+    """
+
+    def __init__(self, fetch, capacity: int = 100):
+        self.fetch     = fetch
+        self.capacity  = capacity
+        self._buffers  = {}
+        self._lock     = threading.Lock()
+
+    def buffer(self, symbol: str, interval: str) -> CandleBuffer:
+        with self._lock:
+            key = (symbol, str(interval))
+            if key not in self._buffers:
+                self._buffers[key] = CandleBuffer(self.capacity)
+            return self._buffers[key]
+
+    def get(self, symbol: str, interval: str):
+        """Bring the buffer up to date and return view(), or None on fetch failure."""
+        buf = self.buffer(symbol, interval)
+        if len(buf):
+            rows = self.fetch(symbol, interval, buf.last_ts, self.capacity)
+            if rows is None:
+                return None
+            ts, cols = decode_rows(rows[::-1])
+            if buf.update(ts, cols, interval_ms(str(interval))):
+                return buf.view()
+
+        rows = self.fetch(symbol, interval, None, self.capacity)
+        if not rows:
+            return None
+        buf.load(*decode_rows(rows[::-1]))
+        return buf.view()
@@ -0,0 +1,49 @@
+"""
+Bybit Endpoints  (market/endpoints.py)
+======================================
+Where the bots reach Bybit.  Defaults are the live mainnet hosts; every
+REST and WebSocket URL in the bots, factors and backtests is derived from
+the two settings below, so the whole stack can be pointed at another
+exchange host — e.g. the offline stand-in in market/stub_server.py:
+
+    BYBIT_BASE_URL=http://127.0.0.1:8700   REST (pybit sessions and bare requests)
+    BYBIT_WS_URL=ws://127.0.0.1:8701       public WebSocket; /v5/public/{linear,spot}
+                                           is appended per market
+
+A non-default BYBIT_BASE_URL host is also paced by market.ratelimit.
+"""
+
+import os
+from urllib.parse import urlparse
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+DEFAULT_BASE_URL = "https://api.bybit.com"
+DEFAULT_WS_URL   = "wss://stream.bybit.com"
+
+BYBIT_BASE_URL = os.getenv("BYBIT_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+BYBIT_WS_URL   = os.getenv("BYBIT_WS_URL", DEFAULT_WS_URL).rstrip("/")
+MARKET_URL     = f"{BYBIT_BASE_URL}/v5/market"
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def base_host() -> str:
+    """Hostname of BYBIT_BASE_URL, e.g. 'api.bybit.com' or '127.0.0.1'."""
+    return urlparse(BYBIT_BASE_URL).hostname
+
+
+def public_ws_url(category: str) -> str:
+    """Public stream URL for 'linear' or 'spot'."""
+    return f"{BYBIT_WS_URL}/v5/public/{category}"
+
+
+def point_session(session):
+    """Aim a pybit HTTP session at BYBIT_BASE_URL (no-op for the default host)."""
+    if BYBIT_BASE_URL != DEFAULT_BASE_URL:
+        session.endpoint = BYBIT_BASE_URL
+    return session
@@ -0,0 +1,151 @@
+"""
+Historical Downloads  (market/history.py)
+=========================================
+Bulk kline and funding-rate history for the backtests.
+
+Instead of walking a range backwards one page at a time, the range is cut
+into independent windows that each fit in a single page (1000 klines or
+200 funding records) and the windows are fetched concurrently.  Requests
+go through http_client, so each takes a token from the shared "market"
+rate-limit bucket (BYBIT_MARKET_RPS, sized to Bybit's per-IP limit): the
+worker count only changes how quickly the budget is used, never whether
+it is exceeded.  Window results are merged and de-duplicated on ts.
+
+Responses go straight from JSON into typed NumPy columns — no DataFrame
+of strings followed by pd.to_numeric.
+
+  download_klines(symbol, interval, start_ms, end_ms)  → (ts, cols (5, n)) | None
+  download_funding(symbol, start_ms, end_ms)           → (ts, rates)        | None
+
+None means at least one window failed; callers must not treat a partial
+result as complete.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from market import http_client
+from market.candles import decode_rows, interval_ms
+from market.endpoints import MARKET_URL
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+BYBIT_MKT_URL    = MARKET_URL
+HISTORY_WORKERS  = int(os.getenv("HISTORY_WORKERS", "8"))
+KLINE_PAGE       = 1000
+FUNDING_PAGE     = 200
+FUNDING_STEP_MS  = 8 * 3600 * 1000    # window sizing; 4h/1h-funding symbols paginate inside
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def fetch_windows(fetch, start_ms: int, end_ms: int, window_ms: int,
+                  workers: int = HISTORY_WORKERS):
+    """
+    Run fetch(win_start, win_end) for consecutive windows covering
+    [start_ms, end_ms] on a thread pool.  Returns the results in time
+    order, or None if any window returned None.
+    """
+    windows = []
+    s = start_ms
+    while s <= end_ms:
+        e = min(s + window_ms - 1, end_ms)
+        windows.append((s, e))
+        s = e + 1
+    if not windows:
+        return []
+    if len(windows) == 1 or workers <= 1:
+        results = [fetch(s, e) for s, e in windows]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(windows)),
+                                thread_name_prefix="history") as pool:
+            results = list(pool.map(lambda w: fetch(*w), windows))
+    return None if any(r is None for r in results) else results
+
+
+def download_klines(symbol: str, interval: str, start_ms: int, end_ms: int,
+                    category: str = "linear"):
+    """Klines with start time in [start_ms, end_ms], sorted and de-duplicated."""
+    step = interval_ms(str(interval))
+
+    def page(s, e):
+        rows = _paginate(
+            f"{BYBIT_MKT_URL}/kline",
+            {"category": category, "symbol": symbol, "interval": interval, "limit": KLINE_PAGE},
+            s, e, start_key="start", end_key="end", ts_of=lambda r: int(r[0]),
+            page_size=KLINE_PAGE, label=symbol,
+        )
+        return None if rows is None else decode_rows(rows)
+
+    parts = fetch_windows(page, start_ms, end_ms, KLINE_PAGE * step)
+    if parts is None:
+        return None
+    ts   = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, dtype=np.int64)
+    cols = np.concatenate([p[1] for p in parts], axis=1) if parts else np.empty((5, 0))
+    ts, first = np.unique(ts, return_index=True)
+    return ts, cols[:, first]
+
+
+def download_funding(symbol: str, start_ms: int, end_ms: int):
+    """Funding-rate history in [start_ms, end_ms] as (ts int64, rate float64)."""
+
+    def page(s, e):
+        items = _paginate(
+            f"{BYBIT_MKT_URL}/funding/history",
+            {"category": "linear", "symbol": symbol, "limit": FUNDING_PAGE},
+            s, e, start_key="startTime", end_key="endTime",
+            ts_of=lambda x: int(x["fundingRateTimestamp"]),
+            page_size=FUNDING_PAGE, label=symbol,
+        )
+        if items is None:
+            return None
+        ts    = np.fromiter((int(x["fundingRateTimestamp"]) for x in items), dtype=np.int64, count=len(items))
+        rates = np.fromiter((float(x["fundingRate"]) for x in items), dtype=np.float64, count=len(items))
+        return ts, rates
+
+    parts = fetch_windows(page, start_ms, end_ms, FUNDING_PAGE * FUNDING_STEP_MS)
+    if parts is None:
+        return None
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    ts, first = np.unique(np.concatenate([p[0] for p in parts]), return_index=True)
+    return ts, np.concatenate([p[1] for p in parts])[first]
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _paginate(url, params, start_ms, end_ms, start_key, end_key, ts_of, page_size, label):
+    """
+    All rows of one window.  Normally a single request; if a page comes
+    back full the window is walked backwards until it is covered.
+    Returns None on any API or network error.
+    """
+    out = []
+    cursor_end = end_ms
+    while cursor_end >= start_ms:
+        try:
+            data = http_client.get(url, params={**params, start_key: start_ms, end_key: cursor_end},
+                                   timeout=20).json()
+        except Exception as e:
+            print(f"⚠️ Fetch exception ({label}): {e}")
+            return None
+        if data.get("retCode") != 0:
+            print(f"⚠️ Bybit API warning ({label}): {data.get('retMsg')}")
+            return None
+        rows = data["result"]["list"]
+        out.extend(rows)
+        if len(rows) < page_size:
+            break
+        oldest = min(ts_of(r) for r in rows)
+        if oldest <= start_ms:
+            break
+        cursor_end = oldest - 1
+    return out
@@ -0,0 +1,185 @@
+"""
+Kline Cache  (market/kline_cache.py)
+====================================
+Persistent columnar cache of historical klines for the backtests, so a
+multi-year run only downloads what it has never seen before.
+
+Layout (one directory per (category, symbol, interval)):
+
+    kline_cache/linear/SOLUSDT/15/2024-03.npy   float64 (6, n): ts, o, h, l, c, v
+    kline_cache/linear/SOLUSDT/15/index.json    {"2024-03": covered_until_ms, ...}
+
+  - Files are per UTC calendar month and loaded with mmap_mode="r".
+  - index.json records how far each month is known to be complete, so an
+    empty month before a symbol's listing is not re-requested and an open
+    month is topped up from where it stopped.
+  - Contiguous missing months are requested as one span, so a cold
+    multi-year range is a single (windowed, concurrent) download call.
+  - Only closed bars are stored; the still-forming bar is never cached.
+  - Freshly downloaded ranges are checked for continuity (every step ==
+    one interval).  A range with holes is re-requested once; holes that
+    survive that are real exchange gaps and are kept.
+  - offline=True never touches the network and serves whatever is cached,
+    reporting any months it could not cover.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from market.candles import interval_ms
+
+CACHE_DIR = os.getenv("KLINE_CACHE_DIR", "kline_cache")
+
+
+class KlineCache:
+    """
+    load() returns (ts int64, cols float64 (5, n) open/high/low/close/volume)
+    for [start_ms, end_ms], downloading missing ranges with
+    download(start_ms, end_ms) → (ts, cols) sorted by ts, or None on failure.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, offline: bool = False):
+        self.root    = root
+        self.offline = offline
+
+    def load(self, category: str, symbol: str, interval: str,
+             start_ms: int, end_ms: int, download=None):
+        interval = str(interval)
+        step     = interval_ms(interval)
+        folder   = os.path.join(self.root, category, symbol, interval)
+        index    = self._read_index(folder)
+
+        # Last bar start that is closed right now — nothing later is cached
+        last_closed = (int(time.time() * 1000) // step) * step - step
+        end_ms      = min(end_ms, last_closed)
+
+        months  = list(_months(start_ms, end_ms))
+        arrays  = {key: self._read_month(folder, key) if key in index else None
+                   for key, _, _ in months}
+        missing = []
+
+        # Months needing data, coalesced into contiguous spans so one
+        # download call (windowed and concurrent) covers a cold range
+        spans = []
+        for key, m_start, m_end in months:
+            covered = index.get(key)
+            need_to = min(m_end, end_ms)
+            if covered is not None and covered >= need_to:
+                continue
+            fetch_from = m_start if covered is None else covered + 1
+            if spans and spans[-1]["to"] + 1 == fetch_from:
+                spans[-1]["to"] = need_to
+                spans[-1]["keys"].append((key, fetch_from, need_to))
+            else:
+                spans.append({"from": fetch_from, "to": need_to,
+                              "keys": [(key, fetch_from, need_to)]})
+
+        for span in spans:
+            fresh = None
+            if not self.offline and download is not None:
+                fresh = self._download(download, span["from"], span["to"], step)
+            if fresh is None:
+                missing.extend(key for key, _, _ in span["keys"])
+                continue
+            for key, lo_ms, hi_ms in span["keys"]:
+                lo = np.searchsorted(fresh[0], lo_ms, side="left")
+                hi = np.searchsorted(fresh[0], hi_ms, side="right")
+                part = fresh[:, lo:hi]
+                arr  = part if arrays[key] is None else _merge(arrays[key], part)
+                self._write_month(folder, key, arr)
+                arrays[key] = arr
+                index[key]  = hi_ms
+            self._write_index(folder, index)
+
+        parts = []
+        for key, _, _ in months:
+            arr = arrays[key]
+            if arr is not None and arr.shape[1]:
+                lo = np.searchsorted(arr[0], start_ms, side="left")
+                hi = np.searchsorted(arr[0], end_ms, side="right")
+                parts.append(arr[:, lo:hi])
+
+        if missing:
+            mode = "offline" if self.offline else "download failed"
+            print(f"⚠️ Kline cache ({mode}): {symbol} {interval}m missing "
+                  f"{len(missing)} month(s): {', '.join(missing[:6])}{' …' if len(missing) > 6 else ''}")
+
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty((5, 0))
+        data = np.concatenate(parts, axis=1)
+        ts   = data[0].astype(np.int64)
+        gaps = int(np.count_nonzero(np.diff(ts) != step))
+        if gaps:
+            print(f"   ℹ️ {symbol} {interval}m: {gaps} gap(s) in cached history (exchange downtime)")
+        return ts, np.ascontiguousarray(data[1:6])
+
+    # -- internals ----------------------------------------------------------
+
+    def _download(self, download, start_ms, end_ms, step):
+        for attempt in range(2):
+            got = download(start_ms, end_ms)
+            if got is None:
+                return None
+            ts, cols = got
+            keep = (ts >= start_ms) & (ts <= end_ms)
+            ts, cols = ts[keep], cols[:, keep]
+            if len(ts) < 2 or np.all(np.diff(ts) == step):
+                break
+        return np.vstack([ts.astype(np.float64), cols])
+
+    def _read_index(self, folder):
+        try:
+            with open(os.path.join(folder, "index.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, folder, index):
+        path = os.path.join(folder, "index.json")
+        tmp  = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(sorted(index.items())), f, indent=0)
+        os.replace(tmp, path)
+
+    def _read_month(self, folder, key):
+        try:
+            return np.load(os.path.join(folder, f"{key}.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def _write_month(self, folder, key, arr):
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{key}.npy")
+        tmp  = path + ".tmp.npy"
+        np.save(tmp, np.ascontiguousarray(arr))
+        os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _months(start_ms: int, end_ms: int):
+    """Yield (YYYY-MM, month_start_ms, month_end_ms) covering [start_ms, end_ms]."""
+    d = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+    y, m = d.year, d.month
+    while True:
+        m_start = int(datetime(y, m, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        if m_start > end_ms:
+            return
+        ny, nm = (y + 1, 1) if m == 12 else (y, m + 1)
+        m_end = int(datetime(ny, nm, 1, tzinfo=timezone.utc).timestamp() * 1000) - 1
+        yield f"{y:04d}-{m:02d}", m_start, m_end
+        y, m = ny, nm
+
+
+def _merge(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Union of two (6, n) blocks, de-duplicated on ts (new rows win)."""
+    both = np.concatenate([np.asarray(old), new], axis=1)
+    # Reverse so np.unique's first occurrence is the newer row
+    _, idx = np.unique(both[0][::-1], return_index=True)
+    return both[:, ::-1][:, idx]
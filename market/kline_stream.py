@@ -0,0 +1,220 @@
+"""
+Kline Stream  (market/kline_stream.py)
+======================================
+Keeps 15m / 1h / 4h candles for the whole trading universe live in memory
+via Bybit's public v5 WebSocket, so the 5-minute scan no longer needs three
+blocking REST kline calls per symbol.
+
+  wss://stream.bybit.com/v5/public/linear   topic: kline.{interval}.{symbol}
+  wss://stream.bybit.com/v5/public/spot     (same topics, spot market)
+
+Lifecycle:
+  1. Bot calls seed() with the REST-filled CandleBuffer the first time it
+     needs a (symbol, interval) buffer.
+  2. Every pushed kline frame updates the still-forming bar in place or
+     appends a new bar, trimming the window back to its capacity.
+  3. get_candles() serves the buffer in the same dict format the bots
+     already build from REST.
+
+get_candles() returns None — and the caller falls back to REST — when:
+  - the socket is disconnected (any reconnect invalidates every buffer,
+    because bars may have closed while we were away)
+  - the buffer was never seeded
+  - a gap is detected (pushed bar starts more than one interval after
+    the last stored bar, or the last bar is older than the current one)
+  - no frame arrived for the buffer in STALE_AFTER_S seconds
+
+For local testing point the stream at market.ws_replay, which replays
+recorded kline frames:
+
+    python -m market.ws_replay frames.jsonl --port 8765
+    KlineStream("ws://127.0.0.1:8765", ["SOLUSDT"], ["15", "60", "240"])
+
+tests/test_kline_stream.py does this with tests/fixtures/kline_frames.jsonl,
+and against market.stub_server's WebSocket.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+
+from market.candles import CandleBuffer, interval_ms
+from market.endpoints import public_ws_url
+
+try:
+    import websocket          # websocket-client
+except ImportError:
+    websocket = None
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+LINEAR_WS_URL     = public_ws_url("linear")
+SPOT_WS_URL       = public_ws_url("spot")
+PING_INTERVAL_S   = 20        # Bybit drops idle connections after ~30 s
+RECONNECT_DELAY_S = 5
+STALE_AFTER_S     = 120       # no frame for this long → serve REST instead
+MAX_TOPICS_PER_OP = 10        # Bybit limit on args per subscribe request
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class KlineStream:
+    """
+    Background WebSocket client holding one candle buffer per
+    (symbol, interval).  Thread-safe: the socket thread writes, the bot's
+    scan loop reads.
+    """
+
+    def __init__(self, url: str, symbols: list, intervals: list):
+        self.url       = url
+        self.symbols   = list(symbols)
+        self.intervals = [str(i) for i in intervals]
+        self.connected = False
+
+        self._lock     = threading.Lock()
+        self._buffers  = {}          # (symbol, interval) → buffer dict
+        self._ws       = None
+        self._stop     = threading.Event()
+        self._thread   = None
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self) -> bool:
+        """Start the socket thread.  Returns False if websocket-client is missing."""
+        if websocket is None:
+            print("⚠️ websocket-client not installed — kline stream disabled, using REST")
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kline-stream", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    # -- buffer access --------------------------------------------------------
+
+    def seed(self, symbol: str, interval: str, candles: CandleBuffer):
+        """Install a copy of REST-fetched history for a buffer."""
+        with self._lock:
+            self._buffers[(symbol, str(interval))] = {
+                "candles":    candles.copy(),
+                "valid":      len(candles) > 0,
+                "updated_at": time.time(),
+            }
+
+    def get_candles(self, symbol: str, interval: str):
+        """
+        Return a copy of the buffer in CandleBuffer.view() format, or None
+        if it cannot be trusted right now.
+        """
+        interval = str(interval)
+        with self._lock:
+            buf = self._buffers.get((symbol, interval))
+            if not self.connected or buf is None or not buf["valid"]:
+                return None
+            if time.time() - buf["updated_at"] > STALE_AFTER_S:
+                return None
+            if time.time() * 1000 >= buf["candles"].last_ts + 2 * interval_ms(interval):
+                # Current bar never arrived — we missed at least one bar
+                buf["valid"] = False
+                return None
+            # Copy: the socket thread keeps writing into the live arrays
+            return buf["candles"].view(copy=True)
+
+    def invalidate(self, symbol: str = None, interval: str = None):
+        """Force the next get_candles() for matching buffers to fall back to REST."""
+        with self._lock:
+            for (sym, iv), buf in self._buffers.items():
+                if (symbol is None or sym == symbol) and (interval is None or iv == str(interval)):
+                    buf["valid"] = False
+
+    # -- socket thread ------------------------------------------------------
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            pinger = threading.Thread(target=self._heartbeat, args=(self._ws,), daemon=True)
+            pinger.start()
+            try:
+                self._ws.run_forever()
+            except Exception as e:
+                print(f"⚠️ Kline stream error: {e}")
+            self.connected = False
+            self.invalidate()
+            if not self._stop.is_set():
+                time.sleep(RECONNECT_DELAY_S)
+
+    def _heartbeat(self, ws):
+        # Bybit expects an application-level {"op":"ping"}, not a WS ping frame
+        while not self._stop.wait(PING_INTERVAL_S):
+            if ws is not self._ws:
+                return
+            try:
+                ws.send(json.dumps({"op": "ping"}))
+            except Exception:
+                return
+
+    def _on_open(self, ws):
+        topics = [f"kline.{iv}.{sym}" for sym in self.symbols for iv in self.intervals]
+        for i in range(0, len(topics), MAX_TOPICS_PER_OP):
+            ws.send(json.dumps({"op": "subscribe", "args": topics[i:i + MAX_TOPICS_PER_OP]}))
+        # Anything seeded before this connection may have missed bars
+        self.invalidate()
+        self.connected = True
+        print(f"📡 Kline stream connected ({len(topics)} topics)")
+
+    def _on_error(self, ws, error):
+        print(f"⚠️ Kline stream error: {error}")
+
+    def _on_close(self, ws, status_code=None, msg=None):
+        self.connected = False
+        self.invalidate()
+
+    def _on_message(self, ws, message):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        topic = msg.get("topic", "")
+        if not topic.startswith("kline."):
+            return
+        try:
+            _, interval, symbol = topic.split(".", 2)
+        except ValueError:
+            return
+        for k in msg.get("data", []):
+            self._apply(symbol, interval, k)
+
+    def _apply(self, symbol: str, interval: str, k: dict):
+        ts   = np.array([int(k["start"])], dtype=np.int64)
+        cols = np.array([[float(k["open"])], [float(k["high"])], [float(k["low"])],
+                         [float(k["close"])], [float(k["volume"])]])
+
+        with self._lock:
+            buf = self._buffers.get((symbol, interval))
+            if buf is None or not buf["valid"]:
+                return
+            if not buf["candles"].update(ts, cols, interval_ms(interval)):
+                buf["valid"] = False                # missed bars — reseed from REST
+                return
+            buf["updated_at"] = time.time()
@@ -0,0 +1,216 @@
+"""
+Rate Limiter  (market/ratelimit.py)
+===================================
+Process-wide token buckets shared by every thread that talks to Bybit —
+pybit's signed session, the shared http_client and the backtest
+downloaders — so calls pace themselves against one budget instead of
+each sleeping a fixed amount.
+
+Buckets:
+  market    /v5/market/*   one bucket for the group (Bybit limits public
+                           endpoints per IP, not per endpoint: 600 req /
+                           5 s; public responses carry no limit headers,
+                           so BYBIT_MARKET_RPS is the rate used)
+  order     /v5/order/*    one bucket per endpoint path (private limits
+  position  /v5/position/* are per endpoint per UID); the group only
+  account   /v5/account/*  supplies the starting rate
+
+Adaptation from Bybit response headers:
+  X-Bapi-Limit                  → bucket rate becomes the advertised limit
+  X-Bapi-Limit-Status           → available tokens clamped to what's left
+  X-Bapi-Limit-Reset-Timestamp  → when nothing is left, the bucket blocks
+                                  until the window resets
+A retCode 10006 (rate limited) response blocks the bucket until reset.
+GET / HEAD requests are then sent again, so callers never see it; other
+methods (signed POSTs such as order placement) are returned as-is — a
+resent request would carry a stale timestamp and signature, and pybit
+re-signs its own retries.
+
+Wiring:
+  install(requests_session)     mount the limiting adapter on a session
+                                (done for http_client; futures.py and
+                                spot.py call it on pybit's session.client)
+  bucket(group_or_path)         manual acquire for non-requests callers
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+from market.endpoints import base_host
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+BYBIT_HOSTS = ("api.bybit.com", "api.bytick.com", "api-testnet.bybit.com", "api-demo.bybit.com")
+
+# Public market data: Bybit allows 600 requests / 5 s per IP (120/s); keep a margin
+MARKET_RPS = float(os.getenv("BYBIT_MARKET_RPS", "100"))
+
+# group → (requests per second, burst) until headers say otherwise
+DEFAULT_LIMITS = {
+    "market":   (MARKET_RPS, max(1, int(MARKET_RPS))),
+    "order":    (10.0, 10),
+    "position": (10.0, 10),
+    "account":  (10.0, 10),
+    "default":  (10.0, 10),
+}
+MAX_BLOCK_S       = 5.0      # never trust a reset timestamp further out than this
+RATE_LIMIT_CODE   = 10006
+RATE_LIMIT_RETRIES = 2
+RESENDABLE_METHODS = ("GET", "HEAD")
+
+_buckets = {}
+_registry_lock = threading.Lock()
+_limited_hosts = set(BYBIT_HOSTS) | {base_host()}      # BYBIT_BASE_URL may be a stand-in
+
+
+class TokenBucket:
+    """Token bucket (`rate` tokens/s, at most `burst`) that can also block until a reset time."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate           = float(rate)
+        self.burst          = float(burst)
+        self._tokens        = float(burst)
+        self._stamp         = time.monotonic()
+        self._blocked_until = 0.0              # wall-clock seconds
+        self._lock          = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                blocked = self._blocked_until - time.time()
+                if blocked <= 0:
+                    self._refill()
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+                else:
+                    wait = blocked
+            time.sleep(wait)
+
+    def observe(self, headers):
+        """Adapt to Bybit's X-Bapi-Limit* response headers (no-op if absent)."""
+        limit  = headers.get("X-Bapi-Limit")
+        status = headers.get("X-Bapi-Limit-Status")
+        reset  = headers.get("X-Bapi-Limit-Reset-Timestamp")
+        if limit is None and status is None:
+            return
+        with self._lock:
+            self._refill()
+            try:
+                if limit is not None and float(limit) > 0:
+                    self.rate  = float(limit)
+                    self.burst = float(limit)
+                if status is not None:
+                    remaining = float(status)
+                    self._tokens = min(self._tokens, remaining)
+                    if remaining <= 0 and reset is not None:
+                        self._block_until(float(reset) / 1000)
+            except ValueError:
+                pass
+
+    def block(self, reset_ms=None):
+        """Stop handing out tokens until `reset_ms` (or one second from now)."""
+        with self._lock:
+            self._tokens = 0.0
+            try:
+                until = float(reset_ms) / 1000 if reset_ms else time.time() + 1.0
+            except ValueError:
+                until = time.time() + 1.0
+            self._block_until(until)
+
+    def _block_until(self, until):
+        until = min(until, time.time() + MAX_BLOCK_S)
+        self._blocked_until = max(self._blocked_until, until)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp  = now
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token before every Bybit request and learns from the response."""
+
+    def send(self, request, **kwargs):
+        parsed = urlparse(request.url)
+        if parsed.hostname not in _limited_hosts:
+            return super().send(request, **kwargs)
+
+        limiter = bucket(parsed.path)
+        retries = RATE_LIMIT_RETRIES if request.method in RESENDABLE_METHODS else 0
+        for attempt in range(retries + 1):
+            limiter.acquire()
+            response = super().send(request, **kwargs)
+            limiter.observe(response.headers)
+            if not _is_rate_limited(response):
+                return response
+            limiter.block(response.headers.get("X-Bapi-Limit-Reset-Timestamp"))
+            if attempt == retries:
+                return response
+            response.close()
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def group_of(path: str) -> str:
+    """Endpoint group for a URL path, e.g. '/v5/order/create' → 'order'."""
+    parts = path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "v5" and parts[1] in DEFAULT_LIMITS:
+        return parts[1]
+    return "default"
+
+
+def bucket(path_or_group: str) -> TokenBucket:
+    """
+    Shared bucket for a request path ('/v5/market/kline') or a group name
+    ('market').  Public market paths share the group bucket; private paths
+    get their own.
+    """
+    if path_or_group in DEFAULT_LIMITS:
+        group = key = path_or_group
+    else:
+        group = group_of(path_or_group)
+        key   = group if group in ("market", "default") else path_or_group
+    with _registry_lock:
+        if key not in _buckets:
+            rate, burst = DEFAULT_LIMITS[group]
+            _buckets[key] = TokenBucket(rate, burst)
+        return _buckets[key]
+
+
+def install(session, hosts=None, adapter: HTTPAdapter = None):
+    """
+    Mount a RateLimitedAdapter on a requests.Session (e.g. pybit's
+    session.client).  `hosts` adds hostnames to limit besides Bybit's,
+    such as a local stand-in server.
+    """
+    if hosts:
+        _limited_hosts.update(hosts)
+    adapter = adapter or RateLimitedAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _is_rate_limited(response) -> bool:
+    # HTTP 429 is already retried by urllib3 inside the adapter.  Bybit
+    # answers 200 with {"retCode":10006,...}
+    try:
+        return response.json().get("retCode") == RATE_LIMIT_CODE
+    except Exception:
+        return False
@@ -0,0 +1,261 @@
+"""
+RSS Feeds  (market/rss.py)
+==========================
+Shared, conditional fetching of the Google News RSS feeds read by the news
+factor and the forex bots.  Every symbol's news score includes the same
+macro feed (BTC for crypto, USD for forex); this module keeps one parsed
+copy per feed URL so a scan downloads and parses it once, not once per
+symbol.
+
+  fetch_feed(url, max_age=..., since=...)  — Feed(entries, bozo)
+  google_news_url(query)                   — Google News RSS search URL
+
+Fetching:
+  - Requests go through market.http_client (pooled keep-alive sockets,
+    bounded RSS_TIMEOUT_S, retries) rather than feedparser's own urllib.
+  - A feed younger than max_age (default FEED_MAX_AGE_S, one scan cycle)
+    is served from memory without a request.
+  - Older feeds are revalidated with a conditional GET (If-None-Match /
+    If-Modified-Since from the last response); an unchanged feed costs a
+    304 with no body and no re-parse.
+  - Concurrent callers of one URL share a single in-flight request.
+  - Fetch failures raise; callers already fall back to a neutral score.
+
+Parsing:
+  - A streaming xml.etree iterparse reader keeps only what the scorers
+    use — title, link, guid and pubDate (as epoch seconds) — as plain
+    dicts, clearing each <item> once read.
+  - With since=epoch, items published before it are dropped and parsing
+    stops after STOP_AFTER_OLD consecutive such items (Google News orders
+    by relevance, not date, so one old item does not end the feed).
+  - Malformed XML sets bozo and keeps the items read before the error.
+
+`python -m market.rss [fixture.xml ...]` benchmarks this reader against
+feedparser on saved feeds (default rss_fixtures/*.xml) and checks that
+title, link, guid and pubDate agree for every item; `--save DIR` stores
+the live feeds as fixtures.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_tz, mktime_tz
+from urllib.parse import quote_plus
+
+from market import http_client
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+GOOGLE_NEWS_RSS = "https://news.google.com/rss/search"
+FEED_MAX_AGE_S  = 300          # one 5-minute scan reads a single copy
+RSS_TIMEOUT_S   = 10
+MAX_FEEDS       = 64           # distinct URLs kept (macro + one per symbol)
+STOP_AFTER_OLD  = 10           # consecutive pre-`since` items that end a parse
+
+_feeds = {}
+_registry_lock = threading.Lock()
+_counts = {"requests": 0, "not_modified": 0, "memory": 0}
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class Feed:
+    """Parsed feed: entries are dicts with title, link, id, published (epoch or None)."""
+
+    __slots__ = ("entries", "bozo")
+
+    def __init__(self, entries: list, bozo: bool = False):
+        self.entries = entries
+        self.bozo    = bozo
+
+
+def fetch_feed(url: str, max_age: float = None, since: float = None) -> Feed:
+    """Return the parsed feed at `url`, revalidating it if older than max_age."""
+    max_age = FEED_MAX_AGE_S if max_age is None else max_age
+    feed = _feed(url)
+    with feed["lock"]:
+        if feed["parsed"] is not None and time.time() - feed["fetched_at"] <= max_age:
+            _counts["memory"] += 1
+            return feed["parsed"]
+        return _revalidate(url, feed, since)
+
+
+def parse_feed(source, since: float = None) -> Feed:
+    """Stream RSS `source` (bytes or file object) into a Feed."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    entries, old_run, bozo = [], 0, False
+    try:
+        for _, elem in ET.iterparse(source, events=("end",)):
+            if elem.tag != "item":
+                continue
+            published = _epoch(elem.findtext("pubDate"))
+            if since is not None and published is not None and published < since:
+                old_run += 1
+                elem.clear()
+                if old_run >= STOP_AFTER_OLD:
+                    break
+                continue
+            old_run = 0
+            entries.append({
+                "title":     (elem.findtext("title") or "").strip(),
+                "link":      (elem.findtext("link") or "").strip(),
+                "id":        (elem.findtext("guid") or "").strip(),
+                "published": published,
+            })
+            elem.clear()
+    except ET.ParseError:
+        bozo = True
+    return Feed(entries, bozo)
+
+
+def google_news_url(query: str) -> str:
+    return f"{GOOGLE_NEWS_RSS}?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
+
+
+def stats() -> dict:
+    """{"requests", "not_modified", "memory"} since start-up."""
+    return dict(_counts)
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _feed(url: str) -> dict:
+    with _registry_lock:
+        feed = _feeds.pop(url, None)
+        if feed is None:
+            feed = {"parsed": None, "etag": None, "modified": None,
+                    "fetched_at": 0.0, "lock": threading.Lock()}
+        _feeds[url] = feed                       # re-insert: most recently used last
+        while len(_feeds) > MAX_FEEDS:
+            _feeds.pop(next(iter(_feeds)))
+        return feed
+
+
+def _revalidate(url: str, feed: dict, since: float):
+    headers = {}
+    if feed["parsed"] is not None:
+        if feed["etag"]:
+            headers["If-None-Match"] = feed["etag"]
+        if feed["modified"]:
+            headers["If-Modified-Since"] = feed["modified"]
+
+    resp = http_client.get(url, headers=headers, timeout=RSS_TIMEOUT_S)
+    _counts["requests"] += 1
+    if resp.status_code == 304 and feed["parsed"] is not None:
+        _counts["not_modified"] += 1
+        feed["fetched_at"] = time.time()
+        return feed["parsed"]
+    resp.raise_for_status()
+
+    # Body read in full (not streamed off the socket) so the connection
+    # goes back to the pool even when parsing stops early
+    feed["parsed"]     = parse_feed(resp.content, since)
+    feed["etag"]       = resp.headers.get("ETag")
+    feed["modified"]   = resp.headers.get("Last-Modified")
+    feed["fetched_at"] = time.time()
+    return feed["parsed"]
+
+
+def _epoch(text: str):
+    """RFC 822 pubDate → epoch seconds (UTC), or None if absent / unparseable."""
+    if not text:
+        return None
+    parsed = parsedate_tz(text)
+    return float(mktime_tz(parsed)) if parsed else None
+
+
+# ---------------------------------------------------------------------------
+# Benchmark — python -m market.rss [fixture.xml ...] | --save DIR
+# ---------------------------------------------------------------------------
+
+def _save_fixtures(folder: str):
+    from factors.news import MACRO_QUERY, SYMBOL_TO_QUERY
+    os.makedirs(folder, exist_ok=True)
+    for name, query in {"MACRO": MACRO_QUERY, **SYMBOL_TO_QUERY}.items():
+        body = http_client.get(google_news_url(query), timeout=RSS_TIMEOUT_S).content
+        with open(os.path.join(folder, f"{name}.xml"), "wb") as f:
+            f.write(body)
+        print(f"💾 {name}.xml  {len(body) / 1024:.0f} KiB")
+
+
+def _synthetic_feed(items: int = 100) -> bytes:
+    now = time.time()
+    rows = "".join(
+        f"<item><title>Bitcoin ETF approval rally {i} - Publisher {i % 7}</title>"
+        f"<link>https://news.google.com/rss/articles/CBMi{i:06d}?oc=5</link>"
+        f'<guid isPermaLink="false">CBMi{i:06d}</guid>'
+        f"<pubDate>{time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(now - i * 900))}</pubDate>"
+        f'<description>&lt;a href="https://example.com/{i}"&gt;Headline {i}&lt;/a&gt;</description>'
+        f'<source url="https://example.com">Publisher {i % 7}</source></item>'
+        for i in range(items))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Bitcoin - Google News</title>{rows}</channel></rss>").encode()
+
+
+def _feedparser_mismatches(body: bytes) -> list:
+    """[(index, field, ours, feedparser's)] wherever parse_feed and feedparser disagree."""
+    import calendar
+    import feedparser
+
+    ours, theirs = parse_feed(body).entries, feedparser.parse(body).entries
+    if len(ours) != len(theirs):
+        return [(None, "count", len(ours), len(theirs))]
+    mismatches = []
+    for i, (a, b) in enumerate(zip(ours, theirs)):
+        parsed = b.get("published_parsed")
+        expected = {"title": b.get("title", "").strip(), "link": b.get("link", "").strip(),
+                    "id": b.get("id", "").strip(),
+                    "published": float(calendar.timegm(parsed)) if parsed else None}
+        mismatches += [(i, field, a[field], value) for field, value in expected.items()
+                       if a[field] != value]
+    return mismatches
+
+
+def _fixture_paths(folder: str = "rss_fixtures") -> list:
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".xml"))
+
+
+def _benchmark(paths: list, rounds: int = 50):
+    import feedparser
+
+    paths = paths or _fixture_paths()
+    fixtures = [(os.path.basename(p), open(p, "rb").read()) for p in paths] \
+        or [("synthetic-100.xml", _synthetic_feed())]
+    since = time.time() - 6 * 3600
+    for name, body in fixtures:
+        timings = {}
+        for label, fn in (("feedparser", lambda: feedparser.parse(body)),
+                          ("iterparse", lambda: parse_feed(body)),
+                          ("iterparse 6h", lambda: parse_feed(body, since))):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                result = fn()
+            timings[label] = ((time.perf_counter() - start) / rounds * 1000, len(result.entries))
+        base = timings["feedparser"][0]
+        mismatches = _feedparser_mismatches(body)
+        print(f"📰 {name}  ({len(body) / 1024:.0f} KiB)  "
+              f"{'✅ fields match feedparser' if not mismatches else f'❌ {len(mismatches)} field mismatches'}")
+        for mismatch in mismatches[:5]:
+            print(f"   {mismatch}")
+        for label, (ms, n) in timings.items():
+            print(f"   {label:<13} {ms:8.2f} ms  {n:4d} items  ×{base / ms:5.1f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--save"]:
+        _save_fixtures(args[1] if len(args) > 1 else "rss_fixtures")
+    else:
+        _benchmark(args)
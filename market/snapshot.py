@@ -0,0 +1,155 @@
+"""
+Market Snapshot  (market/snapshot.py)
+=====================================
+One /v5/market/tickers call (no `symbol` param) returns every ticker in a
+category.  This module keeps that response as a per-cycle snapshot so the
+derivatives factor, BTC context, volatility and the fast loop read
+lastPrice / fundingRate / price24hPcnt / openInterest / turnover / bid-ask
+from memory instead of each calling /tickers for a single symbol.
+
+  refresh(category)                  — fetch all tickers now (start of a scan)
+  get_ticker(symbol, category, ...)  — normalised ticker dict or None
+
+Freshness:
+  - Entries older than max_age (default SNAPSHOT_MAX_AGE_S) are refetched.
+  - bulk=True  refetches the whole category in one call (scan path).
+  - bulk=False refetches just that symbol and merges it in (fast loop:
+    keeps the 10 s price check at one small request).
+  - Concurrent callers share one in-flight refresh.
+"""
+
+import threading
+import time
+
+from market import http_client
+from market.endpoints import MARKET_URL
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+TICKERS_URL        = f"{MARKET_URL}/tickers"
+SNAPSHOT_MAX_AGE_S = 60        # one 5-minute scan reads a single snapshot
+
+_snapshots = {}
+_registry_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def get_ticker(symbol: str, category: str = "linear", max_age: float = None,
+               bulk: bool = True):
+    """
+    Return the normalised ticker for `symbol`, refreshing if stale:
+
+        last_price, mark_price, bid1_price, ask1_price, prev_price_1h,
+        prev_price_24h, price_24h_pcnt, funding_rate, open_interest,
+        open_interest_value, turnover_24h, volume_24h, fetched_at
+
+    Fields the category does not report (e.g. funding on spot) are None.
+    Returns None if the ticker could not be fetched.
+    """
+    return _snapshot(category).get(symbol, max_age, bulk)
+
+
+def refresh(category: str = "linear") -> bool:
+    """Fetch every ticker in `category` now.  Returns False on failure."""
+    return _snapshot(category).refresh()
+
+
+class MarketSnapshot:
+    """All tickers of one category, refreshed on demand."""
+
+    def __init__(self, category: str):
+        self.category    = category
+        self._tickers    = {}
+        self._fetched_at = 0.0          # last successful bulk refresh
+        self._lock       = threading.Lock()
+
+    def get(self, symbol: str, max_age: float = None, bulk: bool = True):
+        max_age = SNAPSHOT_MAX_AGE_S if max_age is None else max_age
+        ticker = self._fresh(symbol, max_age)
+        if ticker is not None:
+            return ticker
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            ticker = self._fresh(symbol, max_age)
+            if ticker is not None:
+                return ticker
+            if not self._fetch(None if bulk else symbol):
+                return None
+            return self._tickers.get(symbol)
+
+    def refresh(self) -> bool:
+        with self._lock:
+            return self._fetch(None)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self._fetched_at
+
+    def _fresh(self, symbol, max_age):
+        ticker = self._tickers.get(symbol)
+        if ticker is not None and time.time() - ticker["fetched_at"] <= max_age:
+            return ticker
+        return None
+
+    def _fetch(self, symbol) -> bool:
+        params = {"category": self.category}
+        if symbol:
+            params["symbol"] = symbol
+        try:
+            d = http_client.get(TICKERS_URL, params=params, timeout=8).json()
+        except Exception as e:
+            print(f"⚠️ Ticker snapshot fetch failed ({self.category}): {e}")
+            return False
+        if d.get("retCode") != 0:
+            print(f"⚠️ Ticker snapshot error ({self.category}): {d.get('retMsg')}")
+            return False
+
+        now = time.time()
+        tickers = {t["symbol"]: _normalise(t, now) for t in d["result"]["list"]}
+        self._tickers = {**self._tickers, **tickers}
+        if symbol is None:
+            self._fetched_at = now
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _snapshot(category: str) -> MarketSnapshot:
+    with _registry_lock:
+        if category not in _snapshots:
+            _snapshots[category] = MarketSnapshot(category)
+        return _snapshots[category]
+
+
+def _float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalise(t: dict, fetched_at: float) -> dict:
+    return {
+        "symbol":              t.get("symbol"),
+        "last_price":          _float(t.get("lastPrice")),
+        "mark_price":          _float(t.get("markPrice")),
+        "bid1_price":          _float(t.get("bid1Price")),
+        "ask1_price":          _float(t.get("ask1Price")),
+        "prev_price_1h":       _float(t.get("prevPrice1h")),
+        "prev_price_24h":      _float(t.get("prevPrice24h")),
+        "price_24h_pcnt":      _float(t.get("price24hPcnt")),
+        "funding_rate":        _float(t.get("fundingRate")),
+        "open_interest":       _float(t.get("openInterest")),
+        "open_interest_value": _float(t.get("openInterestValue")),
+        "turnover_24h":        _float(t.get("turnover24h")),
+        "volume_24h":          _float(t.get("volume24h")),
+        "fetched_at":          fetched_at,
+    }
@@ -0,0 +1,831 @@
+"""
+Bybit Stand-in Server  (market/stub_server.py)
+==============================================
+Local, offline replacement for the slice of Bybit v5 the bots use, so
+FuturesTradingBot.run_bot, SpotTradingBot.run_cycle and HybridTradingBot
+can run end to end — cycle-latency benchmarks, scaling tests — without
+the exchange.  Standard library + NumPy only.
+
+REST  (http://host:port)
+  GET  /v5/market/kline             minute multiples of the base interval, or D
+  GET  /v5/market/tickers           whole category, or one symbol
+  GET  /v5/market/funding/history
+  GET  /v5/market/open-interest
+  GET  /v5/market/account-ratio
+  GET  /v5/account/wallet-balance
+  GET  /v5/position/list
+  GET  /v5/position/closed-pnl
+  POST /v5/order/create             Market orders fill at once at the replay price
+  POST /v5/position/set-leverage
+  POST /v5/position/trading-stop
+WebSocket  (ws://host:ws_port/v5/public/{linear,spot})
+  kline.{interval}.{symbol} pushes built from the same replay clock
+
+Market data:
+  - synthetic (default): seeded random walk per symbol, created on first
+    request, so any symbol works
+  - recorded: --data DIR reads base-interval bars from a KlineCache
+    directory (what backtest_futures.py downloads); symbols not found
+    there fall back to synthetic
+  A replay clock maps wall time to market time at --speed×: at --speed 60
+  a 15m bar passes in 15 s.  The bar in progress is interpolated from its
+  open towards its close, so nothing ahead of the clock is ever served.
+
+Exchange:
+  One-way linear positions (SL/TP trigger on the replayed bar ranges,
+  realised PnL lands in closed-pnl), taker fee on every fill, spot coin
+  balances.  Signatures are not checked — any API_KEY/API_SECRET works.
+  Error codes mirror Bybit's for the cases the bots handle (110043
+  leverage not modified, 34040 not modified, 110017 reduce-only, ...).
+
+Latency: --latency S plus uniform --jitter S is added to every REST reply.
+
+Run it and point a bot at it (see market/endpoints.py):
+    python -m market.stub_server --port 8700 --speed 60 --latency 0.05
+    BYBIT_BASE_URL=http://127.0.0.1:8700 BYBIT_WS_URL=ws://127.0.0.1:8701 \\
+        API_KEY=stub API_SECRET=stub python futures.py
+
+KlineStream drops to REST when the newest streamed bar lags the wall
+clock, which replaying past data at --speed 1 does; synthetic data starts
+the clock at the current time.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from market.candles import interval_ms
+from market.kline_cache import KlineCache
+from market.ws_replay import KlineReplayServer, _send_frame
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+
+BASE_INTERVAL   = "15"           # finest kline interval served
+HISTORY_DAYS    = 120            # synthetic history before the clock start
+FUTURE_DAYS     = 30             # synthetic bars ahead of it; the market freezes after
+BAR_SIGMA       = 0.004          # log-return stdev per 15m bar
+TAKER_FEE       = 0.00055
+START_BALANCE   = 10_000.0       # USDT
+PUSH_INTERVAL_S = 1.0            # wall seconds between WebSocket kline pushes
+FUNDING_STEP_MS = 8 * 3600 * 1000
+DAY_MS          = 24 * 3600 * 1000
+
+DEFAULT_SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "AVAXUSDT", "LINKUSDT", "BNBUSDT")
+START_PRICES    = {"BTCUSDT": 65000.0, "ETHUSDT": 3200.0, "SOLUSDT": 150.0,
+                   "AVAXUSDT": 30.0, "LINKUSDT": 15.0, "BNBUSDT": 580.0}
+
+PERIOD_MINUTES  = {"5min": 5, "15min": 15, "30min": 30, "1h": 60, "2h": 120,
+                   "4h": 240, "1d": 1440}
+
+
+class StubError(Exception):
+    """An API-level rejection, returned as {"retCode": code, "retMsg": msg}."""
+
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+        self.msg  = msg
+
+
+# ---------------------------------------------------------------------------
+# Market data
+# ---------------------------------------------------------------------------
+
+class ReplayClock:
+    """Market time = start_ms + wall seconds since creation × speed."""
+
+    def __init__(self, start_ms: int = None, speed: float = 1.0):
+        self.start_ms = int(time.time() * 1000) if start_ms is None else int(start_ms)
+        self.speed    = float(speed)
+        self._wall0   = time.time()
+
+    def now_ms(self) -> int:
+        return self.start_ms + int((time.time() - self._wall0) * 1000 * self.speed)
+
+
+class Series:
+    """Base-interval bars of one symbol: ts int64 and cols (5, n) open/high/low/close/volume."""
+
+    def __init__(self, ts: np.ndarray, cols: np.ndarray, step_ms: int):
+        self.ts     = ts
+        self.cols   = cols
+        self.step   = step_ms
+        self.cumvol = np.cumsum(cols[4])
+
+    def bars(self, start_ms: int, end_ms: int, now_ms: int):
+        """Bars starting in [start_ms, min(end_ms, now_ms)]; the one in progress is partial."""
+        lo = np.searchsorted(self.ts, start_ms, side="left")
+        hi = np.searchsorted(self.ts, min(end_ms, now_ms), side="right")
+        ts, cols = self.ts[lo:hi], self.cols[:, lo:hi]
+        if hi > lo and ts[-1] + self.step > now_ms:
+            cols = cols.copy()
+            cols[:, -1] = self._partial(hi - 1, now_ms)
+        return ts, cols
+
+    def price(self, ms: int) -> float:
+        """Traded price at `ms`."""
+        i = int(np.searchsorted(self.ts, ms, side="right")) - 1
+        if i < 0:
+            return float(self.cols[0, 0])
+        return float(self._partial(i, ms)[3])
+
+    def volume_since(self, ms: int, until_ms: int) -> float:
+        i = int(np.searchsorted(self.ts, until_ms, side="right")) - 1
+        j = int(np.searchsorted(self.ts, ms, side="right")) - 1
+        if i < 0:
+            return 0.0
+        return float(self.cumvol[i] - (self.cumvol[j] if j >= 0 else 0.0))
+
+    def _partial(self, i: int, now_ms: int) -> np.ndarray:
+        o, h, l, c, v = self.cols[:, i]
+        f = min(max((now_ms - self.ts[i]) / self.step, 0.0), 1.0)
+        if f >= 1.0:
+            return self.cols[:, i]
+        close = o + (c - o) * f
+        return np.array([o, max(o, close, o + (h - o) * f), min(o, close, o + (l - o) * f),
+                         close, v * f])
+
+
+class StubMarket:
+    """Kline, ticker and derivatives data for every (category, symbol) on one clock."""
+
+    def __init__(self, clock: ReplayClock, base_interval: str = BASE_INTERVAL,
+                 data_dir: str = None, symbols=DEFAULT_SYMBOLS, seed: int = 0):
+        self.clock         = clock
+        self.base_interval = str(base_interval)
+        self.step          = interval_ms(self.base_interval)
+        self.data_dir      = data_dir
+        self.seed          = seed
+        self._series       = {}
+        self._lock         = threading.Lock()
+        for symbol in symbols:
+            for category in ("linear", "spot"):
+                self.series(category, symbol)
+
+    def series(self, category: str, symbol: str) -> Series:
+        key = (category, symbol)
+        with self._lock:
+            if key not in self._series:
+                got = _recorded(self.data_dir, category, symbol, self.base_interval) if self.data_dir else None
+                if got is None:
+                    got = _synthetic(symbol, self.clock.start_ms, self.step, self.seed)
+                self._series[key] = Series(*got, self.step)
+            return self._series[key]
+
+    def symbols(self, category: str) -> list:
+        with self._lock:
+            return sorted(sym for cat, sym in self._series if cat == category)
+
+    def price(self, category: str, symbol: str) -> float:
+        return self.series(category, symbol).price(self.clock.now_ms())
+
+    def klines(self, category: str, symbol: str, interval: str, start: int = None,
+               end: int = None, limit: int = 200):
+        """Newest-first [start, open, high, low, close, volume, turnover] rows, as Bybit sends them."""
+        interval = str(interval)
+        step = interval_ms(interval)
+        if step % self.step:
+            raise StubError(10001, f"interval {interval} is finer than the stand-in base "
+                                   f"interval {self.base_interval}")
+        now   = self.clock.now_ms()
+        end   = now if end is None else min(int(end), now)
+        first = end - end % step - (limit - 1) * step if start is None else int(start)
+        ts, cols = self.series(category, symbol).bars(first - first % step, end - end % step + step - 1, now)
+        if not len(ts):
+            return []
+        starts, idx = np.unique(ts - ts % step, return_index=True)
+        last = np.r_[idx[1:] - 1, len(ts) - 1]
+        agg = np.vstack([cols[0, idx], np.maximum.reduceat(cols[1], idx),
+                         np.minimum.reduceat(cols[2], idx), cols[3, last],
+                         np.add.reduceat(cols[4], idx)])
+        keep = (starts >= first) & (starts <= end)
+        starts, agg = starts[keep][-limit:], agg[:, keep][:, -limit:]
+        return [[str(int(t)), *(_fmt(x) for x in agg[:, k]), _fmt(agg[4, k] * agg[3, k])]
+                for k, t in reversed(list(enumerate(starts)))]
+
+    def ticker(self, category: str, symbol: str) -> dict:
+        s    = self.series(category, symbol)
+        now  = self.clock.now_ms()
+        last = s.price(now)
+        p1h  = s.price(now - 3600 * 1000)
+        p24h = s.price(now - DAY_MS)
+        _, day = s.bars(now - DAY_MS, now, now)
+        vol  = s.volume_since(now - DAY_MS, now)
+        t = {
+            "symbol":       symbol,
+            "lastPrice":    _fmt(last),
+            "bid1Price":    _fmt(last * (1 - 0.0001)),
+            "bid1Size":     "10",
+            "ask1Price":    _fmt(last * (1 + 0.0001)),
+            "ask1Size":     "10",
+            "prevPrice1h":  _fmt(p1h),
+            "prevPrice24h": _fmt(p24h),
+            "price24hPcnt": f"{last / p24h - 1:.4f}",
+            "highPrice24h": _fmt(day[1].max() if day.shape[1] else last),
+            "lowPrice24h":  _fmt(day[2].min() if day.shape[1] else last),
+            "volume24h":    _fmt(vol),
+            "turnover24h":  _fmt(vol * last),
+        }
+        if category == "linear":
+            oi = self._open_interest(s, now)
+            t.update({
+                "markPrice":         _fmt(last),
+                "indexPrice":        _fmt(last),
+                "fundingRate":       f"{self._funding_rate(s, now):.6f}",
+                "nextFundingTime":   str(now - now % FUNDING_STEP_MS + FUNDING_STEP_MS),
+                "openInterest":      _fmt(oi),
+                "openInterestValue": _fmt(oi * last),
+            })
+        return t
+
+    def funding_history(self, symbol: str, start: int = None, end: int = None, limit: int = 200):
+        s   = self.series("linear", symbol)
+        end = self.clock.now_ms() if end is None else min(int(end), self.clock.now_ms())
+        t   = end - end % FUNDING_STEP_MS
+        out = []
+        while len(out) < limit and (start is None or t >= int(start)) and t >= s.ts[0]:
+            out.append({"symbol": symbol, "fundingRate": f"{self._funding_rate(s, t):.6f}",
+                        "fundingRateTimestamp": str(t)})
+            t -= FUNDING_STEP_MS
+        return out
+
+    def open_interest(self, symbol: str, period: str, start: int = None, end: int = None,
+                      limit: int = 50):
+        s, t, step = self._periods(symbol, period, end)
+        out = []
+        while len(out) < limit and (start is None or t >= int(start)) and t >= s.ts[0]:
+            out.append({"openInterest": _fmt(self._open_interest(s, t)), "timestamp": str(t)})
+            t -= step
+        return out
+
+    def account_ratio(self, symbol: str, period: str, limit: int = 50):
+        s, t, step = self._periods(symbol, period, None)
+        out = []
+        while len(out) < limit and t >= s.ts[0]:
+            # Retail leans into the recent move: a contrarian signal, as on Bybit
+            move = s.price(t) / s.price(t - step) - 1
+            buy  = min(max(0.5 + 5 * move, 0.2), 0.8)
+            out.append({"symbol": symbol, "buyRatio": f"{buy:.4f}", "sellRatio": f"{1 - buy:.4f}",
+                        "timestamp": str(t)})
+            t -= step
+        return out
+
+    def _periods(self, symbol, period, end):
+        if period not in PERIOD_MINUTES:
+            raise StubError(10001, f"params error: period {period} invalid")
+        step = PERIOD_MINUTES[period] * 60_000
+        end  = self.clock.now_ms() if end is None else min(int(end), self.clock.now_ms())
+        return self.series("linear", symbol), end - end % step, step
+
+    def _funding_rate(self, s: Series, ms: int) -> float:
+        # Longs pay more after a rally: rate follows the last 8h move
+        move = s.price(ms) / s.price(ms - FUNDING_STEP_MS) - 1
+        return min(max(0.0001 + 0.01 * move, -0.00375), 0.00375)
+
+    def _open_interest(self, s: Series, ms: int) -> float:
+        return 0.5 * s.volume_since(ms - DAY_MS, ms)
+
+
+# ---------------------------------------------------------------------------
+# Exchange (account, positions, orders)
+# ---------------------------------------------------------------------------
+
+class StubExchange:
+    """Single-account paper exchange filling against StubMarket prices."""
+
+    def __init__(self, market: StubMarket, balance: float = START_BALANCE, fee: float = TAKER_FEE):
+        self.market     = market
+        self.fee        = fee
+        self.coins      = {"USDT": float(balance)}
+        self.positions  = {}            # symbol → {"side", "size", "avg", "sl", "tp", "created"}
+        self.leverage   = {}
+        self.closed_pnl = []
+        self._checked   = market.clock.now_ms()
+        self._lock      = threading.RLock()
+
+    # -- requests -----------------------------------------------------------
+
+    def wallet_balance(self, params):
+        with self._lock:
+            self._settle()
+            upnl   = sum(self._upnl(sym, p) for sym, p in self.positions.items())
+            margin = sum(p["size"] * p["avg"] / self.leverage.get(sym, 10.0)
+                         for sym, p in self.positions.items())
+            usdt   = self.coins["USDT"]
+            coins  = [{"coin": "USDT", "walletBalance": _fmt(usdt), "equity": _fmt(usdt + upnl),
+                       "availableToWithdraw": _fmt(max(usdt - margin, 0.0)),
+                       "unrealisedPnl": _fmt(upnl), "usdValue": _fmt(usdt + upnl)}]
+            equity = usdt + upnl
+            for coin, qty in self.coins.items():
+                if coin == "USDT" or qty <= 0:
+                    continue
+                value = qty * self.market.price("spot", f"{coin}USDT")
+                equity += value
+                coins.append({"coin": coin, "walletBalance": _fmt(qty), "equity": _fmt(qty),
+                              "availableToWithdraw": _fmt(qty), "unrealisedPnl": "0",
+                              "usdValue": _fmt(value)})
+            return {"list": [{"accountType": params.get("accountType", "UNIFIED"),
+                              "totalEquity": _fmt(equity), "totalWalletBalance": _fmt(equity),
+                              "totalAvailableBalance": _fmt(max(usdt - margin, 0.0)),
+                              "coin": coins}]}
+
+    def position_list(self, params):
+        with self._lock:
+            self._settle()
+            symbol = params.get("symbol")
+            if symbol:
+                rows = [self._position_row(symbol, self.positions.get(symbol))]
+            else:
+                rows = [self._position_row(sym, p) for sym, p in self.positions.items()]
+            return {"category": "linear", "list": rows, "nextPageCursor": ""}
+
+    def closed_pnl_list(self, params):
+        with self._lock:
+            self._settle()
+            symbol = params.get("symbol")
+            limit  = int(params.get("limit", 50))
+            rows   = [r for r in reversed(self.closed_pnl) if not symbol or r["symbol"] == symbol]
+            return {"category": "linear", "list": rows[:limit], "nextPageCursor": ""}
+
+    def set_leverage(self, params):
+        symbol   = params["symbol"]
+        leverage = float(params["buyLeverage"])
+        with self._lock:
+            if self.leverage.get(symbol) == leverage:
+                raise StubError(110043, "leverage not modified")
+            self.leverage[symbol] = leverage
+        return {}
+
+    def trading_stop(self, params):
+        symbol = params["symbol"]
+        with self._lock:
+            self._settle()
+            pos = self.positions.get(symbol)
+            if pos is None:
+                raise StubError(10001, "can not set tp/sl/ts for zero position")
+            new = dict(pos)
+            if "stopLoss" in params:
+                new["sl"] = float(params["stopLoss"] or 0)
+            if "takeProfit" in params:
+                new["tp"] = float(params["takeProfit"] or 0)
+            if (new["sl"], new["tp"]) == (pos["sl"], pos["tp"]):
+                raise StubError(34040, "not modified")
+            pos.update(sl=new["sl"], tp=new["tp"])
+        return {}
+
+    def place_order(self, params):
+        category = params.get("category", "linear")
+        symbol   = params["symbol"]
+        side     = params["side"]
+        qty      = float(params["qty"])
+        if qty <= 0 or side not in ("Buy", "Sell"):
+            raise StubError(10001, "params error: side or qty invalid")
+        price = float(params["price"]) if params.get("orderType") == "Limit" and params.get("price") \
+            else self.market.price(category, symbol)
+        with self._lock:
+            self._settle()
+            if category == "spot":
+                self._fill_spot(symbol, side, qty, price)
+            else:
+                self._fill_linear(symbol, side, qty, price, params)
+        return {"orderId": str(uuid.uuid4()), "orderLinkId": params.get("orderLinkId", "")}
+
+    # -- fills --------------------------------------------------------------
+
+    def _fill_spot(self, symbol, side, qty, price):
+        coin = symbol[:-4] if symbol.endswith("USDT") else symbol
+        if side == "Buy":
+            cost = qty * price * (1 + self.fee)
+            if cost > self.coins["USDT"]:
+                raise StubError(170131, "Insufficient balance.")
+            self.coins["USDT"] -= cost
+            self.coins[coin] = self.coins.get(coin, 0.0) + qty
+        else:
+            if qty > self.coins.get(coin, 0.0) + 1e-12:
+                raise StubError(170131, "Insufficient balance.")
+            self.coins[coin] -= qty
+            self.coins["USDT"] += qty * price * (1 - self.fee)
+
+    def _fill_linear(self, symbol, side, qty, price, params):
+        pos    = self.positions.get(symbol)
+        reduce = str(params.get("reduceOnly", "")).lower() == "true"
+        if reduce and (pos is None or pos["side"] == side):
+            raise StubError(110017, "current position is zero, cannot fix reduce-only order qty")
+
+        if pos is not None and pos["side"] != side:
+            closing = min(qty, pos["size"])
+            self._close(symbol, closing, price, "Trade")
+            qty = 0.0 if reduce else qty - closing
+        if qty <= 0:
+            return
+
+        leverage = self.leverage.get(symbol, 10.0)
+        margin   = sum(p["size"] * p["avg"] / self.leverage.get(s, 10.0)
+                       for s, p in self.positions.items())
+        if qty * price / leverage + qty * price * self.fee > self.coins["USDT"] - margin:
+            raise StubError(110007, "ab not enough for new order")
+
+        self.coins["USDT"] -= qty * price * self.fee
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = {"side": side, "size": 0.0, "avg": 0.0, "sl": 0.0,
+                                            "tp": 0.0, "created": self.market.clock.now_ms()}
+        pos["avg"]   = (pos["avg"] * pos["size"] + price * qty) / (pos["size"] + qty)
+        pos["size"] += qty
+        if params.get("stopLoss"):
+            pos["sl"] = float(params["stopLoss"])
+        if params.get("takeProfit"):
+            pos["tp"] = float(params["takeProfit"])
+
+    def _close(self, symbol, qty, price, exec_type):
+        pos  = self.positions[symbol]
+        sign = 1.0 if pos["side"] == "Buy" else -1.0
+        pnl  = (price - pos["avg"]) * qty * sign - price * qty * self.fee
+        self.coins["USDT"] += pnl
+        now = self.market.clock.now_ms()
+        self.closed_pnl.append({
+            "symbol": symbol, "orderId": str(uuid.uuid4()),
+            "side": "Sell" if pos["side"] == "Buy" else "Buy",
+            "qty": _fmt(qty), "closedSize": _fmt(qty), "orderType": "Market", "execType": exec_type,
+            "orderPrice": _fmt(price), "avgEntryPrice": _fmt(pos["avg"]), "avgExitPrice": _fmt(price),
+            "cumEntryValue": _fmt(pos["avg"] * qty), "cumExitValue": _fmt(price * qty),
+            "closedPnl": _fmt(pnl), "fillCount": "1",
+            "leverage": _fmt(self.leverage.get(symbol, 10.0)),
+            "createdTime": str(pos["created"]), "updatedTime": str(now),
+        })
+        pos["size"] -= qty
+        if pos["size"] <= 1e-12:
+            del self.positions[symbol]
+
+    def _settle(self):
+        """Trigger SL/TP on every bar that opened since the last check, then on the current price."""
+        now = self.market.clock.now_ms()
+        for symbol in list(self.positions):
+            pos = self.positions[symbol]
+            if not (pos["sl"] or pos["tp"]):
+                continue
+            s = self.market.series("linear", symbol)
+            _, cols = s.bars(self._checked + 1, now, now)
+            ranges = list(zip(cols[2], cols[1])) + [(s.price(now), s.price(now))]
+            for low, high in ranges:
+                hit = self._trigger(pos, low, high)
+                if hit:
+                    self._close(symbol, pos["size"], *hit)
+                    break
+        self._checked = now
+
+    @staticmethod
+    def _trigger(pos, low, high):
+        # Stop first when a bar spans both levels — the conservative reading
+        if pos["side"] == "Buy":
+            if pos["sl"] and low <= pos["sl"]:
+                return pos["sl"], "StopLoss"
+            if pos["tp"] and high >= pos["tp"]:
+                return pos["tp"], "TakeProfit"
+        else:
+            if pos["sl"] and high >= pos["sl"]:
+                return pos["sl"], "StopLoss"
+            if pos["tp"] and low <= pos["tp"]:
+                return pos["tp"], "TakeProfit"
+        return None
+
+    def _upnl(self, symbol, pos):
+        sign = 1.0 if pos["side"] == "Buy" else -1.0
+        return (self.market.price("linear", symbol) - pos["avg"]) * pos["size"] * sign
+
+    def _position_row(self, symbol, pos):
+        if pos is None:
+            return {"positionIdx": 0, "symbol": symbol, "side": "", "size": "0", "avgPrice": "0",
+                    "positionValue": "0", "leverage": _fmt(self.leverage.get(symbol, 10.0)),
+                    "markPrice": _fmt(self.market.price("linear", symbol)), "unrealisedPnl": "0",
+                    "takeProfit": "", "stopLoss": "", "trailingStop": "0",
+                    "positionStatus": "Normal", "createdTime": "", "updatedTime": ""}
+        return {"positionIdx": 0, "symbol": symbol, "side": pos["side"], "size": _fmt(pos["size"]),
+                "avgPrice": _fmt(pos["avg"]), "positionValue": _fmt(pos["size"] * pos["avg"]),
+                "leverage": _fmt(self.leverage.get(symbol, 10.0)),
+                "markPrice": _fmt(self.market.price("linear", symbol)),
+                "unrealisedPnl": _fmt(self._upnl(symbol, pos)),
+                "takeProfit": _fmt(pos["tp"]) if pos["tp"] else "",
+                "stopLoss": _fmt(pos["sl"]) if pos["sl"] else "",
+                "trailingStop": "0", "positionStatus": "Normal",
+                "createdTime": str(pos["created"]), "updatedTime": str(self.market.clock.now_ms())}
+
+
+# ---------------------------------------------------------------------------
+# Servers
+# ---------------------------------------------------------------------------
+
+class KlineStreamServer(KlineReplayServer):
+    """Public WebSocket pushing kline topics from StubMarket instead of recorded frames."""
+
+    def __init__(self, market: StubMarket, host: str = "127.0.0.1", port: int = 0,
+                 push_interval: float = PUSH_INTERVAL_S):
+        super().__init__([], host, port, delay=push_interval)
+        self.market = market
+
+    def _replay(self, conn, path, topics, subscribed, send_lock):
+        if not subscribed.wait(10):
+            return
+        category = "spot" if path.rstrip("/").endswith("/spot") else "linear"
+        pushed   = {}          # topic → start of the newest bar sent
+        try:
+            while not self._stop.is_set():
+                for topic in list(topics):
+                    frame = self._frame(category, topic, pushed)
+                    if frame is not None:
+                        with send_lock:
+                            _send_frame(conn, json.dumps(frame).encode())
+                time.sleep(self.delay)
+        except OSError:
+            pass
+
+    def _frame(self, category, topic, pushed):
+        try:
+            _, interval, symbol = topic.split(".", 2)
+            step = interval_ms(interval)
+            # Re-send the last pushed bar (now confirmed) plus everything after it
+            rows = self.market.klines(category, symbol, interval, start=pushed.get(topic),
+                                      limit=1 if topic not in pushed else 50)
+        except (StubError, ValueError):
+            return None
+        if not rows:
+            return None
+        now  = self.market.clock.now_ms()
+        data = [{"start": int(r[0]), "end": int(r[0]) + step - 1, "interval": interval,
+                 "open": r[1], "high": r[2], "low": r[3], "close": r[4], "volume": r[5],
+                 "turnover": r[6], "confirm": int(r[0]) + step <= now, "timestamp": now}
+                for r in reversed(rows)]
+        pushed[topic] = data[-1]["start"]
+        return {"topic": topic, "data": data, "ts": now, "type": "snapshot"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # keep-alive, like the real API
+    server_version   = "BybitStub/1.0"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        stub  = self.server.stub
+        url   = urlparse(self.path)
+        route = ROUTES.get((method, url.path))
+        if method == "GET":
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            body   = self.rfile.read(length) if length else b""
+            params = json.loads(body or b"{}")
+        stub.record(url.path)
+        stub.delay()
+
+        if route is None:
+            self._reply(404, {"retCode": 404, "retMsg": f"{url.path} not served by the stand-in"})
+            return
+        try:
+            result, code, msg = route(stub, params), 0, "OK"
+        except StubError as e:
+            result, code, msg = {}, e.code, e.msg
+        except (KeyError, ValueError) as e:
+            result, code, msg = {}, 10001, f"params error: {e}"
+        self._reply(200, {"retCode": code, "retMsg": msg, "result": result, "retExtInfo": {},
+                          "time": int(time.time() * 1000)})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """REST + WebSocket stand-in sharing one replay clock, market and account."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ws_port: int = 0,
+                 speed: float = 1.0, latency: float = 0.0, jitter: float = 0.0,
+                 start_ms: int = None, data_dir: str = None, symbols=DEFAULT_SYMBOLS,
+                 base_interval: str = BASE_INTERVAL, balance: float = START_BALANCE,
+                 push_interval: float = PUSH_INTERVAL_S, seed: int = 0):
+        if start_ms is None and data_dir:
+            start_ms = _recorded_start(data_dir, symbols, str(base_interval))
+        self.clock    = ReplayClock(start_ms, speed)
+        self.market   = StubMarket(self.clock, base_interval, data_dir, symbols, seed)
+        self.exchange = StubExchange(self.market, balance)
+        self.latency  = latency
+        self.jitter   = jitter
+        self.calls    = Counter()
+        self._lock    = threading.Lock()
+
+        self._http = ThreadingHTTPServer((host, port), _Handler)
+        self._http.daemon_threads = True
+        self._http.stub = self
+        self._ws = KlineStreamServer(self.market, host, ws_port, push_interval)
+        self._serving = False
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def ws_url(self) -> str:
+        return self._ws.url
+
+    def start(self):
+        self._serving = True
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        self._ws.start()
+        return self
+
+    def serve_forever(self):
+        self._serving = True
+        self._ws.start()
+        self._http.serve_forever()
+
+    def close(self):
+        if self._serving:
+            self._http.shutdown()
+        self._http.server_close()
+        self._ws.close()
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0.0, self.jitter))
+
+    def record(self, path: str):
+        with self._lock:
+            self.calls[path] += 1
+
+    # -- routes -------------------------------------------------------------
+
+    def _kline(self, p):
+        rows = self.market.klines(p.get("category", "linear"), p["symbol"], p["interval"],
+                                  _int(p.get("start")), _int(p.get("end")),
+                                  min(int(p.get("limit", 200)), 1000))
+        return {"category": p.get("category", "linear"), "symbol": p["symbol"], "list": rows}
+
+    def _tickers(self, p):
+        category = p.get("category", "linear")
+        symbols  = [p["symbol"]] if p.get("symbol") else self.market.symbols(category)
+        return {"category": category, "list": [self.market.ticker(category, s) for s in symbols]}
+
+    def _funding(self, p):
+        rows = self.market.funding_history(p["symbol"], _int(p.get("startTime")),
+                                           _int(p.get("endTime")), min(int(p.get("limit", 200)), 200))
+        return {"category": "linear", "list": rows}
+
+    def _open_interest(self, p):
+        rows = self.market.open_interest(p["symbol"], p["intervalTime"], _int(p.get("startTime")),
+                                         _int(p.get("endTime")), min(int(p.get("limit", 50)), 200))
+        return {"category": "linear", "symbol": p["symbol"], "list": rows, "nextPageCursor": ""}
+
+    def _account_ratio(self, p):
+        return {"list": self.market.account_ratio(p["symbol"], p["period"],
+                                                  min(int(p.get("limit", 50)), 500))}
+
+
+ROUTES = {
+    ("GET",  "/v5/market/kline"):           StubServer._kline,
+    ("GET",  "/v5/market/tickers"):         StubServer._tickers,
+    ("GET",  "/v5/market/funding/history"): StubServer._funding,
+    ("GET",  "/v5/market/open-interest"):   StubServer._open_interest,
+    ("GET",  "/v5/market/account-ratio"):   StubServer._account_ratio,
+    ("GET",  "/v5/account/wallet-balance"): lambda s, p: s.exchange.wallet_balance(p),
+    ("GET",  "/v5/position/list"):          lambda s, p: s.exchange.position_list(p),
+    ("GET",  "/v5/position/closed-pnl"):    lambda s, p: s.exchange.closed_pnl_list(p),
+    ("POST", "/v5/order/create"):           lambda s, p: s.exchange.place_order(p),
+    ("POST", "/v5/position/set-leverage"):  lambda s, p: s.exchange.set_leverage(p),
+    ("POST", "/v5/position/trading-stop"):  lambda s, p: s.exchange.trading_stop(p),
+}
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _fmt(x) -> str:
+    return f"{float(x):.10g}"
+
+
+def _int(value):
+    return None if value in (None, "") else int(value)
+
+
+def _synthetic(symbol: str, anchor_ms: int, step: int, seed: int):
+    """Random-walk bars around anchor_ms, priced START_PRICES[symbol] at the anchor."""
+    rng   = np.random.default_rng(zlib.crc32(symbol.encode()) + seed)
+    first = (anchor_ms - HISTORY_DAYS * DAY_MS) // step * step
+    n     = (HISTORY_DAYS + FUTURE_DAYS) * DAY_MS // step
+    ts    = first + np.arange(n, dtype=np.int64) * step
+
+    sigma = BAR_SIGMA * np.sqrt(step / interval_ms("15"))
+    rets  = rng.normal(0.0, sigma, n)
+    logp  = np.cumsum(rets)
+    logp -= logp[min((anchor_ms - first) // step, n - 1)]
+    close = START_PRICES.get(symbol, 100.0) * np.exp(logp)
+    open_ = np.r_[close[0] * np.exp(-rets[0]), close[:-1]]
+    wicks = np.abs(rng.normal(0.0, sigma / 2, (2, n)))
+    high  = np.maximum(open_, close) * np.exp(wicks[0])
+    low   = np.minimum(open_, close) * np.exp(-wicks[1])
+    # ~1M USDT turnover per bar, noisy
+    volume = 1e6 / close * rng.lognormal(0.0, 0.5, n)
+    return ts, np.vstack([open_, high, low, close, volume])
+
+
+def _cached_months(data_dir: str, category: str, symbol: str, interval: str) -> list:
+    try:
+        with open(os.path.join(data_dir, category, symbol, interval, "index.json")) as f:
+            return sorted(json.load(f))
+    except (OSError, ValueError):
+        return []
+
+
+def _month_ms(key: str) -> int:
+    y, m = map(int, key.split("-"))
+    return int(datetime(y, m, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _recorded(data_dir: str, category: str, symbol: str, interval: str):
+    """Bars for a symbol from a KlineCache directory, or None if it has none."""
+    months = _cached_months(data_dir, category, symbol, interval)
+    if not months:
+        return None
+    ts, cols = KlineCache(data_dir, offline=True).load(
+        category, symbol, interval, _month_ms(months[0]), _month_ms(months[-1]) + 32 * DAY_MS)
+    return (ts, cols) if len(ts) else None
+
+
+def _recorded_start(data_dir: str, symbols, interval: str):
+    """Clock start for recorded data: HISTORY_DAYS into the first cached symbol."""
+    for symbol in symbols:
+        months = _cached_months(data_dir, "linear", symbol, interval)
+        if months:
+            return _month_ms(months[0]) + HISTORY_DAYS * DAY_MS
+    return None
+
+
+def _parse_start(value: str):
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Bybit v5 stand-in (REST + public WebSocket)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--ws-port", type=int, default=None, help="Default: --port + 1")
+    parser.add_argument("--speed", type=float, default=1.0, help="Market seconds per wall second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every REST reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random delay, seconds")
+    parser.add_argument("--data", default=None, help="KlineCache directory to replay (default: synthetic)")
+    parser.add_argument("--start", default=None, help="Clock start, ISO date or ms (default: now)")
+    parser.add_argument("--symbols", nargs="+", default=list(DEFAULT_SYMBOLS))
+    parser.add_argument("--base-interval", default=BASE_INTERVAL)
+    parser.add_argument("--balance", type=float, default=START_BALANCE, help="Starting USDT")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port,
+                        args.port + 1 if args.ws_port is None else args.ws_port,
+                        speed=args.speed, latency=args.latency, jitter=args.jitter,
+                        start_ms=_parse_start(args.start), data_dir=args.data,
+                        symbols=args.symbols, base_interval=args.base_interval,
+                        balance=args.balance, seed=args.seed)
+    print(f"🧪 Bybit stand-in: {server.base_url}  (WebSocket {server.ws_url}, "
+          f"speed {args.speed:g}x, latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms)")
+    print(f"   export BYBIT_BASE_URL={server.base_url} BYBIT_WS_URL={server.ws_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+        print("📊 Requests served:")
+        for path, n in server.calls.most_common():
+            print(f"   {n:6d}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Kline Replay Server  (market/ws_replay.py)
+==========================================
+Minimal stand-in for Bybit's public WebSocket, used to exercise
+KlineStream without touching the exchange.  Standard library only.
+
+  - Accepts any number of clients (RFC 6455 handshake, text frames only)
+  - Answers {"op":"subscribe"} and {"op":"ping"} the way Bybit does
+  - Replays recorded kline frames to every client, filtered by the topics
+    that client subscribed to, `delay` seconds apart
+  - close() also drops connected clients, so a test can force a disconnect
+
+Frames file: one Bybit push message per line (JSON), e.g.
+  {"topic":"kline.15.SOLUSDT","data":[{"start":...,"close":"142.1",...}],"ts":...,"type":"snapshot"}
+
+Record a file from the live stream:
+    python -m market.ws_replay frames.jsonl --record kline.15.SOLUSDT --seconds 60
+Replay it:
+    python -m market.ws_replay frames.jsonl --port 8765
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# ---------------------------------------------------------------------------
+# Frame helpers
+# ---------------------------------------------------------------------------
+
+def _send_frame(conn, payload: bytes, opcode: int = 0x1):
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 65536:
+        header += bytes([126]) + struct.pack(">H", n)
+    else:
+        header += bytes([127]) + struct.pack(">Q", n)
+    conn.sendall(header + payload)
+
+
+def _recv_exact(conn, n: int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = conn.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("client closed")
+        buf += chunk
+    return buf
+
+
+def _recv_frame(conn):
+    """Return (opcode, payload) for the next client frame."""
+    b0, b1 = _recv_exact(conn, 2)
+    opcode = b0 & 0x0F
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack(">H", _recv_exact(conn, 2))[0]
+    elif n == 127:
+        n = struct.unpack(">Q", _recv_exact(conn, 8))[0]
+    mask = _recv_exact(conn, 4) if b1 & 0x80 else b"\x00\x00\x00\x00"
+    data = _recv_exact(conn, n)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+def _handshake(conn):
+    """Complete the upgrade and return the request path, or None."""
+    request = b""
+    while b"\r\n\r\n" not in request:
+        chunk = conn.recv(4096)
+        if not chunk:
+            return None
+        request += chunk
+    lines = request.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    path  = parts[1] if len(parts) > 1 else "/"
+    key = ""
+    for line in lines[1:]:
+        if line.lower().startswith("sec-websocket-key:"):
+            key = line.split(":", 1)[1].strip()
+    if not key:
+        return None
+    accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+    conn.sendall(
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+    )
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class KlineReplayServer:
+    """Replays `frames` (list of Bybit push dicts) to each subscribed client."""
+
+    def __init__(self, frames: list, host: str = "127.0.0.1", port: int = 0,
+                 delay: float = 0.05, loop: bool = False):
+        self.frames = frames
+        self.delay  = delay
+        self.loop   = loop
+        self._sock  = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen()
+        self.host, self.port = self._sock.getsockname()[:2]
+        self._stop  = threading.Event()
+        self._conns = set()
+        self._conns_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._conns_lock:
+                self._conns.add(conn)
+            threading.Thread(target=self._client, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        with self._conns_lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _client(self, conn):
+        try:
+            path = _handshake(conn)
+            if path is None:
+                return
+            topics     = set()
+            subscribed = threading.Event()
+            send_lock  = threading.Lock()
+            threading.Thread(target=self._replay, args=(conn, path, topics, subscribed, send_lock),
+                             daemon=True).start()
+            while not self._stop.is_set():
+                opcode, payload = _recv_frame(conn)
+                if opcode == 0x8:                      # close
+                    return
+                if opcode == 0x9:                      # WS-level ping
+                    with send_lock:
+                        _send_frame(conn, payload, opcode=0xA)
+                    continue
+                if opcode != 0x1:
+                    continue
+                msg = json.loads(payload.decode())
+                op  = msg.get("op")
+                if op == "subscribe":
+                    topics.update(msg.get("args", []))
+                    reply = {"success": True, "ret_msg": "", "op": "subscribe",
+                             "conn_id": "replay"}
+                    subscribed.set()
+                elif op == "ping":
+                    reply = {"success": True, "ret_msg": "pong", "op": "ping",
+                             "conn_id": "replay"}
+                else:
+                    continue
+                with send_lock:
+                    _send_frame(conn, json.dumps(reply).encode())
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            with self._conns_lock:
+                self._conns.discard(conn)
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _replay(self, conn, path, topics, subscribed, send_lock):
+        """
+        Push frames to one client once it has subscribed.  `path` is the URL
+        it connected to; recorded frames ignore it, stub_server's
+        KlineStreamServer uses it to pick linear or spot.
+        """
+        if not subscribed.wait(10):
+            return
+        try:
+            while not self._stop.is_set():
+                for frame in self.frames:
+                    if frame.get("topic") in topics:
+                        with send_lock:
+                            _send_frame(conn, json.dumps(frame).encode())
+                        time.sleep(self.delay)
+                if not self.loop:
+                    return
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Recording / CLI
+# ---------------------------------------------------------------------------
+
+def load_frames(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_frames(path: str, topics: list, seconds: float,
+                  url: str = "wss://stream.bybit.com/v5/public/linear"):
+    """Append live push messages for `topics` to `path` for `seconds`."""
+    import websocket   # websocket-client, only needed for recording
+
+    ws = websocket.create_connection(url, timeout=5)
+    ws.send(json.dumps({"op": "subscribe", "args": topics}))
+    deadline = time.time() + seconds
+    count = 0
+    with open(path, "a") as f:
+        while time.time() < deadline:
+            try:
+                msg = json.loads(ws.recv())
+            except websocket.WebSocketTimeoutException:
+                ws.send(json.dumps({"op": "ping"}))
+                continue
+            if "topic" in msg:
+                f.write(json.dumps(msg) + "\n")
+                count += 1
+    ws.close()
+    print(f"📼 Recorded {count} frames → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Bybit kline frames over WebSocket")
+    parser.add_argument("frames", help="JSONL file of recorded push messages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds between frames")
+    parser.add_argument("--loop", action="store_true", help="Replay forever")
+    parser.add_argument("--record", nargs="+", metavar="TOPIC",
+                        help="Record TOPIC(s) from the live stream instead of replaying")
+    parser.add_argument("--seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.record:
+        record_frames(args.frames, args.record, args.seconds)
+        return
+
+    server = KlineReplayServer(load_frames(args.frames), args.host, args.port,
+                               delay=args.delay, loop=args.loop)
+    print(f"📡 Replaying {len(server.frames)} frames on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
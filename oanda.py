@@ -19,24 +19,14 @@ import re
 import sqlite3
 import numpy as np
 import argparse
-import requests
+from market import http_client
 from datetime import datetime, timezone, timedelta
-from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from factors.indicators import ENGINE as indicator_engine
+from factors.cache import cached, scored, MINUTE
 
-try:
-    import feedparser
-    HAS_FEEDPARSER = True
-except ImportError:
-    feedparser = None
-    HAS_FEEDPARSER = False
-
-try:
-    import talib
-    HAS_TALIB = True
-except ImportError:
-    talib = None
-    HAS_TALIB = False
+# News RSS via the shared conditional-GET feed cache
+from market import rss
 
 try:
     from factors.support_resistance import get_sr_score
@@ -126,15 +116,13 @@ bot_state = {
 }
 
 
+@cached("oanda.news", ttl=15 * MINUTE, accept=scored, negative_ttl=5 * MINUTE)
 def get_forex_news_score(symbol: str) -> dict:
     """Fetch Google News RSS for Macro USD + pair-specific sentiment."""
-    if not HAS_FEEDPARSER:
-        return {"score": 0.0, "confidence": 0.0, "block_long_only": False,
-                "details": {"reason": "feedparser not installed"}}
     try:
-        macro_url = f"https://news.google.com/rss/search?q={quote_plus(FOREX_NEWS_QUERIES['MACRO'])}&hl=en-US&gl=US&ceid=US:en"
-        pair_url  = f"https://news.google.com/rss/search?q={quote_plus(FOREX_NEWS_QUERIES.get(symbol, symbol + ' forex'))}&hl=en-US&gl=US&ceid=US:en"
-        entries   = (feedparser.parse(macro_url).entries[:5] + feedparser.parse(pair_url).entries[:5])
+        macro_url = rss.google_news_url(FOREX_NEWS_QUERIES['MACRO'])     # shared across pairs
+        pair_url  = rss.google_news_url(FOREX_NEWS_QUERIES.get(symbol, symbol + ' forex'))
+        entries   = (rss.fetch_feed(macro_url).entries[:5] + rss.fetch_feed(pair_url).entries[:5])
         if not entries:
             return {"score": 0.0, "confidence": 0.2, "block_long_only": False}
         net = 0.0
@@ -170,8 +158,8 @@ class OandaForexBot:
 
     def _get(self, path: str, params: dict = None):
         try:
-            r = requests.get(f"{OANDA_BASE_URL}/v3/{path}",
-                             headers=self.headers, params=params, timeout=10)
+            r = http_client.get(f"{OANDA_BASE_URL}/v3/{path}",
+                                headers=self.headers, params=params, timeout=10)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -180,8 +168,8 @@ class OandaForexBot:
 
     def _post(self, path: str, payload: dict):
         try:
-            r = requests.post(f"{OANDA_BASE_URL}/v3/{path}",
-                              headers=self.headers, json=payload, timeout=10)
+            r = http_client.post(f"{OANDA_BASE_URL}/v3/{path}",
+                                 headers=self.headers, json=payload, timeout=10)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -190,8 +178,8 @@ class OandaForexBot:
 
     def _put(self, path: str, payload: dict):
         try:
-            r = requests.put(f"{OANDA_BASE_URL}/v3/{path}",
-                             headers=self.headers, json=payload, timeout=10)
+            r = http_client.put(f"{OANDA_BASE_URL}/v3/{path}",
+                                headers=self.headers, json=payload, timeout=10)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -399,57 +387,17 @@ class OandaForexBot:
         data["60"] = data["1h"]; data["240"] = data["4h"]
         return data
 
-    def calculate_indicators(self, data):
+    def calculate_indicators(self, data, symbol=None):
         indicators = {}
         for tf in ["15m", "1h", "4h"]:
-            closes = data[tf]["close"]; highs = data[tf]["high"]
-            lows   = data[tf]["low"];   volumes = data[tf]["volume"]
-            if HAS_TALIB:
-                rsi     = talib.RSI(closes, 14)[-1]
-                ml,ms,mh = talib.MACD(closes, 12, 26, 9)
-                ema_21  = talib.EMA(closes, 21)[-1]; ema_50 = talib.EMA(closes, 50)[-1]
-                atr     = talib.ATR(highs, lows, closes, 14)[-1]
-                adx     = talib.ADX(highs, lows, closes, 14)[-1]
-                sk, sd  = talib.STOCH(highs, lows, closes, 14, 3, 3)
-                vol_sma = talib.SMA(volumes, 20)[-1]
-            else:
-                def _ema(a, n):
-                    k, v = 2.0/(n+1), float(np.mean(a[:n]))
-                    for x in a[n:]: v = float(x)*k + v*(1-k)
-                    return v
-                P = 14
-                d = np.diff(closes)
-                g = np.where(d>0,d,0.0); l = np.where(d<0,-d,0.0)
-                ag, al = float(np.mean(g[:P])), float(np.mean(l[:P]))
-                for i in range(P, len(g)):
-                    ag=(ag*(P-1)+g[i])/P; al=(al*(P-1)+l[i])/P
-                rsi    = 100.0 - 100.0/(1.0+ag/(al+1e-9))
-                ema_21 = _ema(closes,21); ema_50 = _ema(closes,50)
-                mv  = [_ema(closes[:i+1],12)-_ema(closes[:i+1],26)
-                       for i in range(max(26,len(closes)-20), len(closes))]
-                mlv = _ema(closes,12)-_ema(closes,26)
-                msv = _ema(np.array(mv),9) if len(mv)>=9 else mv[-1]
-                ml  = np.array([mlv]); ms = np.array([msv]); mh = np.array([mlv-msv])
-                tr  = np.maximum(highs[1:]-lows[1:],np.maximum(
-                      np.abs(highs[1:]-closes[:-1]),np.abs(lows[1:]-closes[:-1])))
-                atr = float(np.mean(tr[:P]))
-                for v in tr[P:]: atr=(atr*(P-1)+float(v))/P
-                rh  = float(np.max(highs[-P:])); rl = float(np.min(lows[-P:]))
-                skv = ((float(closes[-1])-rl)/(rh-rl+1e-9))*100
-                sk  = np.array([skv]); sd = np.array([skv])
-                dmp = np.where((highs[1:]-highs[:-1])>(lows[:-1]-lows[1:]),
-                               np.maximum(highs[1:]-highs[:-1],0.0),0.0)
-                dmm = np.where((lows[:-1]-lows[1:])>(highs[1:]-highs[:-1]),
-                               np.maximum(lows[:-1]-lows[1:],0.0),0.0)
-                aw  = np.mean(tr[-P:])
-                adx = 100*abs(100*np.mean(dmp[-P:])/(aw+1e-9)-100*np.mean(dmm[-P:])/(aw+1e-9)) / \
-                      (100*np.mean(dmp[-P:])/(aw+1e-9)+100*np.mean(dmm[-P:])/(aw+1e-9)+1e-9)
-                vol_sma = np.mean(volumes[-20:])
+            volumes = data[tf]["volume"]
+            ta = indicator_engine.latest(data[tf], key=("oanda", symbol, tf) if symbol else None)
+            vol_sma = ta["volume_sma"]
             indicators[tf] = {
-                "rsi": float(rsi), "macd": float(ml[-1]), "macd_signal": float(ms[-1]),
-                "macd_histogram": float(mh[-1]), "ema_21": float(ema_21), "ema_50": float(ema_50),
-                "atr": float(atr), "adx": float(adx),
-                "stoch_k": float(sk[-1]), "stoch_d": float(sd[-1]),
+                "rsi": float(ta["rsi"]), "macd": float(ta["macd"]), "macd_signal": float(ta["macd_signal"]),
+                "macd_histogram": float(ta["macd_histogram"]), "ema_21": float(ta["ema_21"]), "ema_50": float(ta["ema_50"]),
+                "atr": float(ta["atr"]), "adx": float(ta["adx"]),
+                "stoch_k": float(ta["stoch_k"]), "stoch_d": float(ta["stoch_d"]),
                 "volume_ratio": float(volumes[-1]/(vol_sma+1e-9)),
             }
         cur = float(data["15m"]["close"][-1])
@@ -732,7 +680,7 @@ class OandaForexBot:
             if not ok: continue
             data = self.fetch_multi_timeframe_data(symbol)
             if not data: continue
-            indicators, cur_price, volatility = self.calculate_indicators(data)
+            indicators, cur_price, volatility = self.calculate_indicators(data, symbol)
             print(f"   Price={cur_price:.5f} vol={volatility*100:.3f}% ATR={indicators['15m']['atr']:.5f}")
             sig_data = self.evaluate_multi_factor_consensus(
                 symbol, indicators, cur_price, volatility, data, spread_pips)
@@ -13,11 +13,11 @@ Key Features:
   • Zero Leverage: No liquidation risk. Capital preservation focused.
 """
 
-import requests
+from market import http_client
+from market.endpoints import MARKET_URL
 import hmac
 import hashlib
 import time
-import numpy as np
 import sqlite3
 import json
 import os
@@ -25,16 +25,16 @@ from datetime import datetime, timedelta
 from pybit.unified_trading import HTTP
 from dotenv import load_dotenv
 
-try:
-    import talib
-except ImportError:
-    talib = None
-
 from factors.aggregator import MultiFactorAggregator
 from factors.regime import get_regime_score
+from factors.indicators import ENGINE as indicator_engine
 from factors.derivatives import get_derivatives_score
 from factors.news import get_news_score
 from factors.sentiment import get_sentiment_score
+from market.candles import CandleStore
+from market.kline_stream import KlineStream, SPOT_WS_URL
+from market import endpoints, ratelimit
+from market import snapshot as market_snapshot
 
 load_dotenv()
 api_key = os.getenv("API_KEY")
@@ -55,6 +55,10 @@ SPOT_CONTRACT_SPECS = {
 primary_timeframe = "15"   # 15m
 higher_timeframe  = "60"    # 1h
 
+# Live klines over the public WebSocket; REST remains the fallback
+KLINE_STREAM_ENABLED = os.getenv("KLINE_STREAM", "1") != "0"
+KLINE_WS_URL = os.getenv("BYBIT_SPOT_KLINE_WS_URL", SPOT_WS_URL)
+
 # Spot Risk & Strategy Limits
 min_reward_ratio = 2.0
 max_daily_spot_trades = 5
@@ -66,6 +70,8 @@ session = HTTP(
     api_secret=api_secret,
     recv_window=15000,
 )
+endpoints.point_session(session)    # BYBIT_BASE_URL, e.g. the offline stand-in server
+ratelimit.install(session.client)   # every pybit call shares the process-wide Bybit budget
 
 # Global State Dictionary
 spot_state = {
@@ -96,6 +102,13 @@ class SpotTradingBot:
         print(f"💰 Allocation: {self.allocation_pct * 100:.0f}% of USDT Balance")
         self.init_db()
         self.load_position_state()
+        self.candles = CandleStore(self._fetch_kline_rows)
+        self.kline_stream = None
+        if KLINE_STREAM_ENABLED:
+            stream = KlineStream(KLINE_WS_URL, TRADE_SYMBOLS,
+                                 [primary_timeframe, higher_timeframe, "240"])
+            if stream.start():
+                self.kline_stream = stream
 
     def init_db(self):
         """Initialize SQLite database for spot position and trade log persistence."""
@@ -273,72 +286,61 @@ class SpotTradingBot:
                 continue
         return 0.0
 
+    def _fetch_kline_rows(self, symbol: str, interval: str, start: int = None, limit: int = 100):
+        """Raw Bybit spot kline rows (newest first); `start` limits it to bars since then."""
+        url = f"{MARKET_URL}/kline"
+        params = {"category": "spot", "symbol": symbol, "interval": interval, "limit": limit}
+        if start is not None:
+            params["start"] = start
+        resp = http_client.get(url, params=params, timeout=10)
+        if resp.status_code != 200:
+            return None
+        res = resp.json()
+        if res.get("retCode") != 0:
+            return None
+        return res["result"]["list"]
+
     def fetch_multi_timeframe_data(self, symbol: str) -> dict:
-        """Fetch spot OHLCV klines for 15m, 1h, and 4h timeframes."""
+        """Fetch spot OHLCV klines for 15m, 1h, and 4h timeframes (stream first, delta REST on miss)."""
         data = {}
         for tf in [primary_timeframe, higher_timeframe, "240"]:
-            url = "https://api.bybit.com/v5/market/kline"
-            params = {"category": "spot", "symbol": symbol, "interval": tf, "limit": 100}
+            if self.kline_stream is not None:
+                streamed = self.kline_stream.get_candles(symbol, tf)
+                if streamed is not None:
+                    data[tf] = streamed
+                    continue
             try:
-                resp = requests.get(url, params=params, timeout=10)
-                if resp.status_code == 200:
-                    res = resp.json()
-                    if res.get("retCode") == 0:
-                        candles = list(reversed(res["result"]["list"]))
-                        data[tf] = {
-                            'close': np.array([float(c[4]) for c in candles]),
-                            'high':  np.array([float(c[2]) for c in candles]),
-                            'low':   np.array([float(c[3]) for c in candles]),
-                            'volume':np.array([float(c[5]) for c in candles]),
-                            'timestamp': [int(c[0]) for c in candles]
-                        }
+                candles = self.candles.get(symbol, tf)
+                if candles is not None:
+                    data[tf] = candles
+                    if self.kline_stream is not None and symbol in TRADE_SYMBOLS:
+                        self.kline_stream.seed(symbol, tf, self.candles.buffer(symbol, tf))
             except Exception as e:
                 print(f"❌ Error fetching spot {tf} data for {symbol}: {e}")
                 return None
-            time.sleep(0.05)
         return data if len(data) == 3 else None
 
-    def calculate_indicators(self, data: dict) -> tuple:
-        """Calculate technical indicators across timeframes."""
+    def calculate_indicators(self, data: dict, symbol: str = None) -> tuple:
+        """Calculate technical indicators across timeframes (streaming engine)."""
         tf_15m = data[primary_timeframe]
         tf_1h  = data[higher_timeframe]
         tf_4h  = data["240"]
 
         indicators = {}
         for tf, prices in [("15m", tf_15m), ("1h", tf_1h), ("4h", tf_4h)]:
-            closes  = prices['close']
-            highs   = prices['high']
-            lows    = prices['low']
             volumes = prices['volume']
-
-            if talib is not None:
-                rsi         = float(talib.RSI(closes, timeperiod=14)[-1])
-                macd, macd_sig, macd_h = talib.MACD(closes, fastperiod=12, slowperiod=26, signalperiod=9)
-                ema_21      = float(talib.EMA(closes, timeperiod=21)[-1])
-                ema_50      = float(talib.EMA(closes, timeperiod=50)[-1])
-                atr         = float(talib.ATR(highs, lows, closes, timeperiod=14)[-1])
-                vol_sma     = float(talib.SMA(volumes, timeperiod=20)[-1])
-                bb_u, bb_m, bb_l = talib.BBANDS(closes, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
-                adx         = float(talib.ADX(highs, lows, closes, timeperiod=14)[-1])
-                stoch_k, _  = talib.STOCH(highs, lows, closes, fastk_period=14, slowk_period=3, slowd_period=3)
-            else:
-                # Basic fallback
-                rsi, macd, macd_sig, macd_h = 50.0, 0.0, 0.0, 0.0
-                ema_21, ema_50 = float(closes[-1]), float(closes[-1])
-                atr = float(closes[-1]) * 0.01
-                vol_sma = float(np.mean(volumes[-20:])) if len(volumes) >= 20 else 1.0
-                bb_u, bb_m, bb_l = float(closes[-1]*1.02), float(closes[-1]), float(closes[-1]*0.98)
-                adx, stoch_k = 20.0, 50.0
+            ta      = indicator_engine.latest(prices, key=("spot", symbol, tf) if symbol else None)
+            vol_sma = ta['volume_sma']
 
             indicators[tf] = {
-                'rsi': rsi, 'macd': float(macd[-1] if isinstance(macd, np.ndarray) else macd),
-                'macd_signal': float(macd_sig[-1] if isinstance(macd_sig, np.ndarray) else macd_sig),
-                'macd_histogram': float(macd_h[-1] if isinstance(macd_h, np.ndarray) else macd_h),
-                'ema_21': ema_21, 'ema_50': ema_50, 'atr': atr,
+                'rsi': ta['rsi'], 'macd': ta['macd'],
+                'macd_signal': ta['macd_signal'],
+                'macd_histogram': ta['macd_histogram'],
+                'ema_21': ta['ema_21'], 'ema_50': ta['ema_50'], 'atr': ta['atr'],
                 'volume_sma': vol_sma, 'current_volume': float(volumes[-1]),
-                'bb_upper': float(bb_u[-1] if isinstance(bb_u, np.ndarray) else bb_u),
-                'bb_lower': float(bb_l[-1] if isinstance(bb_l, np.ndarray) else bb_l),
-                'adx': adx, 'stoch_k': float(stoch_k[-1] if isinstance(stoch_k, np.ndarray) else stoch_k),
+                'bb_upper': ta['bb_upper'],
+                'bb_lower': ta['bb_lower'],
+                'adx': ta['adx'], 'stoch_k': ta['stoch_k'],
                 'volume_ratio': float(volumes[-1] / vol_sma) if vol_sma > 0 else 1.0
             }
 
@@ -350,15 +352,15 @@ class SpotTradingBot:
     def check_btc_correlation(self) -> dict:
         """Check Bitcoin trend correlation for spot safety."""
         try:
-            url = "https://api.bybit.com/v5/market/kline"
+            url = f"{MARKET_URL}/kline"
             params = {"category": "spot", "symbol": "BTCUSDT", "interval": "60", "limit": 10}
-            resp = requests.get(url, params=params, timeout=10)
+            resp = http_client.get(url, params=params, timeout=10)
             if resp.status_code == 200:
                 res = resp.json()
                 if res.get("retCode") == 0:
                     candles = list(reversed(res["result"]["list"]))
                     closes = [float(c[4]) for c in candles]
-                    cur = closes[-1]
+                    cur = closes[-1]   # forming bar's close is the live price
                     c_1h = closes[-2] if len(closes) > 1 else cur
                     c_4h = closes[-5] if len(closes) > 4 else cur
                     chg_1h = (cur - c_1h) / c_1h * 100
@@ -545,10 +547,9 @@ class SpotTradingBot:
         # Check existing position exit if open
         if spot_state['position']:
             sym = spot_state['position']['symbol']
-            data = self.fetch_multi_timeframe_data(sym)
-            if data:
-                cur_price = data[primary_timeframe]['close'][-1]
-                self.check_position_exit(sym, cur_price)
+            ticker = market_snapshot.get_ticker(sym, category="spot", max_age=5, bulk=False)
+            if ticker and ticker["last_price"]:
+                self.check_position_exit(sym, ticker["last_price"])
 
         # Skip new scans if already holding a spot position
         if spot_state['position']:
@@ -563,7 +564,7 @@ class SpotTradingBot:
             if not data:
                 continue
 
-            indicators, cur_price, volatility = self.calculate_indicators(data)
+            indicators, cur_price, volatility = self.calculate_indicators(data, sym)
             ta_sig = self.calculate_spot_signals(indicators, cur_price, volatility)
 
             regime_sig = get_regime_score()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules import as top-level packages (factors, market), as the bots run them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
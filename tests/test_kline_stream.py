@@ -0,0 +1,135 @@
+"""KlineStream against local stand-ins: recorded frames (ws_replay) and the stub exchange."""
+
+import copy
+import os
+import time
+
+import numpy as np
+import pytest
+
+from conftest import FIXTURES
+from market.candles import CandleBuffer, decode_rows, interval_ms
+from market.kline_stream import KlineStream
+from market.stub_server import StubServer
+from market.ws_replay import KlineReplayServer, load_frames
+
+pytest.importorskip("websocket")
+
+STEP = interval_ms("15")
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _frames(drop_first_bar=False):
+    """The recorded frames, moved so their first bar is the current 15m bar."""
+    frames = load_frames(os.path.join(FIXTURES, "kline_frames.jsonl"))
+    first  = frames[0]["data"][0]["start"]
+    shift  = int(time.time() * 1000) // STEP * STEP - first
+    moved  = []
+    for frame in frames:
+        frame = copy.deepcopy(frame)
+        for k in frame["data"]:
+            k["start"] += shift
+            k["end"]   += shift
+        if not (drop_first_bar and frame["data"][0]["start"] == first + shift):
+            moved.append(frame)
+    return moved, first + shift
+
+
+def _seed_buffer(last_start):
+    """100 closed bars ending the bar before last_start + STEP."""
+    ts   = last_start - STEP * np.arange(99, -1, -1, dtype=np.int64)
+    base = np.linspace(138.0, 142.0, 100)
+    buf  = CandleBuffer()
+    buf.load(ts, np.vstack([base, base + 0.3, base - 0.3, base + 0.1, np.full(100, 1000.0)]))
+    return buf
+
+
+def _connected(url, symbol="SOLUSDT"):
+    stream = KlineStream(url, [symbol], ["15"])
+    assert stream.start()
+    assert _wait(lambda: stream.connected)
+    return stream
+
+
+@pytest.fixture
+def replay():
+    servers = []
+
+    def start(frames):
+        server = KlineReplayServer(frames, delay=0.02, loop=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_replayed_bars_reach_get_candles(replay):
+    frames, bar = _frames()
+    stream = _connected(replay(frames).url)
+    try:
+        stream.seed("SOLUSDT", "15", _seed_buffer(bar - STEP))
+        assert _wait(lambda: (c := stream.get_candles("SOLUSDT", "15")) is not None
+                     and c["timestamp"][-1] == bar + STEP)
+        candles = stream.get_candles("SOLUSDT", "15")
+        assert len(candles["close"]) == 100
+        assert candles["timestamp"][-2] == bar
+        assert candles["close"][-2] == 142.48          # confirmed bar
+        assert candles["close"][-1] == 142.61          # forming bar
+        assert candles["volume"][-2] == 2977.3
+    finally:
+        stream.stop()
+
+
+def test_skipped_bar_falls_back_to_rest(replay):
+    frames, bar = _frames(drop_first_bar=True)
+    stream = _connected(replay(frames).url)
+    try:
+        stream.seed("SOLUSDT", "15", _seed_buffer(bar - STEP))
+        assert _wait(lambda: stream.get_candles("SOLUSDT", "15") is None)
+        time.sleep(0.1)                                # later frames do not revive it
+        assert stream.get_candles("SOLUSDT", "15") is None
+    finally:
+        stream.stop()
+
+
+def test_disconnect_invalidates_buffers(replay):
+    frames, bar = _frames()
+    server = replay(frames)
+    stream = _connected(server.url)
+    try:
+        stream.seed("SOLUSDT", "15", _seed_buffer(bar - STEP))
+        assert _wait(lambda: stream.get_candles("SOLUSDT", "15") is not None)
+        server.close()
+        assert _wait(lambda: not stream.connected)
+        assert stream.get_candles("SOLUSDT", "15") is None
+    finally:
+        stream.stop()
+
+
+@pytest.mark.parametrize("category", ["linear", "spot"])
+def test_stub_server_pushes_klines(category):
+    server = StubServer(push_interval=0.1).start()
+    stream = None
+    try:
+        stream = _connected(f"{server.ws_url}/v5/public/{category}")
+        rows = server.market.klines(category, "SOLUSDT", "15", limit=100)
+        buf  = CandleBuffer()
+        buf.load(*decode_rows(rows[::-1]))
+        buf.update(buf.view()["timestamp"][-1:], np.zeros((5, 1)), STEP)   # blank forming bar
+        stream.seed("SOLUSDT", "15", buf)
+        # A push overwrites the forming bar with the stub's live values
+        assert _wait(lambda: (c := stream.get_candles("SOLUSDT", "15")) is not None
+                     and c["close"][-1] > 0)
+    finally:
+        if stream is not None:
+            stream.stop()
+        server.close()
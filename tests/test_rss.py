@@ -0,0 +1,34 @@
+"""market.rss's streaming reader against feedparser on saved Google News feeds."""
+
+import os
+
+import pytest
+
+from market import rss
+
+ROOT     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = rss._fixture_paths(os.path.join(ROOT, "rss_fixtures"))
+
+
+def test_fixtures_present():
+    assert FIXTURES, "rss_fixtures/*.xml missing"
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_items_match_feedparser(path):
+    pytest.importorskip("feedparser")
+    with open(path, "rb") as f:
+        body = f.read()
+    assert rss.parse_feed(body).entries
+    assert rss._feedparser_mismatches(body) == []
+
+
+def test_since_drops_old_items():
+    with open(FIXTURES[0], "rb") as f:
+        body = f.read()
+    entries = rss.parse_feed(body).entries
+    dated   = sorted(e["published"] for e in entries if e["published"] is not None)
+    since   = dated[len(dated) // 2]
+    recent  = rss.parse_feed(body, since=since).entries
+    assert recent
+    assert all(e["published"] is None or e["published"] >= since for e in recent)
@@ -0,0 +1,31 @@
+"""Vectorised S/R swing detection against the original per-bar loop."""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FIXTURES
+from factors import support_resistance as sr
+
+
+@pytest.fixture(scope="module")
+def bars():
+    data = np.loadtxt(os.path.join(FIXTURES, "sr_bars.csv"), delimiter=",", skiprows=1)
+    return data[:, 0].copy(), data[:, 1].copy()
+
+
+@pytest.mark.parametrize("window", [sr.SWING_WINDOW_4H, sr.SWING_WINDOW_1H])
+@pytest.mark.parametrize("size", [5, 11, 12, 100, 400])
+def test_vectorised_matches_reference(bars, window, size):
+    highs, lows = bars[0][-size:], bars[1][-size:]
+    assert (sr._detect_swing_levels(highs, lows, window, "1h_swing")
+            == sr._reference_swing_levels(highs, lows, window, "1h_swing"))
+
+
+def test_vectorised_matches_reference_with_nan(bars):
+    highs, lows = bars[0][:150].copy(), bars[1][:150].copy()
+    highs[40], lows[90] = np.nan, np.nan
+    assert (sr._detect_swing_levels(highs, lows, 5, "1h_swing")
+            == sr._reference_swing_levels(highs, lows, 5, "1h_swing"))
+
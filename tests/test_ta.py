@@ -0,0 +1,25 @@
+"""factors.ta against TA-Lib, through SciPy's lfilter and the NumPy block scan."""
+
+import pytest
+
+from factors import ta
+
+pytest.importorskip("talib")
+
+
+@pytest.fixture(params=["lfilter", "numpy-scan"])
+def scan_path(request, monkeypatch):
+    if request.param == "lfilter":
+        if ta.lfilter is None:
+            pytest.skip("SciPy not installed")
+    else:
+        monkeypatch.setattr(ta, "lfilter", None)
+    return request.param
+
+
+@pytest.mark.parametrize("n", [10, 60, 5000])
+def test_matches_talib(scan_path, n):
+    for name, (same_nans, err) in ta._talib_errors(n).items():
+        assert same_nans, f"{name}: NaN lookback differs from TA-Lib"
+        assert err < 1e-9, f"{name}: max relative error {err:.1e}"
+